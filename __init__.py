@@ -6,28 +6,48 @@ import asyncio
 import datetime
 import logging
 from contextlib import suppress
-from typing import Optional, Callable
+from typing import Callable, Optional
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform, EVENT_HOMEASSISTANT_STOP
-from homeassistant.core import HomeAssistant, Event, callback
-from homeassistant.exceptions import ConfigEntryNotReady, ConfigEntryAuthFailed
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP, Platform
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
 from homeassistant.helpers.update_coordinator import UpdateFailed
+from homeassistant.util import dt as dt_util
+
+try:
+    from homeassistant.core import SupportsResponse
+except ImportError:  # Before Home Assistant 2023.7 services cannot return data
+    SupportsResponse = None
 
 from .const import (
-    DOMAIN, _LOGGER, CONF_DEVICE_SN, CONF_DEVICE_ID, CONF_HTTP_TOKEN,
-    DEFAULT_POLLING_INTERVAL
+    _LOGGER,
+    CONF_BACKFILL_CONCURRENCY,
+    CONF_DEVICE_ID,
+    CONF_DEVICE_SN,
+    CONF_HTTP_DISK_CACHE,
+    CONF_HTTP_TOKEN,
+    CONF_READ_GAP_REGISTERS,
+    DEFAULT_BACKFILL_CONCURRENCY,
+    DEFAULT_HTTP_DISK_CACHE,
+    DEFAULT_READ_GAP_REGISTERS,
+    DOMAIN,
+    get_timezone,
 )
-from .core.api_client import LumentreeHttpApiClient, AuthException, ApiException
-from .core.mqtt_client import LumentreeMqttClient
 from .coordinators.daily_coordinator import DailyStatsCoordinator
 from .coordinators.monthly_coordinator import MonthlyStatsCoordinator
-from .coordinators.yearly_coordinator import YearlyStatsCoordinator
 from .coordinators.total_coordinator import TotalStatsCoordinator
-from .services.aggregator import StatsAggregator
+from .coordinators.yearly_coordinator import YearlyStatsCoordinator
+from .core.api_client import ApiException, AuthException, LumentreeHttpApiClient
+from .core.mqtt_client import RESPONSE_TIMEOUT_SECONDS, LumentreeMqttClient
+from .core.rate_limiter import async_get_rate_limiter, async_release_rate_limiter
+from .core.raw_frames import RAW_FRAME_RING_SIZE
+from .core.read_planner import enabled_realtime_keys
+from .core.response_cache import HTTP_CACHE_DIR, ResponseCache
 from .services import cache as cache_io
+from .services.aggregator import StatsAggregator
 
 PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.BINARY_SENSOR]
 
@@ -59,7 +79,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             _LOGGER.warning(f"Using SN {device_sn} as Device ID.")
 
         session = async_get_clientsession(hass)
-        api_client = LumentreeHttpApiClient(session)
+        disk_cache = entry.options.get(CONF_HTTP_DISK_CACHE, DEFAULT_HTTP_DISK_CACHE)
+        response_cache = ResponseCache(
+            hass.config.path(HTTP_CACHE_DIR) if disk_cache else None,
+            today=lambda: dt_util.now(get_timezone(hass)).date(),  # Day boundary of the statistics
+        )
+        api_client = LumentreeHttpApiClient(session, response_cache, async_get_rate_limiter(hass))
         api_client.set_token(http_token)
         hass.data[DOMAIN][entry.entry_id]["api_client"] = api_client
 
@@ -83,7 +108,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         await mqtt_client.connect()
 
         # Create aggregators and coordinators
-        aggregator = StatsAggregator(hass, api_client, device_id)
+        aggregator = StatsAggregator(
+            hass,
+            api_client,
+            device_id,
+            entry.options.get(CONF_BACKFILL_CONCURRENCY, DEFAULT_BACKFILL_CONCURRENCY),
+        )
         hass.data[DOMAIN][entry.entry_id]["aggregator"] = aggregator
 
         daily_coord = DailyStatsCoordinator(hass, api_client, aggregator, device_sn)
@@ -114,12 +144,26 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
         hass.async_create_task(_prime_coordinators_staggered())
 
-        polling_interval = datetime.timedelta(seconds=DEFAULT_POLLING_INTERVAL)
-        _poll_count = 0
+        poll_scheduler = mqtt_client.poll_scheduler
+        polling_stopped = False
+
+        @callback
+        def _schedule_next_poll(elapsed: float = 0.0) -> None:
+            """Arm the next poll once the scheduler's interval has passed since the last one."""
+            nonlocal remove_interval
+            delay = max(0.0, poll_scheduler.next_interval(dt_util.now().hour) - elapsed)
+            remove_interval = async_call_later(hass, delay, _async_poll_data)
 
         async def _async_poll_data(now=None):
-            """Poll data from MQTT client."""
-            nonlocal _poll_count
+            """Poll data from MQTT client.
+
+            Closed loop: the next request is only armed once the response has
+            arrived or RESPONSE_TIMEOUT_SECONDS passed, so a lagging broker
+            never has requests stacked on it.
+            """
+            nonlocal remove_interval
+            remove_interval = None  # This call has fired
+            started = hass.loop.time()
             if _LOGGER.isEnabledFor(logging.DEBUG):
                 _LOGGER.debug("MQTT Poll %s.", device_sn)
             domain_data = hass.data.get(DOMAIN)
@@ -129,45 +173,42 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             entry_data = domain_data.get(entry.entry_id)
             if not entry_data:
                 _LOGGER.warning("Entry data missing %s. Stop poll.", entry.entry_id)
-                nonlocal remove_interval
-                current_timer = remove_interval
-                if callable(current_timer):
-                    try:
-                        current_timer()
-                        _LOGGER.info("MQTT poll timer cancelled %s.", device_sn)
-                        remove_interval = None
-                    except Exception as timer_err:
-                        _LOGGER.error("Error cancel timer %s: %s", device_sn, timer_err)
                 return
 
-            active_mqtt_client = entry_data.get("mqtt_client")
-            if not isinstance(active_mqtt_client, LumentreeMqttClient):
-                if _LOGGER.isEnabledFor(logging.DEBUG):
-                    _LOGGER.debug("MQTT client not initialized for %s", device_sn)
-                return
-            if not active_mqtt_client.is_connected:
-                if _LOGGER.isEnabledFor(logging.DEBUG):
-                    _LOGGER.debug("MQTT %s not connected yet, skipping poll", device_sn)
-                return
             try:
+                active_mqtt_client = entry_data.get("mqtt_client")
+                if not isinstance(active_mqtt_client, LumentreeMqttClient):
+                    if _LOGGER.isEnabledFor(logging.DEBUG):
+                        _LOGGER.debug("MQTT client not initialized for %s", device_sn)
+                    return
+                if not active_mqtt_client.is_connected:
+                    if _LOGGER.isEnabledFor(logging.DEBUG):
+                        _LOGGER.debug("MQTT %s not connected yet, skipping poll", device_sn)
+                    return
                 if _LOGGER.isEnabledFor(logging.DEBUG):
                     _LOGGER.debug("Requesting MQTT (main data) %s...", device_sn)
-                await active_mqtt_client.async_request_data()
-                _poll_count += 1
-                if _poll_count % 6 == 0:
-                    await active_mqtt_client.async_request_battery_cells()
-                if _LOGGER.isEnabledFor(logging.DEBUG):
-                    _LOGGER.debug("MQTT request sent %s.", device_sn)
+                # Main block every poll, slower tiers (cells) when due, in one publish
+                if await active_mqtt_client.async_poll():
+                    if _LOGGER.isEnabledFor(logging.DEBUG):
+                        _LOGGER.debug("MQTT request sent %s.", device_sn)
+                    await active_mqtt_client.async_wait_for_response(RESPONSE_TIMEOUT_SECONDS)
             except Exception as poll_err:
                 _LOGGER.error("MQTT poll error %s: %s", device_sn, poll_err)
+            finally:
+                if not polling_stopped:
+                    _schedule_next_poll(hass.loop.time() - started)
 
-        remove_interval = async_track_time_interval(hass, _async_poll_data, polling_interval)
-        _LOGGER.info(f"Started MQTT polling {polling_interval} for {device_sn}")
+        _schedule_next_poll()
+        _LOGGER.info(
+            "Started adaptive MQTT polling (%ss-%ss) for %s",
+            poll_scheduler.min_interval, poll_scheduler.max_interval, device_sn,
+        )
 
         @callback
         def _cancel_timer_on_unload():
             """Cancel the polling timer when the entry is unloaded."""
-            nonlocal remove_interval
+            nonlocal remove_interval, polling_stopped
+            polling_stopped = True
             if _LOGGER.isEnabledFor(logging.DEBUG):
                 _LOGGER.debug("Unload: Cancelling MQTT timer for %s.", device_sn)
             current_timer = remove_interval
@@ -189,9 +230,10 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
         entry.async_on_unload(_cancel_timer_on_unload)
         entry.async_on_unload(hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_stop_mqtt))
+        entry.async_on_unload(entry.add_update_listener(_async_options_updated))
 
         # Services: backfill_now, recompute_month_year, purge_cache, backfill_all, backfill_gaps,
-        #            mark_empty_dates, mark_coverage_range
+        #            mark_empty_dates, mark_coverage_range, dump_raw_frames
         async def _svc_backfill(call):
             days = int(call.data.get("days", 365))
             await aggregator.backfill_last_n_days(days)
@@ -243,6 +285,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             """Purge all cache files for this device."""
             _LOGGER.info(f"Purging all cache for device {device_id}")
             result = await hass.async_add_executor_job(cache_io.purge_device, device_id)
+            await api_client.async_purge_response_cache(device_id)
             _LOGGER.info(f"Purge all cache result: {result}")
 
         async def _svc_purge_and_backfill(call):
@@ -253,6 +296,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             
             _LOGGER.warning(f"Purging ALL cache for device {device_id} and starting fresh smart backfill...")
             result = await hass.async_add_executor_job(cache_io.purge_device, device_id)
+            await api_client.async_purge_response_cache(device_id)
             _LOGGER.info(f"Purge result: {result}")
             
             _LOGGER.info(f"Starting smart backfill for {max_years} years...")
@@ -323,6 +367,18 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
                 cov["latest"] = latest
             cache_io.save_year(device_id, year, c)
 
+        async def _svc_dump_raw_frames(call):
+            """Log the last raw MQTT frames (and return them where services can)."""
+            count = int(call.data.get("count", RAW_FRAME_RING_SIZE))
+            frames = mqtt_client.raw_frames.last(count)
+            _LOGGER.info(
+                "Last %s raw MQTT frames of %s (newest first, %s received):",
+                len(frames), device_sn, mqtt_client.raw_frames.count,
+            )
+            for frame in frames:
+                _LOGGER.info("  %s", frame["hex"])
+            return {"device_sn": device_sn, "frames": frames}
+
         hass.services.async_register(DOMAIN, "backfill_now", _svc_backfill)
         hass.services.async_register(DOMAIN, "recompute_month_year", _svc_recompute)
         hass.services.async_register(DOMAIN, "optimize_cache", _svc_optimize_cache)
@@ -337,6 +393,13 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         hass.services.async_register(DOMAIN, "mark_coverage_range", _svc_mark_coverage_range)
         hass.services.async_register(DOMAIN, "enable_purge_on_startup", _svc_enable_purge_on_startup)
         hass.services.async_register(DOMAIN, "disable_purge_on_startup", _svc_disable_purge_on_startup)
+        if SupportsResponse is not None:
+            hass.services.async_register(
+                DOMAIN, "dump_raw_frames", _svc_dump_raw_frames,
+                supports_response=SupportsResponse.OPTIONAL,
+            )
+        else:
+            hass.services.async_register(DOMAIN, "dump_raw_frames", _svc_dump_raw_frames)
 
         # Auto backfill: first-run (background) and nightly delta
         # Check if we need to purge and backfill on startup (from entry options or default False)
@@ -347,6 +410,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
                 if should_purge_on_startup:
                     _LOGGER.warning("PURGE_AND_BACKFILL_ON_STARTUP is enabled - purging all cache...")
                     result = await hass.async_add_executor_job(cache_io.purge_device, device_id)
+                    await api_client.async_purge_response_cache(device_id)
                     _LOGGER.info(f"Purge result: {result}")
                     _LOGGER.warning("Starting smart backfill for 5 years...")
                     # Use smart backfill for faster performance
@@ -392,6 +456,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         hass.data[DOMAIN][entry.entry_id]["remove_nightly"] = remove_nightly
 
         await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+        # Read only the registers of the enabled realtime entities (enabling or
+        # disabling an entity reloads the entry, which plans the reads again)
+        mqtt_client.plan_reads(
+            enabled_realtime_keys(hass, entry.entry_id, device_sn),
+            entry.options.get(CONF_READ_GAP_REGISTERS, DEFAULT_READ_GAP_REGISTERS),
+        )
         _LOGGER.info("Setup complete for %s (SN/ID: %s)", entry.title, device_sn)
         return True
 
@@ -420,6 +490,11 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             hass.data[DOMAIN].pop(entry.entry_id, None)
         return False
 
+async def _async_options_updated(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry so changed options (see LumentreeOptionsFlow) take effect."""
+    _LOGGER.info(f"Options changed for {entry.title}, reloading")
+    await hass.config_entries.async_reload(entry.entry_id)
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     device_sn = entry.data.get(CONF_DEVICE_SN, "unknown")
@@ -474,6 +549,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         
         # Remove entry data from domain
         hass.data.get(DOMAIN, {}).pop(entry.entry_id, None)
+        if not hass.data.get(DOMAIN):
+            async_release_rate_limiter(hass)
         
         if _LOGGER.isEnabledFor(logging.DEBUG):
             _LOGGER.debug("Removed entry data %s.", entry.entry_id)
@@ -10,6 +10,7 @@ import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.config_entries import ConfigFlowResult
 from homeassistant.core import callback
+from homeassistant.helpers import selector
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from .const import (
@@ -18,6 +19,21 @@ from .const import (
     CONF_DEVICE_SN,
     CONF_DEVICE_NAME,
     CONF_HTTP_TOKEN,
+    CONF_MQTT_TRANSPORT,
+    CONF_POLL_MIN_INTERVAL,
+    CONF_POLL_MAX_INTERVAL,
+    CONF_READ_GAP_REGISTERS,
+    CONF_WRITE_THROTTLE,
+    CONF_HTTP_DISK_CACHE,
+    CONF_BACKFILL_CONCURRENCY,
+    DEFAULT_MQTT_TRANSPORT,
+    DEFAULT_POLL_MIN_INTERVAL,
+    DEFAULT_POLL_MAX_INTERVAL,
+    DEFAULT_READ_GAP_REGISTERS,
+    DEFAULT_HTTP_DISK_CACHE,
+    DEFAULT_BACKFILL_CONCURRENCY,
+    MQTT_TRANSPORT_ASYNCIO,
+    MQTT_TRANSPORT_PAHO,
 )
 from .core.api_client import LumentreeHttpApiClient
 from .core.exceptions import AuthException, ApiException
@@ -31,6 +47,14 @@ class LumentreeConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
     MINOR_VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> LumentreeOptionsFlow:
+        """Get the options flow for this handler."""
+        return LumentreeOptionsFlow(config_entry)
+
     def __init__(self) -> None:
         """Initialize config flow."""
         self._device_id_input: Optional[str] = None
@@ -287,4 +311,74 @@ class LumentreeConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         return self.async_show_form(
             step_id="reconfigure",
             data_schema=vol.Schema({vol.Required(CONF_DEVICE_ID, default=current_device_id): str}),
-        )
\ No newline at end of file
+        )
+
+
+class LumentreeOptionsFlow(config_entries.OptionsFlow):
+    """Options of one entry: MQTT transport, realtime polling, HTTP cache and backfill.
+
+    The entry is reloaded when the options change (see _async_options_updated in
+    __init__.py). The MQTT transport is that of the shared connection, so it
+    takes effect when the first entry using it is set up again.
+    """
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize options flow."""
+        self._entry = config_entry
+
+    async def async_step_init(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        """Manage the options."""
+        errors: dict[str, str] = {}
+        options = dict(self._entry.options)
+
+        if user_input is not None:
+            if user_input[CONF_POLL_MIN_INTERVAL] > user_input[CONF_POLL_MAX_INTERVAL]:
+                errors["base"] = "poll_interval_range"
+            elif not _valid_write_throttle(user_input.get(CONF_WRITE_THROTTLE)):
+                errors[CONF_WRITE_THROTTLE] = "invalid_write_throttle"
+            else:
+                return self.async_create_entry(title="", data=user_input)
+            options.update(user_input)
+
+        schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_MQTT_TRANSPORT,
+                    default=options.get(CONF_MQTT_TRANSPORT, DEFAULT_MQTT_TRANSPORT),
+                ): vol.In([MQTT_TRANSPORT_PAHO, MQTT_TRANSPORT_ASYNCIO]),
+                vol.Required(
+                    CONF_POLL_MIN_INTERVAL,
+                    default=options.get(CONF_POLL_MIN_INTERVAL, DEFAULT_POLL_MIN_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=3600)),
+                vol.Required(
+                    CONF_POLL_MAX_INTERVAL,
+                    default=options.get(CONF_POLL_MAX_INTERVAL, DEFAULT_POLL_MAX_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=3600)),
+                vol.Required(
+                    CONF_READ_GAP_REGISTERS,
+                    default=options.get(CONF_READ_GAP_REGISTERS, DEFAULT_READ_GAP_REGISTERS),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=125)),
+                vol.Required(
+                    CONF_HTTP_DISK_CACHE,
+                    default=options.get(CONF_HTTP_DISK_CACHE, DEFAULT_HTTP_DISK_CACHE),
+                ): bool,
+                vol.Required(
+                    CONF_BACKFILL_CONCURRENCY,
+                    default=options.get(CONF_BACKFILL_CONCURRENCY, DEFAULT_BACKFILL_CONCURRENCY),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=32)),
+                vol.Optional(
+                    CONF_WRITE_THROTTLE,
+                    default=options.get(CONF_WRITE_THROTTLE) or {},
+                ): selector.ObjectSelector(),
+            }
+        )
+        return self.async_show_form(step_id="init", data_schema=schema, errors=errors)
+
+
+def _valid_write_throttle(value: Any) -> bool:
+    """Whether a write throttle option has the {key: {field: value}} shape."""
+    if value is None:
+        return True
+    return isinstance(value, dict) and all(
+        isinstance(key, str) and isinstance(rule, dict) for key, rule in value.items()
+    )
@@ -46,15 +46,40 @@ MQTT_KEEPALIVE: Final = 20
 MQTT_SUB_TOPIC_FORMAT: Final = "reportApp/{device_sn}"
 MQTT_PUB_TOPIC_FORMAT: Final = "listenApp/{device_sn}"
 MQTT_CLIENT_ID_FORMAT: Final = "android-{device_id}-{timestamp}"
+# hass.data key of the MQTT connection shared by all config entries
+DATA_MQTT_HUB: Final = f"{DOMAIN}_mqtt_hub"
+# hass.data key of the HTTP rate limiter shared by all config entries (core/rate_limiter.py)
+DATA_RATE_LIMITER: Final = f"{DOMAIN}_rate_limiter"
+# MQTT transport: "asyncio" runs on the event loop, "paho" uses paho's network thread
+MQTT_TRANSPORT_ASYNCIO: Final = "asyncio"
+MQTT_TRANSPORT_PAHO: Final = "paho"
+DEFAULT_MQTT_TRANSPORT: Final = MQTT_TRANSPORT_PAHO  # asyncio is opt-in per entry option
 
 # --- Configuration Keys ---
 CONF_DEVICE_ID: Final = "device_id"
 CONF_DEVICE_SN: Final = "device_sn"
 CONF_DEVICE_NAME: Final = "device_name"
 CONF_HTTP_TOKEN: Final = "http_token"
+CONF_MQTT_TRANSPORT: Final = "mqtt_transport"  # Entry option, see MQTT_TRANSPORT_*
+CONF_POLL_MIN_INTERVAL: Final = "poll_min_interval"  # Entry option (seconds)
+CONF_POLL_MAX_INTERVAL: Final = "poll_max_interval"  # Entry option (seconds)
+CONF_READ_GAP_REGISTERS: Final = "read_gap_registers"  # Entry option, see core/read_planner.py
+# Entry option {key: {deadband, deadband_pct, min_interval, max_stale}}, see core/write_throttle.py
+CONF_WRITE_THROTTLE: Final = "write_throttle"
+# Entry option: keep statistics responses of past periods on disk, see core/response_cache.py
+CONF_HTTP_DISK_CACHE: Final = "http_disk_cache"
+# Entry option: days fetched at once by day backfill at most, see services/backfill_pipeline.py
+CONF_BACKFILL_CONCURRENCY: Final = "backfill_concurrency"
 
 # --- Polling and Timeout ---
 DEFAULT_POLLING_INTERVAL = 5
+# Bounds of the adaptive realtime poll (core/poll_scheduler.py); set both to 5 for a fixed poll
+DEFAULT_POLL_MIN_INTERVAL: Final = 2
+DEFAULT_POLL_MAX_INTERVAL: Final = 60
+# Registers between two needed ranges that are still read to save a separate read
+DEFAULT_READ_GAP_REGISTERS: Final = 8
+DEFAULT_HTTP_DISK_CACHE: Final = True
+DEFAULT_BACKFILL_CONCURRENCY: Final = 8
 DEFAULT_STATS_INTERVAL = 600 # 10 minutes
 
 # New intervals for statistics coordinators
@@ -66,39 +91,12 @@ DEFAULT_YEARLY_INTERVAL: Final = 300       # 5 minutes (to match daily update fr
 DEFAULT_TARIFF_VND_PER_KWH: Final = 2900   # Fixed tariff for savings calculation (2.9k/kWh - average for ~400 kWh/month)
 
 # --- Dispatcher Signal ---
-SIGNAL_UPDATE_FORMAT: Final = f"{DOMAIN}_mqtt_update_{{device_sn}}"
+# Realtime updates go through per-key dispatchers (core/key_dispatcher.py): device_sn -> KeyDispatcher
+DATA_KEY_DISPATCHERS: Final = f"{DOMAIN}_key_dispatchers"
 SIGNAL_STATS_UPDATE_FORMAT: Final = f"{DOMAIN}_stats_update_{{device_sn}}"
 
-# --- Register Addresses (MQTT Real-time - Only registers within 0-94 range) ---
-REG_ADDR = {
-    "FIRMWARE_VERSION": 2,
-    "DEVICE_MODEL_START": 3,
-    "CONTROLLER_VERSION": 8,
-    "BATTERY_VOLTAGE": 11,
-    "BATTERY_CURRENT": 12,
-    "AC_OUT_VOLTAGE": 13,
-    "GRID_VOLTAGE": 15,
-    "AC_OUT_FREQ": 16,
-    "AC_IN_FREQ": 17,
-    "AC_OUT_POWER": 18,
-    "PV1_VOLTAGE": 20,
-    "PV1_POWER": 22,
-    "DEVICE_TEMP": 24,
-    "BATTERY_TYPE": 37,
-    "BATTERY_SOC": 50,
-    "AC_IN_POWER": 53,
-    "AC_OUT_VA": 58,
-    "GRID_POWER": 59,
-    "BATTERY_POWER": 61,
-    "LOAD_POWER": 67,
-    "UPS_MODE": 68,
-    "MASTER_SLAVE_STATUS": 70,
-    "PV2_VOLTAGE": 72,
-    "PV2_POWER": 74,
-    # Registers 100+ may only be available if device returns extra data
-    "BATTERY_MODE": 100,
-    "WORK_MODE": 150,
-}
+# --- Register Addresses (MQTT Real-time) ---
+# Main block registers are declared in core/register_schema.py (REALTIME_SCHEMA)
 REG_ADDR_CELL_START: Final = 250
 REG_ADDR_CELL_COUNT: Final = 50
 
@@ -138,7 +136,8 @@ KEY_DAILY_GRID_IN_KWH: Final = "grid_in_today"
 KEY_DAILY_LOAD_KWH: Final = "load_today"
 KEY_DAILY_TOTAL_LOAD_KWH: Final = "total_load_today"
 KEY_TOTAL_LOAD_POWER: Final = "total_load_power"
-KEY_LAST_RAW_MQTT: Final = "last_raw_mqtt_hex"
+KEY_LAST_RAW_MQTT: Final = "last_raw_mqtt_hex"  # Name kept for unique ids; value is a frame count
+KEY_MQTT_RESPONSE_LATENCY: Final = "mqtt_response_latency"
 
 # --- Statistics Keys (Daily / Monthly / Yearly) ---
 # Daily totals already defined above; extend with essential load
@@ -13,6 +13,7 @@ from homeassistant.util import dt as dt_util
 
 from ..core.api_client import LumentreeHttpApiClient
 from ..core.exceptions import ApiException, AuthException
+from ..core.rate_limiter import PRIORITY_LIVE, with_request_priority
 from ..const import DEFAULT_DAILY_INTERVAL, DEFAULT_TARIFF_VND_PER_KWH, get_timezone
 from ..services.aggregator import StatsAggregator
 from ..services import cache as cache_io
@@ -45,6 +46,7 @@ class DailyStatsCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
             always_update=False,
         )
 
+    @with_request_priority(PRIORITY_LIVE)
     async def _async_update_data(self) -> dict[str, Any]:
         """Fetch today's data from API with error handling and recovery."""
         try:
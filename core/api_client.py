@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import asyncio
+import copy
 from typing import Any
 import logging
 import time
@@ -24,6 +25,8 @@ from ..const import (
     URL_GET_MONTH_DATA,
 )
 from .exceptions import ApiException, AuthException
+from .rate_limiter import AdaptiveRateLimiter, RequestTicket, current_priority
+from .response_cache import PERMANENT, RECENT_TTL, ResponseCache, response_lifetime
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -31,27 +34,46 @@ DEFAULT_TIMEOUT = ClientTimeout(total=30)
 AUTH_RETRY_DELAY = 0.5
 AUTH_MAX_RETRIES = 3
 
-# Retry configuration for API requests
+# Retry configuration for API requests (pacing between attempts: core/rate_limiter.py)
 API_MAX_RETRIES = 3
-API_RETRY_BASE_DELAY = 1.0  # Start with 1 second
-API_RETRY_MAX_DELAY = 10.0  # Cap at 10 seconds
 
 class LumentreeHttpApiClient:
     """HTTP API client for Lumentree cloud services."""
 
-    __slots__ = ("_session", "_token", "_device_info_cache")
+    __slots__ = (
+        "_session",
+        "_token",
+        "_device_info_cache",
+        "_in_flight",
+        "_request_counts",
+        "_response_cache",
+        "_rate_limiter",
+    )
 
     _CACHE_TIMEOUT = 3600  # 1 hour
 
-    def __init__(self, session: aiohttp.ClientSession) -> None:
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        response_cache: ResponseCache | None = None,
+        rate_limiter: AdaptiveRateLimiter | None = None,
+    ) -> None:
         """Initialize the API client.
 
         Args:
             session: aiohttp client session for HTTP requests
+            response_cache: Cache of statistics responses (None: always ask the server)
+            rate_limiter: Limiter of every attempt, shared by the clients of all entries
+                (see async_get_rate_limiter); None gives the client a limiter of its own
         """
         self._session = session
         self._token: str | None = None
         self._device_info_cache: dict[str, tuple[dict[str, Any], float]] = {}
+        # Single-flight: identical GET requests in progress share one task (and its ticket)
+        self._in_flight: dict[tuple, tuple[asyncio.Task, RequestTicket]] = {}
+        self._request_counts = {"sent": 0, "coalesced": 0, "failed": 0}
+        self._response_cache = response_cache
+        self._rate_limiter = rate_limiter or AdaptiveRateLimiter()
 
     # ---------------------------
     # Helpers for statistics
@@ -106,17 +128,154 @@ class LumentreeHttpApiClient:
         if _LOGGER.isEnabledFor(logging.DEBUG):
             _LOGGER.debug("API token %s.", "set" if token else "cleared")
 
+    @property
+    def request_stats(self) -> dict[str, Any]:
+        """HTTP requests sent, identical requests that joined one in flight, cache use."""
+        stats: dict[str, Any] = {**self._request_counts, "in_flight": len(self._in_flight)}
+        if self._response_cache is not None:
+            stats["cache"] = self._response_cache.as_dict()
+        stats["rate_limit"] = self._rate_limiter.as_dict()
+        return stats
+
+    @property
+    def failed_attempts(self) -> int:
+        """HTTP attempts that failed with a timeout, connection or server error."""
+        return self._request_counts["failed"]
+
+    async def async_purge_response_cache(self, device_identifier: str) -> None:
+        """Forget the cached responses of a device (its statistics are fetched again)."""
+        if self._response_cache is not None:
+            await self._response_cache.async_purge_device(device_identifier)
+
+    @staticmethod
+    def _flight_key(
+        endpoint: str, params: dict[str, Any] | None, extra_headers: dict[str, str] | None
+    ) -> tuple:
+        """Identity of a GET request: endpoint, canonical params and extra headers."""
+        return (
+            endpoint,
+            tuple(sorted((str(k), str(v)) for k, v in (params or {}).items())),
+            tuple(sorted((extra_headers or {}).items())),
+        )
+
     async def _request(
         self,
         method: str,
         endpoint: str,
-        params: Optional[dict[str, Any]] = None,
-        data: Optional[dict[str, Any]] = None,
-        extra_headers: Optional[Dict[str, str]] = None,
+        params: dict[str, Any] | None = None,
+        data: dict[str, Any] | None = None,
+        extra_headers: dict[str, str] | None = None,
+        requires_auth: bool = True,
+        max_retries: int = API_MAX_RETRIES,
+    ) -> dict[str, Any]:
+        """Make HTTP request to API, sharing identical GET requests in flight.
+
+        The daily coordinator, the aggregator, the backfill services and the
+        midnight cache save fetch the same day endpoints independently. A GET
+        with the same endpoint and params as one still in progress waits for
+        that one instead of going out again; every caller gets its own copy of
+        the response (the shared one is kept by the cache) or the same exception.
+        Statistics responses are then reused from the response cache as long
+        as response_lifetime() allows. Every attempt sent waits for the rate
+        limiter at the priority of the calling context (current_priority());
+        a caller joining a shared request raises its priority if needed.
+
+        Args:
+            method: HTTP method (GET, POST, etc.)
+            endpoint: API endpoint URL or path
+            params: Query parameters
+            data: Request body data
+            extra_headers: Additional headers
+            requires_auth: Whether authentication is required
+            max_retries: Maximum number of retry attempts for network/server errors
+
+        Returns:
+            Response JSON data
+
+        Raises:
+            AuthException: If authentication fails
+            ApiException: If API request fails
+        """
+        priority = current_priority()
+        if method.upper() != "GET" or data:
+            self._request_counts["sent"] += 1
+            return await self._send_request(
+                method, endpoint, params, data, extra_headers, requires_auth, max_retries,
+                RequestTicket(priority),
+            )
+
+        key = self._flight_key(endpoint, params, extra_headers)
+        cache = self._response_cache
+        lifetime = response_lifetime(endpoint, params, cache.today()) if cache is not None else None
+        if lifetime is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                return copy.deepcopy(cached)
+
+        flight = self._in_flight.get(key)
+        if flight is None:
+            ticket = RequestTicket(priority)
+            task = asyncio.ensure_future(
+                self._fetch_shared(
+                    key,
+                    lifetime,
+                    (method, endpoint, params, data, extra_headers, requires_auth, max_retries,
+                     ticket),
+                )
+            )
+            self._in_flight[key] = (task, ticket)
+            task.add_done_callback(lambda done: self._flight_done(key, done))
+        else:
+            task, ticket = flight
+            ticket.priority = min(ticket.priority, priority)
+            self._request_counts["coalesced"] += 1
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug("HTTP GET %s %s joined the request in flight", endpoint, params)
+        # A cancelled caller must not cancel the request the others wait for
+        return copy.deepcopy(await asyncio.shield(task))
+
+    async def _fetch_shared(
+        self, key: tuple, lifetime: float | None, request: tuple
+    ) -> dict[str, Any]:
+        """Body of a shared GET: disk tier for finalized periods, then the server."""
+        cache = self._response_cache
+        if lifetime == PERMANENT:
+            cached = await cache.async_load(key)
+            if cached is not None:
+                return cached
+        if lifetime is not None:
+            cache.misses += 1
+        self._request_counts["sent"] += 1
+        response = await self._send_request(*request)
+        if lifetime == PERMANENT and not response.get("data"):
+            lifetime = RECENT_TTL  # Empty answer for a past period may be a server hiccup
+        if lifetime is not None:
+            await cache.async_store(key, response, lifetime)
+        return response
+
+    def _flight_done(self, key: tuple, task: asyncio.Task) -> None:
+        """Forget a finished shared request."""
+        if self._in_flight.get(key, (None,))[0] is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            task.exception()  # Retrieved here in case every caller was cancelled
+
+    async def _send_request(
+        self,
+        method: str,
+        endpoint: str,
+        params: dict[str, Any] | None = None,
+        data: dict[str, Any] | None = None,
+        extra_headers: dict[str, str] | None = None,
         requires_auth: bool = True,
         max_retries: int = API_MAX_RETRIES,
+        ticket: RequestTicket | None = None,
     ) -> dict[str, Any]:
-        """Make HTTP request to API.
+        """Send one HTTP request to the API, retrying network and server errors.
+
+        Each attempt first waits for a token of the host's rate limiter, and
+        reports its latency or failure back to it; errors lower the rate, so
+        retries are spaced by the limiter instead of a fixed backoff.
 
         Args:
             method: HTTP method (GET, POST, etc.)
@@ -126,6 +285,7 @@ class LumentreeHttpApiClient:
             extra_headers: Additional headers
             requires_auth: Whether authentication is required
             max_retries: Maximum number of retry attempts for network/server errors
+            ticket: Place in the rate limiter queue (None: priority of the calling context)
 
         Returns:
             Response JSON data
@@ -161,10 +321,14 @@ class LumentreeHttpApiClient:
         if _LOGGER.isEnabledFor(logging.DEBUG):
             _LOGGER.debug("HTTP %s %s", method, url)
 
+        limiter = self._rate_limiter
+        if ticket is None:
+            ticket = RequestTicket(current_priority())
         last_exc = None
-        delay = API_RETRY_BASE_DELAY
 
         for attempt in range(max_retries):
+            await limiter.acquire(ticket)
+            started = time.monotonic()
             try:
                 async with self._session.request(
                     method, url, headers=headers, params=params, data=data, timeout=DEFAULT_TIMEOUT
@@ -173,6 +337,8 @@ class LumentreeHttpApiClient:
                         _LOGGER.debug("HTTP %s response: %s", url, response.status)
 
                     resp_text = await response.text()
+                    if response.status < 500 and response.status != 429:
+                        limiter.record_success(time.monotonic() - started)
                     resp_text_short = resp_text[:300]
 
                     try:
@@ -201,25 +367,23 @@ class LumentreeHttpApiClient:
 
                         raise ApiException(f"API error: {msg} (code={return_value})")
 
-                    # Success - reset delay for next request
-                    delay = API_RETRY_BASE_DELAY
                     return resp_json
 
             except (AuthException, ApiException):
                 # Don't retry auth or API errors (except network issues)
                 raise
             except (asyncio.TimeoutError, ClientConnectorError, ServerConnectionError) as exc:
-                # Network/connection errors - retry with exponential backoff
+                # Network/connection errors - retry once the slowed-down limiter allows
                 last_exc = exc
                 error_type = type(exc).__name__
+                limiter.record_error()
+                self._request_counts["failed"] += 1
                 
                 if attempt < max_retries - 1:
                     _LOGGER.warning(
                         f"Network error {url} (attempt {attempt + 1}/{max_retries}): {error_type}: {exc}. "
-                        f"Retrying in {delay:.1f}s..."
+                        f"Retrying at {limiter.rate:.2f} req/s..."
                     )
-                    await asyncio.sleep(delay)
-                    delay = min(delay * 2, API_RETRY_MAX_DELAY)  # Exponential backoff
                 else:
                     _LOGGER.error(
                         f"Network error {url} after {max_retries} attempts: {error_type}: {exc}"
@@ -229,28 +393,30 @@ class LumentreeHttpApiClient:
                 if exc.status in [401, 403]:
                     raise AuthException(f"Auth error ({exc.status}): {exc.message}") from exc
                 
-                # Retry on 5xx server errors
-                if 500 <= exc.status < 600 and attempt < max_retries - 1:
+                # Retry on 5xx server errors and rate limiting
+                overloaded = 500 <= exc.status < 600 or exc.status == 429
+                if overloaded:
+                    limiter.record_error()
+                    self._request_counts["failed"] += 1
+                if overloaded and attempt < max_retries - 1:
                     _LOGGER.warning(
                         f"Server error {url}: {exc.status} (attempt {attempt + 1}/{max_retries}). "
-                        f"Retrying in {delay:.1f}s..."
+                        f"Retrying at {limiter.rate:.2f} req/s..."
                     )
                     last_exc = exc
-                    await asyncio.sleep(delay)
-                    delay = min(delay * 2, API_RETRY_MAX_DELAY)
                 else:
                     _LOGGER.error(f"HTTP error {url}: {exc.status}")
                     raise ApiException(f"HTTP error: {exc.status}") from exc
             except aiohttp.ClientError as exc:
                 # Other client errors - retry
                 last_exc = exc
+                limiter.record_error()
+                self._request_counts["failed"] += 1
                 if attempt < max_retries - 1:
                     _LOGGER.warning(
                         f"Client error {url} (attempt {attempt + 1}/{max_retries}): {exc}. "
-                        f"Retrying in {delay:.1f}s..."
+                        f"Retrying at {limiter.rate:.2f} req/s..."
                     )
-                    await asyncio.sleep(delay)
-                    delay = min(delay * 2, API_RETRY_MAX_DELAY)
                 else:
                     _LOGGER.error(f"Client error {url} after {max_retries} attempts: {exc}")
             except Exception as exc:
@@ -275,7 +441,7 @@ class LumentreeHttpApiClient:
         
         raise ApiException(f"Request failed after {max_retries} attempts (unknown error)")
 
-    async def _get_server_time(self) -> Optional[int]:
+    async def _get_server_time(self) -> int | None:
         """Get server time from API.
 
         Returns:
@@ -330,7 +496,7 @@ class LumentreeHttpApiClient:
             AuthException: If authentication fails
         """
         _LOGGER.info(f"Authenticating device {device_id}")
-        last_exc: Optional[Exception] = None
+        last_exc: Exception | None = None
 
         for attempt in range(AUTH_MAX_RETRIES):
             try:
@@ -562,7 +728,7 @@ class LumentreeHttpApiClient:
                 "bat": [],
             }
 
-    async def _fetch_pv_data(self, base_params: Dict[str, str]) -> dict[str, Any]:
+    async def _fetch_pv_data(self, base_params: dict[str, str]) -> dict[str, Any]:
         """Fetch PV generation data.
 
         Args:
@@ -603,7 +769,7 @@ class LumentreeHttpApiClient:
             _LOGGER.exception("Unexpected PV stats error")
             return {"pv_today": None}
 
-    async def _fetch_battery_data(self, base_params: Dict[str, str]) -> dict[str, Any]:
+    async def _fetch_battery_data(self, base_params: dict[str, str]) -> dict[str, Any]:
         """Fetch battery charge/discharge data.
 
         Args:
@@ -617,7 +783,7 @@ class LumentreeHttpApiClient:
             data = resp.get("data", {})
             bats_data = data.get("bats", [])
 
-            result: Dict[str, Optional[float]] = {"charge_today": None, "discharge_today": None}
+            result: dict[str, float | None] = {"charge_today": None, "discharge_today": None}
 
             if isinstance(bats_data, list):
                 if len(bats_data) > 0 and "tableValue" in bats_data[0]:
@@ -657,7 +823,7 @@ class LumentreeHttpApiClient:
             _LOGGER.exception("Unexpected battery stats error")
             return {"charge_today": None, "discharge_today": None}
 
-    async def _fetch_other_data(self, base_params: Dict[str, str]) -> dict[str, Any]:
+    async def _fetch_other_data(self, base_params: dict[str, str]) -> dict[str, Any]:
         """Fetch grid and load data.
 
         Args:
@@ -670,7 +836,7 @@ class LumentreeHttpApiClient:
             resp = await self._request("GET", URL_GET_OTHER_DAY_DATA, params=base_params, requires_auth=True)
             data = resp.get("data", {})
 
-            result: Dict[str, Optional[float]] = {"grid_in_today": None, "load_today": None}
+            result: dict[str, float | None] = {"grid_in_today": None, "load_today": None}
 
             # Grid
             grid_data = data.get("grid", {})
@@ -765,7 +931,7 @@ class LumentreeHttpApiClient:
             _LOGGER.exception("Unexpected other stats error")
             return {"grid_in_today": None, "load_today": None}
 
-    def _merge_stats_results(self, results: List[Any]) -> dict[str, Any]:
+    def _merge_stats_results(self, results: list[Any]) -> dict[str, Any]:
         """Merge results from concurrent API calls.
 
         Args:
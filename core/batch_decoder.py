@@ -0,0 +1,283 @@
+"""Batch decoder for archived raw MQTT frames.
+
+Replays archived payloads (the hex kept by the raw MQTT sensor, or raw bytes)
+through the realtime frame extractor, classifier and register schema, and
+decodes them column by column into one array per key instead of one dict per
+frame. Large inputs are split into chunks decoded in a process pool.
+
+NumPy is optional: ColumnarFrames.to_numpy() builds a structured array when it
+is installed; everything else uses the standard library.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from array import array
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import chain, islice
+from typing import Any
+
+from .realtime_parser import (
+    BytesLike,
+    FrameExtractor,
+    RealtimeDecodeState,
+    _classify_response,
+)
+from .register_schema import REALTIME_SCHEMA, BlockDecoder
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_FRAMES = 20_000
+NAN = float("nan")
+
+# One column per decoded schema value, in schema order. Text values (ASCII
+# registers, enum names, versions, statuses) are lists; everything else is a
+# float64 array with NaN where the frame has no value (booleans become 0.0/1.0).
+COLUMN_KEYS: tuple[str, ...] = tuple(
+    f.key for f in REALTIME_SCHEMA if f.address is not None or f.derive is not None
+)
+_TEXT_RETURN = {str, str | None}
+TEXT_KEYS = frozenset(
+    f.key
+    for f in REALTIME_SCHEMA
+    if f.ascii
+    or getattr(f.transform or f.derive, "__annotations__", {}).get("return") in _TEXT_RETURN
+)
+
+Column = array | list[str | None]
+FrameInput = BytesLike | str
+
+
+class ColumnarFrames:
+    """Decoded main-register frames as columns.
+
+    Attributes:
+        frame_index: Position of each row's payload in the input
+        columns: One column per key in COLUMN_KEYS
+        layout_counts: Responses per frame layout or rejection reason
+    """
+
+    __slots__ = ("frame_index", "columns", "layout_counts")
+
+    def __init__(self) -> None:
+        """Initialize an empty result."""
+        self.frame_index = array("q")
+        self.columns: dict[str, Column] = {
+            key: [] if key in TEXT_KEYS else array("d") for key in COLUMN_KEYS
+        }
+        self.layout_counts: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.frame_index)
+
+    def __repr__(self) -> str:
+        return f"ColumnarFrames(rows={len(self)}, layouts={self.layout_counts})"
+
+    def extend(self, other: ColumnarFrames) -> None:
+        """Append the rows and counts of another result (chunks in input order)."""
+        self.frame_index.extend(other.frame_index)
+        for key, column in self.columns.items():
+            column.extend(other.columns[key])
+        for layout, count in other.layout_counts.items():
+            self.layout_counts[layout] = self.layout_counts.get(layout, 0) + count
+
+    def to_numpy(self) -> Any:
+        """Return the rows as a NumPy structured array (one field per column).
+
+        Raises:
+            ImportError: If NumPy is not installed
+        """
+        if np is None:
+            raise ImportError("NumPy is required for ColumnarFrames.to_numpy()")
+        dtype = [("frame_index", "i8")]
+        for key, column in self.columns.items():
+            if key in TEXT_KEYS:
+                width = max((len(value) for value in column if value is not None), default=1)
+                dtype.append((key, f"U{width}"))
+            else:
+                dtype.append((key, "f8"))
+        out = np.empty(len(self), dtype=dtype)
+        out["frame_index"] = np.frombuffer(self.frame_index, dtype="i8")
+        for key, column in self.columns.items():
+            if key in TEXT_KEYS:
+                out[key] = ["" if value is None else value for value in column]
+            else:
+                out[key] = np.frombuffer(column, dtype="f8")
+        return out
+
+
+def _to_bytes(frame: FrameInput) -> bytes | None:
+    if isinstance(frame, str):
+        try:
+            return bytes.fromhex(frame)
+        except ValueError:
+            return None
+    return bytes(frame)
+
+
+def decode_chunk(frames: list[FrameInput], offset: int = 0) -> ColumnarFrames:
+    """Decode one chunk of payloads in this process.
+
+    Responses are grouped by block decoder and decoded with
+    BlockDecoder.decode_columns(); cell frames are counted but not decoded.
+
+    Args:
+        frames: Raw payloads (bytes-like or hex strings)
+        offset: Input position of frames[0], recorded in frame_index
+
+    Returns:
+        Columns for every main-register response in the chunk
+    """
+    result = ColumnarFrames()
+    state = RealtimeDecodeState()
+    extractor = FrameExtractor()
+    groups: dict[BlockDecoder, tuple[list[int], list[tuple[Any, ...]]]] = {}
+    rows = 0
+
+    for position, frame in enumerate(frames, offset):
+        payload = _to_bytes(frame)
+        if payload is None:
+            state.count_layout("invalid_hex")
+            continue
+        for resp, crc_verified in extractor.feed(payload):
+            if len(resp) < 6:
+                state.count_layout("short")
+                continue
+            layout = _classify_response(resp, state, crc_verified, quiet=True)
+            if layout is None or layout.decoder is None:
+                continue
+            row_ids, raws = groups.setdefault(layout.decoder, ([], []))
+            row_ids.append(rows)
+            raws.append(layout.decoder.unpack(resp[3:-2]))
+            result.frame_index.append(position)
+            rows += 1
+
+    result.layout_counts = state.layout_counts
+    if len(groups) == 1:
+        # Common case: a single layout, columns need no scattering
+        ((decoder, (_row_ids, raws)),) = groups.items()
+        _fill_columns(result, decoder.decode_columns(raws), None, rows)
+    else:
+        for decoder, (row_ids, raws) in groups.items():
+            _fill_columns(result, decoder.decode_columns(raws), row_ids, rows)
+    return result
+
+
+def _fill_columns(
+    result: ColumnarFrames,
+    decoded: dict[str, list[Any]],
+    row_ids: list[int] | None,
+    rows: int,
+) -> None:
+    """Store decoded columns, either whole (row_ids None) or at the given rows."""
+    for key, column in result.columns.items():
+        values = decoded.get(key)
+        if key not in TEXT_KEYS:
+            values = None if values is None else [NAN if v is None else float(v) for v in values]
+        if row_ids is None:
+            if values is None:
+                values = [None if key in TEXT_KEYS else NAN] * rows
+            column.extend(values)
+            continue
+        if len(column) < rows:
+            column.extend([None if key in TEXT_KEYS else NAN] * (rows - len(column)))
+        if values is not None:
+            for row, value in zip(row_ids, values, strict=True):
+                column[row] = value
+
+
+def _chunks(frames: Iterable[FrameInput], chunk_size: int) -> Iterator[list[FrameInput]]:
+    iterator = iter(frames)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def decode_frames(
+    frames: Iterable[FrameInput],
+    chunk_size: int = DEFAULT_CHUNK_FRAMES,
+    max_workers: int | None = None,
+) -> ColumnarFrames:
+    """Decode archived payloads into columns, chunks in parallel processes.
+
+    The input is consumed lazily; at most two chunks per worker are in flight.
+    A response split across the end of a chunk is not joined with the next one.
+
+    Args:
+        frames: Raw payloads (bytes-like or hex strings) in archive order
+        chunk_size: Payloads per chunk
+        max_workers: Worker processes (default: CPU count); 1 decodes in-process
+
+    Returns:
+        All rows in input order
+    """
+    workers = max_workers or os.cpu_count() or 1
+    chunks = _chunks(frames, chunk_size)
+    result = ColumnarFrames()
+
+    if workers == 1:
+        offset = 0
+        for chunk in chunks:
+            result.extend(decode_chunk(chunk, offset))
+            offset += len(chunk)
+        return result
+
+    first = next(chunks, None)
+    if first is None:
+        return result
+    second = next(chunks, None)
+    if second is None:
+        # A single chunk is not worth starting a pool
+        return decode_chunk(first)
+
+    offset = 0
+    in_flight: deque[Future] = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk in chain((first, second), chunks):
+            if len(in_flight) >= workers * 2:
+                result.extend(in_flight.popleft().result())
+            in_flight.append(executor.submit(decode_chunk, chunk, offset))
+            offset += len(chunk)
+        while in_flight:
+            result.extend(in_flight.popleft().result())
+
+    if _LOGGER.isEnabledFor(logging.DEBUG):
+        _LOGGER.debug(
+            "Decoded %s payloads into %s rows: %s", offset, len(result), result.layout_counts
+        )
+    return result
+
+
+def read_frame_file(path: str | os.PathLike[str]) -> Iterator[str]:
+    """Yield the payload hex of each line of an archive file.
+
+    Lines may carry other columns before the payload (e.g. a timestamp); the
+    last comma or whitespace separated field is used. Empty lines are skipped.
+    """
+    with open(path, encoding="ascii", errors="replace") as handle:
+        for line in handle:
+            fields = line.replace(",", " ").split()
+            if fields:
+                yield fields[-1]
+
+
+def decode_file(
+    path: str | os.PathLike[str],
+    chunk_size: int = DEFAULT_CHUNK_FRAMES,
+    max_workers: int | None = None,
+) -> ColumnarFrames:
+    """Decode an archive with one payload hex per line (see read_frame_file()).
+
+    frame_index is then the position of the line among the non-empty lines.
+    """
+    return decode_frames(read_frame_file(path), chunk_size, max_workers)
@@ -0,0 +1,123 @@
+"""Per-key routing of realtime updates to the entities that show them.
+
+A batch of realtime values used to go out as one dispatcher signal per
+device, so every realtime entity (about 45 per device) was called for every
+batch just to find its key missing. KeyDispatcher indexes subscribers by the
+keys they show: a batch only calls the subscribers of keys present in it,
+each once however many of its keys it carries. Batches are change-driven
+(see RealtimeDecodeState), so present keys are the changed ones.
+
+The API mirrors homeassistant.helpers.dispatcher: entities connect with
+async_key_dispatcher_connect() and keep the returned disconnect callable,
+the MQTT client sends with async_key_dispatcher_send().
+"""
+
+import logging
+from collections.abc import Callable, Iterable, Mapping
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from ..const import DATA_KEY_DISPATCHERS
+
+_LOGGER = logging.getLogger(__name__)
+
+UpdateTarget = Callable[[Mapping[str, Any]], None]
+
+
+class KeyDispatcher:
+    """Subscribers of one device, indexed by realtime key. Used on the event loop only."""
+
+    __slots__ = ("_targets", "batches", "callbacks")
+
+    def __init__(self) -> None:
+        """Initialize with no subscriber."""
+        self._targets: dict[str, list[UpdateTarget]] = {}
+        self.batches = 0
+        self.callbacks = 0
+
+    def connect(self, keys: Iterable[str], target: UpdateTarget) -> Callable[[], None]:
+        """Call target with every batch carrying one of the keys.
+
+        Returns:
+            Callable removing the subscription
+        """
+        keys = tuple(dict.fromkeys(keys))
+        for key in keys:
+            self._targets.setdefault(key, []).append(target)
+
+        def disconnect() -> None:
+            for key in keys:
+                targets = self._targets.get(key)
+                if targets and target in targets:
+                    targets.remove(target)
+                    if not targets:
+                        del self._targets[key]
+
+        return disconnect
+
+    def send(self, data: Mapping[str, Any]) -> int:
+        """Call the subscribers of the keys in data, each once.
+
+        Returns:
+            Number of subscribers called
+        """
+        targets = self._targets
+        # Walk whichever side is smaller; ChainMap/RealtimeRecord lookups go by subscribed key
+        if isinstance(data, dict) and len(data) < len(targets):
+            keys = [key for key in data if key in targets]
+        else:
+            keys = [key for key in targets if key in data]
+        self.batches += 1
+        if not keys:
+            return 0
+        if len(keys) == 1:
+            called = list(targets[keys[0]])
+        else:
+            called = list(dict.fromkeys(target for key in keys for target in targets[key]))
+        for target in called:
+            try:
+                target(data)
+            except Exception:
+                _LOGGER.exception("Error in realtime update of %s", target)
+        self.callbacks += len(called)
+        return len(called)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Summary for diagnostics."""
+        return {
+            "subscribed_keys": len(self._targets),
+            "batches": self.batches,
+            "callbacks": self.callbacks,
+        }
+
+
+@callback
+def async_key_dispatcher_connect(
+    hass: HomeAssistant, device_sn: str, keys: Iterable[str], target: UpdateTarget
+) -> Callable[[], None]:
+    """Subscribe target to the given realtime keys of a device.
+
+    Returns:
+        Callable removing the subscription
+    """
+    dispatchers: dict[str, KeyDispatcher] = hass.data.setdefault(DATA_KEY_DISPATCHERS, {})
+    dispatcher = dispatchers.get(device_sn)
+    if dispatcher is None:
+        dispatcher = dispatchers[device_sn] = KeyDispatcher()
+    return dispatcher.connect(keys, target)
+
+
+@callback
+def async_key_dispatcher_send(
+    hass: HomeAssistant, device_sn: str, data: Mapping[str, Any]
+) -> int:
+    """Send a batch of realtime values of a device to the subscribers of its keys.
+
+    Returns:
+        Number of subscribers called
+    """
+    dispatcher = hass.data.get(DATA_KEY_DISPATCHERS, {}).get(device_sn)
+    if dispatcher is None:
+        return 0
+    return dispatcher.send(data)
@@ -0,0 +1,99 @@
+"""Latest-wins handoff of decoded MQTT messages from the network thread to the loop.
+
+With the paho transport every message is decoded on paho's thread and handed
+to the event loop. Scheduling one loop callback per message lets them pile up
+while the loop is stalled (recorder purge, slow startup), each holding a full
+record that is stale by the time it runs. FrameMailbox keeps one slot per
+device instead: messages arriving before the loop has taken the slot are
+merged into it (later values win), only the first one schedules a drain, and
+the merged records are folded into one dict once there are more than
+max_records of them. Memory stays bounded however long the loop stalls, and
+catching up costs one callback.
+"""
+
+import logging
+import threading
+from collections import deque
+from collections.abc import Mapping, MutableMapping
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+MAILBOX_MAX_RECORDS = 4  # Records kept apart before the slot is folded into one dict
+MAILBOX_MAX_RESPONSES = 16  # Response timings kept (outstanding requests are far fewer)
+
+Response = tuple[int, int, float]  # (function code, byte count, receive time)
+
+
+class FrameMailbox:
+    """Bounded, latest-wins slot of one device between the network thread and the loop.
+
+    put() runs on the network thread, take() on the event loop.
+    """
+
+    __slots__ = (
+        "max_records",
+        "_lock",
+        "_records",
+        "_responses",
+        "_full",
+        "dropped",
+    )
+
+    def __init__(self, max_records: int = MAILBOX_MAX_RECORDS) -> None:
+        """Initialize an empty mailbox.
+
+        Args:
+            max_records: Records kept apart before they are folded into one dict
+        """
+        self.max_records = max(1, max_records)
+        self._lock = threading.Lock()
+        self._records: list[MutableMapping[str, Any]] = []
+        self._responses: deque[Response] = deque(maxlen=MAILBOX_MAX_RESPONSES)
+        self._full = False
+        # Messages merged into one still waiting for the loop instead of delivered on their own
+        self.dropped = 0
+
+    def put(self, records: list[MutableMapping[str, Any]], responses: list[Response]) -> bool:
+        """Store a decoded message, merging it into the one still waiting.
+
+        Args:
+            records: Changed records of the message, oldest first
+            responses: Response timings of the message
+
+        Returns:
+            True if the slot was empty, i.e. the caller must schedule a take()
+        """
+        with self._lock:
+            first = not self._full
+            if not first:
+                self.dropped += 1
+            self._full = True
+            self._responses.extend(responses)
+            self._records.extend(records)
+            if len(self._records) > self.max_records:
+                merged: dict[str, Any] = {}
+                for record in self._records:
+                    merged.update(record)
+                self._records = [merged]
+        if not first and _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Loop behind, merged a message (%s so far)", self.dropped)
+        return first
+
+    def take(self) -> tuple[list[MutableMapping[str, Any]], list[Response]]:
+        """Empty the slot: records oldest first and response timings."""
+        with self._lock:
+            records = self._records
+            responses = list(self._responses)
+            self._records = []
+            self._responses.clear()
+            self._full = False
+        return records, responses
+
+    def clear(self) -> None:
+        """Discard whatever is waiting (device went offline)."""
+        self.take()
+
+    def as_dict(self) -> Mapping[str, Any]:
+        """Summary for diagnostics."""
+        return {"dropped": self.dropped, "waiting": self._full}
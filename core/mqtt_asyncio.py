@@ -0,0 +1,395 @@
+"""Event-loop native MQTT transport for the shared Lumentree connection.
+
+Speaks the small part of MQTT 3.1.1 the integration needs (CONNECT, QoS 0
+SUBSCRIBE/PUBLISH, keepalive) directly on an asyncio stream, so received
+messages are decoded and delivered on the event loop without a network thread
+or a call_soon_threadsafe hop per message. Publishing is a buffered write
+instead of an executor job.
+"""
+
+import asyncio
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+
+from ..const import (
+    MQTT_BROKER,
+    MQTT_KEEPALIVE,
+    MQTT_PASSWORD,
+    MQTT_PORT,
+    MQTT_TRANSPORT_ASYNCIO,
+    MQTT_USERNAME,
+)
+from .mqtt_hub import (
+    CONNECT_TIMEOUT,
+    MAX_RECONNECT_ATTEMPTS,
+    RECONNECT_DELAY_SECONDS,
+    MqttHubBase,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Control packet types (high nibble of the fixed header)
+CONNECT = 0x10
+CONNACK = 0x20
+PUBLISH = 0x30
+PUBACK = 0x40
+SUBSCRIBE = 0x80
+SUBACK = 0x90
+UNSUBSCRIBE = 0xA0
+UNSUBACK = 0xB0
+PINGREQ = 0xC0
+PINGRESP = 0xD0
+DISCONNECT = 0xE0
+
+PINGREQ_PACKET = b"\xc0\x00"
+DISCONNECT_PACKET = b"\xe0\x00"
+
+CONNACK_ERRORS = {
+    1: "Protocol",
+    2: "ID Rejected",
+    3: "Server Unavailable",
+    4: "Bad User/Password",
+    5: "Not Authorized",
+}
+
+
+def _encode_length(length: int) -> bytes:
+    """Encode a remaining length as an MQTT variable byte integer."""
+    out = bytearray()
+    while True:
+        length, digit = divmod(length, 128)
+        out.append(digit | 0x80 if length else digit)
+        if not length:
+            return bytes(out)
+
+
+def _encode_string(value: str) -> bytes:
+    data = value.encode("utf-8")
+    return len(data).to_bytes(2, "big") + data
+
+
+def _packet(header: int, body: bytes) -> bytes:
+    return bytes((header,)) + _encode_length(len(body)) + body
+
+
+def encode_connect(
+    client_id: str, username: str | None, password: str | None, keepalive: int
+) -> bytes:
+    """Build a clean-session CONNECT packet."""
+    flags = 0x02
+    payload = _encode_string(client_id)
+    if username is not None:
+        flags |= 0x80
+        payload += _encode_string(username)
+        if password is not None:
+            flags |= 0x40
+            payload += _encode_string(password)
+    body = _encode_string("MQTT") + bytes((4, flags)) + keepalive.to_bytes(2, "big") + payload
+    return _packet(CONNECT, body)
+
+
+def encode_publish(topic: str, payload: bytes) -> bytes:
+    """Build a QoS 0 PUBLISH packet."""
+    return _packet(PUBLISH, _encode_string(topic) + payload)
+
+
+def encode_subscribe(packet_id: int, topics: tuple[str, ...]) -> bytes:
+    """Build a SUBSCRIBE packet for the topics at QoS 0."""
+    body = packet_id.to_bytes(2, "big") + b"".join(_encode_string(t) + b"\x00" for t in topics)
+    return _packet(SUBSCRIBE | 0x02, body)
+
+
+def encode_unsubscribe(packet_id: int, topics: tuple[str, ...]) -> bytes:
+    """Build an UNSUBSCRIBE packet."""
+    body = packet_id.to_bytes(2, "big") + b"".join(_encode_string(t) for t in topics)
+    return _packet(UNSUBSCRIBE | 0x02, body)
+
+
+async def read_packet(reader: asyncio.StreamReader) -> tuple[int, int, bytes]:
+    """Read one control packet.
+
+    Returns:
+        (packet type, header flags, body)
+
+    Raises:
+        asyncio.IncompleteReadError: If the stream ends mid-packet
+        ValueError: If the remaining length is malformed
+    """
+    header = (await reader.readexactly(1))[0]
+    length = 0
+    for shift in (0, 7, 14, 21):
+        digit = (await reader.readexactly(1))[0]
+        length |= (digit & 0x7F) << shift
+        if not digit & 0x80:
+            break
+    else:
+        raise ValueError("Malformed MQTT remaining length")
+    body = await reader.readexactly(length) if length else b""
+    return header & 0xF0, header & 0x0F, body
+
+
+def parse_publish(flags: int, body: bytes) -> tuple[str, bytes, int | None]:
+    """Split a PUBLISH body into topic, payload and packet ID (None at QoS 0)."""
+    topic_len = int.from_bytes(body[:2], "big")
+    topic = body[2 : 2 + topic_len].decode("utf-8", errors="replace")
+    pos = 2 + topic_len
+    packet_id = None
+    if flags & 0x06:
+        packet_id = int.from_bytes(body[pos : pos + 2], "big")
+        pos += 2
+    return topic, body[pos:], packet_id
+
+
+class LumentreeAsyncioMqttHub(MqttHubBase):
+    """Shared connection on an asyncio stream, messages handled on the event loop."""
+
+    __slots__ = (
+        "_reader",
+        "_writer",
+        "_reader_task",
+        "_keepalive_task",
+        "_reconnect_task",
+        "_packet_id",
+        "_last_received",
+    )
+
+    transport = MQTT_TRANSPORT_ASYNCIO
+    callbacks_on_loop = True
+
+    def __init__(
+        self, hass: HomeAssistant, device_id: str, host: str = MQTT_BROKER, port: int = MQTT_PORT
+    ) -> None:
+        """Initialize the hub (see MqttHubBase)."""
+        super().__init__(hass, device_id, host, port)
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._reader_task: asyncio.Task | None = None
+        self._keepalive_task: asyncio.Task | None = None
+        self._reconnect_task: asyncio.Task | None = None
+        self._packet_id = 0
+        self._last_received = 0.0
+
+    def _next_packet_id(self) -> int:
+        self._packet_id = self._packet_id % 0xFFFF + 1
+        return self._packet_id
+
+    def _write(self, packet: bytes) -> bool:
+        """Queue a packet on the socket; False if there is no usable connection."""
+        writer = self._writer
+        if writer is None or writer.is_closing():
+            return False
+        writer.write(packet)
+        return True
+
+    async def connect(self) -> None:
+        """Establish the shared MQTT connection (no-op if already connected)."""
+        async with self._connect_lock:
+            if self._is_connected:
+                if _LOGGER.isEnabledFor(logging.DEBUG):
+                    _LOGGER.debug("MQTT already connected %s", self._client_id)
+                return
+
+            self._stopping = False
+            _LOGGER.info(
+                f"MQTT connecting: {self._host}:{self._port} (Client: {self._client_id}) "
+                f"for {len(self._devices)} device(s)"
+            )
+
+            writer = None
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self._host, self._port), timeout=CONNECT_TIMEOUT
+                )
+                writer.write(
+                    encode_connect(self._client_id, MQTT_USERNAME, MQTT_PASSWORD, MQTT_KEEPALIVE)
+                )
+                packet_type, _flags, body = await asyncio.wait_for(
+                    read_packet(reader), timeout=CONNECT_TIMEOUT
+                )
+                if packet_type != CONNACK or len(body) < 2:
+                    raise ConnectionRefusedError(f"Unexpected MQTT packet 0x{packet_type:02x}")
+                rc = body[1]
+                if rc:
+                    err = CONNACK_ERRORS.get(rc, "Unknown")
+                    _LOGGER.error(f"MQTT connection refused {self._client_id} (rc={rc}): {err}")
+                    raise ConnectionRefusedError(f"MQTT connection refused: {err}")
+            except Exception as exc:
+                if writer is not None:
+                    writer.close()
+                if isinstance(exc, asyncio.TimeoutError):
+                    _LOGGER.error(f"MQTT connection timeout {self._client_id}")
+                    raise ConnectionRefusedError("MQTT connection timeout") from exc
+                _LOGGER.error(f"Failed MQTT connect {self._client_id}: {exc}")
+                if isinstance(exc, ConnectionRefusedError):
+                    raise
+                raise ConnectionRefusedError(f"MQTT setup error: {exc}") from exc
+
+            self._reader = reader
+            self._writer = writer
+            self._is_connected = True
+            self._reconnect_attempts = 0
+            self._last_received = asyncio.get_running_loop().time()
+
+            topics = tuple(self._devices)
+            if topics:
+                writer.write(encode_subscribe(self._next_packet_id(), topics))
+            _LOGGER.info(
+                "MQTT connected %s. Subscribing to %s topic(s)", self._client_id, len(topics)
+            )
+
+            self._reader_task = asyncio.create_task(self._read_loop(reader))
+            self._keepalive_task = asyncio.create_task(self._keepalive_loop())
+
+    async def _read_loop(self, reader: asyncio.StreamReader) -> None:
+        """Receive packets and route PUBLISH messages until the connection drops."""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                packet_type, flags, body = await read_packet(reader)
+                self._last_received = loop.time()
+                if packet_type == PUBLISH:
+                    topic, payload, packet_id = parse_publish(flags, body)
+                    if packet_id is not None:
+                        self._write(_packet(PUBACK, packet_id.to_bytes(2, "big")))
+                    self._route(topic, payload)
+                elif packet_type == SUBACK and _LOGGER.isEnabledFor(logging.DEBUG):
+                    _LOGGER.debug("Subscribe acknowledged %s: %s", self._client_id, body[2:].hex())
+        except asyncio.CancelledError:
+            raise
+        except (asyncio.IncompleteReadError, OSError, ValueError) as exc:
+            self._connection_lost(exc)
+        except Exception as exc:
+            # Anything else (parser or device callback bug) must not leave a dead reader
+            # behind a hub that still looks connected
+            _LOGGER.exception("Unexpected error in MQTT reader %s", self._client_id)
+            self._connection_lost(exc)
+
+    async def _keepalive_loop(self) -> None:
+        """Ping at half the keepalive interval; drop a connection that went silent."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(MQTT_KEEPALIVE / 2)
+            if loop.time() - self._last_received > MQTT_KEEPALIVE * 1.5:
+                self._connection_lost(TimeoutError("no PINGRESP from broker"))
+                return
+            self._write(PINGREQ_PACKET)
+
+    def _close_transport(self) -> asyncio.StreamWriter | None:
+        """Stop the connection tasks and detach the stream (returned for closing)."""
+        current = asyncio.current_task()
+        for task in (self._reader_task, self._keepalive_task):
+            if task is not None and task is not current:
+                task.cancel()
+        self._reader_task = None
+        self._keepalive_task = None
+        writer = self._writer
+        self._reader = None
+        self._writer = None
+        return writer
+
+    @callback
+    def _connection_lost(self, exc: Exception) -> None:
+        """Mark the devices offline and reconnect with backoff."""
+        if not self._is_connected:
+            return
+        self._is_connected = False
+        _LOGGER.warning(f"MQTT unexpected disconnect {self._client_id}: {exc!r}")
+        writer = self._close_transport()
+        if writer is not None:
+            writer.close()
+        for device in self._devices.values():
+            device._handle_disconnect()
+        if not self._stopping:
+            self._schedule_reconnect()
+
+    @callback
+    def _schedule_reconnect(self) -> None:
+        """Schedule a reconnection attempt with exponential backoff.
+
+        After MAX_RECONNECT_ATTEMPTS the delay stays at 120s; it never gives up
+        permanently since MQTT is the primary data source.
+        """
+        self._reconnect_attempts += 1
+        if self._reconnect_attempts <= MAX_RECONNECT_ATTEMPTS:
+            delay = min(RECONNECT_DELAY_SECONDS * (2 ** (self._reconnect_attempts - 1)), 60)
+            _LOGGER.info(
+                "Scheduling MQTT reconnect %s/%s for %s in %ss",
+                self._reconnect_attempts, MAX_RECONNECT_ATTEMPTS, self._client_id, delay,
+            )
+        else:
+            delay = 120
+            _LOGGER.warning(
+                "MQTT reconnects exhausted (%sx) for %s. Retrying every %ss",
+                MAX_RECONNECT_ATTEMPTS, self._client_id, delay,
+            )
+        self._reconnect_task = asyncio.create_task(self._async_reconnect(delay))
+
+    async def _async_reconnect(self, delay: float) -> None:
+        """Wait for delay and open a fresh connection."""
+        await asyncio.sleep(delay)
+        if self._stopping or self._is_connected:
+            return
+        try:
+            await self.connect()
+        except ConnectionRefusedError as exc:
+            _LOGGER.warning("MQTT reconnect failed %s: %s", self._client_id, exc)
+            if not self._stopping:
+                self._schedule_reconnect()
+
+    async def _async_subscribe(self, topic: str) -> None:
+        if self._is_connected:
+            self._write(encode_subscribe(self._next_packet_id(), (topic,)))
+
+    async def _async_unsubscribe(self, topic: str) -> None:
+        if self._is_connected:
+            self._write(encode_unsubscribe(self._next_packet_id(), (topic,)))
+
+    async def async_publish(self, topic: str, payload: bytes) -> bool:
+        """Publish a command for one device over the shared connection.
+
+        Returns:
+            True if successful, False otherwise
+        """
+        writer = self._writer
+        if not self._is_connected or writer is None:
+            _LOGGER.error(f"MQTT not connected {self._client_id}, cannot publish to {topic}")
+            return False
+        try:
+            writer.write(encode_publish(topic, payload))
+            # Only waits when the socket buffer is above its high-water mark
+            await writer.drain()
+        except (ConnectionError, OSError) as exc:
+            _LOGGER.error(f"Failed MQTT publish {self._client_id}: {exc}")
+            return False
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Publish OK %s", topic)
+        return True
+
+    async def disconnect(self) -> None:
+        """Close the shared connection and stop reconnecting."""
+        _LOGGER.info(f"Disconnecting MQTT {self._client_id}")
+        self._stopping = True
+        self._reconnect_attempts = MAX_RECONNECT_ATTEMPTS
+        reconnect_task = self._reconnect_task
+        self._reconnect_task = None
+        if reconnect_task is not None and reconnect_task is not asyncio.current_task():
+            reconnect_task.cancel()
+
+        async with self._connect_lock:
+            was_connected = self._is_connected
+            self._is_connected = False
+            writer = self._close_transport()
+
+        if writer is None:
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug("MQTT connection already closed %s", self._client_id)
+            return
+        try:
+            if was_connected:
+                writer.write(DISCONNECT_PACKET)
+            writer.close()
+            await asyncio.wait_for(writer.wait_closed(), timeout=5)
+            _LOGGER.info(f"MQTT client disconnected {self._client_id}")
+        except (TimeoutError, ConnectionError, OSError) as exc:
+            _LOGGER.warning(f"Error during MQTT disconnect {self._client_id}: {exc}")
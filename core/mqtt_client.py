@@ -1,74 +1,91 @@
-"""MQTT client for Lumentree integration."""
+"""MQTT client for Lumentree integration.
+
+One LumentreeMqttClient per config entry holds the device state (decoding,
+online status, batched updates); the broker connection itself is the hub
+shared by all entries (see mqtt_hub.py), on the transport chosen by the
+mqtt_transport option of the first entry.
+"""
 
 import asyncio
 import logging
-import threading
 import time
-from typing import Any, Dict, Optional, Callable
-from functools import partial
-
-import paho.mqtt.client as paho
-from paho.mqtt.client import MQTTMessage
+from collections import ChainMap
+from collections.abc import Callable, Mapping, MutableMapping
+from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.event import async_call_later
 
 from ..const import (
-    DOMAIN,
-    MQTT_BROKER,
-    MQTT_PORT,
-    MQTT_USERNAME,
-    MQTT_PASSWORD,
-    MQTT_SUB_TOPIC_FORMAT,
-    MQTT_PUB_TOPIC_FORMAT,
-    SIGNAL_UPDATE_FORMAT,
-    CONF_DEVICE_SN,
-    CONF_DEVICE_ID,
-    MQTT_CLIENT_ID_FORMAT,
-    MQTT_KEEPALIVE,
-    KEY_ONLINE_STATUS,
-    KEY_LAST_RAW_MQTT,
+    CONF_MQTT_TRANSPORT,
+    CONF_POLL_MAX_INTERVAL,
+    CONF_POLL_MIN_INTERVAL,
+    DEFAULT_MQTT_TRANSPORT,
+    DEFAULT_POLL_MAX_INTERVAL,
+    DEFAULT_POLL_MIN_INTERVAL,
     DEFAULT_POLLING_INTERVAL,
-    REG_ADDR_CELL_START,
-    REG_ADDR_CELL_COUNT,
+    KEY_BATTERY_CELL_INFO,
+    KEY_LAST_RAW_MQTT,
+    KEY_MQTT_RESPONSE_LATENCY,
+    KEY_ONLINE_STATUS,
+    MQTT_PUB_TOPIC_FORMAT,
+    MQTT_SUB_TOPIC_FORMAT,
 )
-from .realtime_parser import parse_mqtt_payload, generate_modbus_read_command
+from .key_dispatcher import async_key_dispatcher_send
+from .mailbox import FrameMailbox, Response
+from .mqtt_hub import MqttHubBase, async_get_mqtt_hub
+from .poll_plan import (
+    CELLS_TIER,
+    DEFAULT_POLL_TIERS,
+    MAIN_TIER,
+    NUM_MAIN_REGISTERS_TO_READ,
+    PollPlan,
+    PollTier,
+)
+from .poll_scheduler import AdaptivePollScheduler
+from .raw_frames import RawFrameRing
+from .read_planner import plan_read_ranges, range_schema
+from .realtime_parser import (
+    FrameExtractor,
+    RealtimeDecodeState,
+    parse_mqtt_frames,
+)
+from .register_schema import get_block_decoder
+from .request_tracker import RequestTracker
 
 _LOGGER = logging.getLogger(__name__)
 
-RECONNECT_DELAY_SECONDS = 5
-MAX_RECONNECT_ATTEMPTS = 10
-CONNECT_TIMEOUT = 20
 OFFLINE_TIMEOUT_SECONDS = DEFAULT_POLLING_INTERVAL * 2.5
-NUM_MAIN_REGISTERS_TO_READ = 151  # Read registers 0-150 (extended for work/battery mode)
+OFFLINE_TIMEOUT_POLLS = 2.5  # Missed polls (at the current interval) before going offline
+RESPONSE_TIMEOUT_SECONDS = 10  # Closed-loop poll: wait this long for a response at most
 
 
 class LumentreeMqttClient:
-    """Manages MQTT connection, messages, and online status with batch updates."""
+    """Manages one device on the shared MQTT connection: messages, online status, batch updates."""
 
     __slots__ = (
         "hass",
         "entry",
         "_device_sn",
         "_device_id",
-        "_mqttc",
-        "_client_id",
-        "_signal_update",
+        "_hub",
+        "_on_loop",
         "_topic_sub",
         "_topic_pub",
-        "_connect_lock",
-        "_reconnect_attempts",
-        "_is_connected",
-        "_stopping",
-        "_stopping_lock",
-        "_connected_event",
         "_online",
         "_offline_timer_unsub",
         "_offline_timer_gen",
         "_batch_timer",
         "_pending_updates",
+        "_decode_state",
+        "_frame_extractor",
+        "_mailbox",
+        "_raw_frames",
+        "_poll_scheduler",
+        "_poll_plan",
+        "_requests",
+        "_response_waiter",
     )
 
     def __init__(
@@ -86,72 +103,102 @@ class LumentreeMqttClient:
         self.entry = entry
         self._device_sn = device_sn
         self._device_id = device_id
-        self._mqttc: Optional[paho.Client] = None
-
-        timestamp = int(time.time())
-        try:
-            self._client_id = MQTT_CLIENT_ID_FORMAT.format(
-                device_id=self._device_id, timestamp=timestamp
-            )
-        except KeyError:
-            _LOGGER.error("Failed to format MQTT Client ID")
-            self._client_id = f"ha-lumentree-{self._device_sn}-{timestamp}"
+        self._hub: MqttHubBase | None = None
+        # Whether the hub delivers payloads on the event loop (asyncio) or its own thread
+        self._on_loop = False
 
-        if _LOGGER.isEnabledFor(logging.DEBUG):
-            _LOGGER.debug("MQTT Client ID: %s", self._client_id)
-
-        self._signal_update = SIGNAL_UPDATE_FORMAT.format(device_sn=self._device_sn)
         self._topic_sub = MQTT_SUB_TOPIC_FORMAT.format(device_sn=self._device_sn)
         self._topic_pub = MQTT_PUB_TOPIC_FORMAT.format(device_sn=self._device_sn)
 
-        self._connect_lock = asyncio.Lock()
-        self._reconnect_attempts = 0
-        self._is_connected = False
-        self._stopping = False
-        self._stopping_lock = threading.Lock()
-        self._connected_event = asyncio.Event()
         self._online: bool = False
-        self._offline_timer_unsub: Optional[Callable] = None
+        self._offline_timer_unsub: Callable | None = None
         self._offline_timer_gen: int = 0
 
         # Batch update optimization
-        self._batch_timer: Optional[asyncio.Task] = None
-        self._pending_updates: Dict[str, Any] = {}
+        self._batch_timer: asyncio.Task | None = None
+        self._pending_updates: list[Mapping[str, Any]] = []
+
+        # Change-driven decoding: only changed registers are decoded and dispatched
+        self._decode_state = RealtimeDecodeState()
+        # Several responses per message, or one response split across messages
+        self._frame_extractor = FrameExtractor()
+        # Paho transport: bounded, latest-wins handoff from the network thread to the loop
+        self._mailbox = FrameMailbox()
+        # Last raw payloads, rendered only by diagnostics and the dump_raw_frames service
+        self._raw_frames = RawFrameRing()
+        # Adaptive poll interval, fed with every decoded record
+        self._poll_scheduler = AdaptivePollScheduler(
+            entry.options.get(CONF_POLL_MIN_INTERVAL, DEFAULT_POLL_MIN_INTERVAL),
+            entry.options.get(CONF_POLL_MAX_INTERVAL, DEFAULT_POLL_MAX_INTERVAL),
+        )
+        # Register ranges per poll, command bytes built once
+        self._poll_plan = PollPlan()
+        # Closed-loop polling: outstanding reads, round-trip times, poll loop waiter
+        self._requests = RequestTracker()
+        self._response_waiter: asyncio.Future | None = None
 
     @property
     def is_connected(self) -> bool:
-        """Check if MQTT is connected."""
-        return self._is_connected
+        """Check if the shared MQTT connection carries this device."""
+        return self._hub is not None and self._hub.is_connected
+
+    @property
+    def hub(self) -> MqttHubBase | None:
+        """Shared connection this device is routed over (None before connect)."""
+        return self._hub
+
+    @property
+    def poll_scheduler(self) -> AdaptivePollScheduler:
+        """Scheduler choosing the realtime poll interval for this device."""
+        return self._poll_scheduler
+
+    @property
+    def poll_plan(self) -> PollPlan:
+        """Register ranges read by the realtime poll and their cadence."""
+        return self._poll_plan
+
+    @property
+    def request_stats(self) -> dict[str, Any]:
+        """Outstanding requests, timeouts and response latency (for diagnostics)."""
+        return self._requests.as_dict()
+
+    @property
+    def raw_frames(self) -> RawFrameRing:
+        """Last raw MQTT payloads of this device."""
+        return self._raw_frames
+
+    @property
+    def mailbox_stats(self) -> Mapping[str, Any]:
+        """Messages merged while the event loop was behind (for diagnostics)."""
+        return self._mailbox.as_dict()
+
+    @property
+    def frame_layout_counts(self) -> dict[str, int]:
+        """Frames received per layout or rejection reason (for diagnostics)."""
+        return dict(self._decode_state.layout_counts)
 
     def _cancel_offline_timer(self) -> None:
         """Cancel the offline timer if active."""
         if self._offline_timer_unsub:
             if _LOGGER.isEnabledFor(logging.DEBUG):
-                _LOGGER.debug("Cancelling offline timer %s", self._client_id)
+                _LOGGER.debug("Cancelling offline timer %s", self._device_sn)
             try:
                 self._offline_timer_unsub()
             except Exception as exc:
-                _LOGGER.warning(f"Error cancelling timer {self._client_id}: {exc}")
+                _LOGGER.warning(f"Error cancelling timer {self._device_sn}: {exc}")
             self._offline_timer_unsub = None
 
     def _cancel_batch_timer(self) -> None:
         """Cancel the batch timer if active."""
         if self._batch_timer is not None:
             if _LOGGER.isEnabledFor(logging.DEBUG):
-                _LOGGER.debug("Cancelling batch timer %s", self._client_id)
+                _LOGGER.debug("Cancelling batch timer %s", self._device_sn)
             try:
                 self._batch_timer.cancel()
             except Exception as exc:
-                _LOGGER.warning(f"Error cancelling batch timer {self._client_id}: {exc}")
+                _LOGGER.warning(f"Error cancelling batch timer {self._device_sn}: {exc}")
             self._batch_timer = None
 
-    async def _start_batch_timer(self) -> None:
-        """Start timer to process batch updates."""
-        if self._batch_timer is not None:
-            self._batch_timer.cancel()
-
-        self._batch_timer = asyncio.create_task(self._process_batch_updates())
-
     async def _process_batch_updates(self) -> None:
         """Process batch updates every 100ms to reduce overhead."""
         try:
@@ -159,40 +206,39 @@ class LumentreeMqttClient:
 
             if self._pending_updates:
                 # Send all updates at once
-                async_dispatcher_send(
-                    self.hass, self._signal_update, self._pending_updates.copy()
-                )
-                self._pending_updates.clear()
+                async_key_dispatcher_send(self.hass, self._device_sn, self._take_pending())
 
                 if _LOGGER.isEnabledFor(logging.DEBUG):
                     _LOGGER.debug("Sent batch update for %s", self._device_sn)
         except asyncio.CancelledError:
             # Timer cancelled, send remaining updates
             if self._pending_updates:
-                async_dispatcher_send(
-                    self.hass, self._signal_update, self._pending_updates.copy()
-                )
-                self._pending_updates.clear()
+                async_key_dispatcher_send(self.hass, self._device_sn, self._take_pending())
         except Exception as exc:
             _LOGGER.error(f"Error in batch update processing: {exc}")
         finally:
             self._batch_timer = None
 
-    def _queue_update(self, data: Dict[str, Any]) -> None:
+    def _take_pending(self) -> Mapping[str, Any]:
+        """Take the queued updates as one mapping (latest frame wins, nothing copied)."""
+        pending = self._pending_updates
+        self._pending_updates = []
+        return pending[0] if len(pending) == 1 else ChainMap(*reversed(pending))
+
+    def _queue_update(self, data: Mapping[str, Any]) -> None:
         """Add update to queue for batch processing.
 
+        Parsed records are queued as-is so their lazily decoded fields are only
+        decoded when an entity reads them.
+
         Args:
             data: Update data to queue
         """
-        self._pending_updates.update(data)
+        self._pending_updates.append(data)
 
-        # Start timer if not already running
-        # Schedule batch timer from event loop (thread-safe)
-        # This method is called from MQTT callback thread via call_soon_threadsafe
+        # Runs on the event loop: start the batch timer right away if not running
         if self._batch_timer is None:
-            self.hass.loop.call_soon_threadsafe(
-                lambda: self.hass.async_create_task(self._start_batch_timer())
-            )
+            self._batch_timer = asyncio.create_task(self._process_batch_updates())
 
     @callback
     def _set_offline(self, gen: int = -1, *args) -> None:
@@ -204,416 +250,287 @@ class LumentreeMqttClient:
         """
         if gen >= 0 and gen != self._offline_timer_gen:
             return  # Stale timer callback, ignore
-        _LOGGER.info("MQTT data timeout or disconnect %s. Setting offline.", self._client_id)
+        _LOGGER.info("MQTT data timeout or disconnect %s. Setting offline.", self._device_sn)
         self._cancel_offline_timer()
+        self._decode_state.reset()  # Next frame after recovery is a full snapshot
+        self._frame_extractor.reset()
+        self._poll_plan.reset()  # Read every tier again once back
         if self._online:
             self._online = False
-            async_dispatcher_send(self.hass, self._signal_update, {KEY_ONLINE_STATUS: False})
+            async_key_dispatcher_send(self.hass, self._device_sn, {KEY_ONLINE_STATUS: False})
 
     def _start_offline_timer(self) -> None:
         """Start or restart the offline timer."""
         self._cancel_offline_timer()
         self._offline_timer_gen += 1
         gen = self._offline_timer_gen
+        # Slow polls must not be mistaken for a lost device
+        timeout = max(
+            OFFLINE_TIMEOUT_SECONDS, self._poll_scheduler.interval * OFFLINE_TIMEOUT_POLLS
+        )
         if _LOGGER.isEnabledFor(logging.DEBUG):
             _LOGGER.debug(
                 "Starting offline timer (%ss, gen=%s) for %s",
-                OFFLINE_TIMEOUT_SECONDS, gen, self._client_id,
+                timeout, gen, self._device_sn,
             )
         self._offline_timer_unsub = async_call_later(
-            self.hass, OFFLINE_TIMEOUT_SECONDS, lambda _now: self._set_offline(gen)
+            self.hass, timeout, lambda _now: self._set_offline(gen)
         )
 
     async def connect(self) -> None:
-        """Establish MQTT connection."""
-        async with self._connect_lock:
-            if self._is_connected:
-                if _LOGGER.isEnabledFor(logging.DEBUG):
-                    _LOGGER.debug("MQTT already connected for %s", self._device_sn)
-                return
+        """Route this device over the shared MQTT connection, connecting it if needed.
 
-            self._stopping = False
-            self._connected_event.clear()
-            self._mqttc = paho.Client(client_id=self._client_id, protocol=paho.MQTTv311)
-            self._mqttc.username_pw_set(username=MQTT_USERNAME, password=MQTT_PASSWORD)
-            self._mqttc.on_connect = self._on_connect
-            self._mqttc.on_disconnect = self._on_disconnect
-            self._mqttc.on_message = self._on_message
-
-            _LOGGER.info(
-                f"MQTT connecting: {MQTT_BROKER}:{MQTT_PORT} (Client: {self._client_id}) for SN: {self._device_sn}"
-            )
-
-            try:
-                await self.hass.async_add_executor_job(
-                    self._mqttc.connect, MQTT_BROKER, MQTT_PORT, MQTT_KEEPALIVE
-                )
-                self._mqttc.loop_start()
-                _LOGGER.info(
-                    f"MQTT loop started {self._client_id}. Waiting for CONNACK ({CONNECT_TIMEOUT}s)"
-                )
-
-                try:
-                    await asyncio.wait_for(
-                        self._connected_event.wait(), timeout=CONNECT_TIMEOUT
-                    )
-                    if not self._is_connected:
-                        raise ConnectionRefusedError("MQTT connection refused")
-                    _LOGGER.info(f"MQTT connected successfully {self._client_id}")
-                except asyncio.TimeoutError:
-                    _LOGGER.error(f"MQTT connection timeout {self._client_id}")
-                    await self.disconnect()
-                    raise ConnectionRefusedError("MQTT connection timeout")
-            except Exception as exc:
-                _LOGGER.error(f"Failed MQTT connect {self._client_id}: {exc}")
-                if self._mqttc:
-                    try:
-                        self._mqttc.loop_stop()
-                        if _LOGGER.isEnabledFor(logging.DEBUG):
-                            _LOGGER.debug("MQTT loop stopped after failure %s", self._client_id)
-                    except Exception as se:
-                        _LOGGER.warning(f"Loop stop error: {se}")
-                self._mqttc = None
-                self._is_connected = False
-                self._connected_event.set()
-                if isinstance(exc, ConnectionRefusedError):
-                    raise
-                raise ConnectionRefusedError(f"MQTT setup error: {exc}") from exc
-
-    def _on_connect(self, client, userdata, flags, rc, properties=None) -> None:
-        """Callback when connection is established.
-
-        Args:
-            client: MQTT client instance
-            userdata: User data
-            flags: Connection flags
-            rc: Connection result code
-            properties: Connection properties (MQTT v5)
+        Raises:
+            ConnectionRefusedError: If the broker connection cannot be established
         """
-        if rc == paho.CONNACK_ACCEPTED:
-            _LOGGER.info(
-                "MQTT connected (rc=%s) %s. Subscribing to: %s",
-                rc, self._client_id, self._topic_sub,
-            )
-            self._reconnect_attempts = 0
-            try:
-                result, mid = client.subscribe(self._topic_sub, 0)
-                if _LOGGER.isEnabledFor(logging.DEBUG):
-                    _LOGGER.debug(
-                        "Subscribe %s %s (mid=%s)",
-                        "OK" if result == 0 else "Failed",
-                        self._topic_sub,
-                        mid,
-                    )
-                self._is_connected = True
-            except Exception as exc:
-                _LOGGER.error("MQTT subscribe failed %s: %s", self._client_id, exc)
-                self._is_connected = False
-                self.hass.loop.call_soon_threadsafe(self._connected_event.set)
-                self.hass.loop.call_soon_threadsafe(self._set_offline)
-                self.hass.loop.call_soon_threadsafe(self._safe_schedule_reconnect)
-                return
-            self.hass.loop.call_soon_threadsafe(self._connected_event.set)
-        else:
-            err_map = {
-                1: "Protocol",
-                2: "ID Rejected",
-                3: "Server Unavailable",
-                4: "Bad User/Password",
-                5: "Not Authorized",
-            }
-            err = err_map.get(rc, "Unknown")
-            _LOGGER.error(f"MQTT connection refused {self._client_id} (rc={rc}): {err}")
-            self._is_connected = False
-            self.hass.loop.call_soon_threadsafe(self._connected_event.set)
-            self.hass.loop.call_soon_threadsafe(self._set_offline)
-            self.hass.loop.call_soon_threadsafe(self._safe_schedule_reconnect)
-
-    def _on_disconnect(self, client, userdata, rc, properties=None) -> None:
-        """Callback when disconnected.
+        if self._hub is not None:
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug("MQTT already set up for %s", self._device_sn)
+            return
+        transport = self.entry.options.get(CONF_MQTT_TRANSPORT, DEFAULT_MQTT_TRANSPORT)
+        hub = async_get_mqtt_hub(self.hass, self._device_id, transport)
+        self._on_loop = hub.callbacks_on_loop
+        await hub.async_add_device(self._topic_sub, self)
+        self._hub = hub
+        _LOGGER.info(
+            "MQTT %s on shared %s connection %s (%s device(s))",
+            self._device_sn, hub.transport, hub.client_id, hub.device_count,
+        )
 
-        Args:
-            client: MQTT client instance
-            userdata: User data
-            rc: Disconnection result code
-            properties: Disconnect properties (MQTT v5)
-        """
-        self._is_connected = False
+    @callback
+    def _handle_disconnect(self) -> None:
+        """Shared connection lost: drop queued data and go offline."""
         self._cancel_offline_timer()
         self._set_offline()
-
-        if rc == 0:
-            _LOGGER.info(f"MQTT disconnected cleanly {self._client_id}")
-        else:
-            _LOGGER.warning(f"MQTT unexpected disconnect {self._client_id} (rc={rc})")
-
-        self.hass.loop.call_soon_threadsafe(self._safe_schedule_reconnect)
+        # Requests in flight will not be answered; release the poll loop
+        self._requests.clear()
+        self._mailbox.clear()
+        self._wake_response_waiter()
 
     @callback
-    def _safe_schedule_reconnect(self) -> None:
-        """Thread-safe check before scheduling reconnect.
+    def _wake_response_waiter(self) -> None:
+        waiter = self._response_waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
 
-        Called via call_soon_threadsafe from paho callbacks to ensure
-        _stopping check runs on the event loop thread, preventing the
-        zombie-reconnect race where disconnect() sets _stopping=True
-        while a paho callback reads a stale False.
-        """
-        if not self._stopping:
-            self._schedule_reconnect()
+    def _handle_payload(self, payload_bytes: bytes) -> None:
+        """Handle a message on this device's topic.
 
-    def _schedule_reconnect(self) -> None:
-        """Schedule an asynchronous reconnection attempt with exponential backoff.
+        Called on the event loop by the asyncio hub and from the network thread
+        by the paho hub; decoding happens here either way. From the thread the
+        results go through the mailbox, so a stalled loop catches up with one
+        merged delivery instead of one callback per message.
 
-        After MAX_RECONNECT_ATTEMPTS soft reconnect failures, switches to hard reconnect
-        (fresh paho client). Never gives up permanently — MQTT is the primary data source.
+        Args:
+            payload_bytes: Raw MQTT payload
         """
-        self._reconnect_attempts += 1
+        received = time.monotonic()
+        self._raw_frames.append(payload_bytes)
+        try:
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug(
+                    "MQTT message received %s: payload='%s...' (len: %s)",
+                    self._device_sn,
+                    payload_bytes[:30].hex(),
+                    len(payload_bytes),
+                )
 
-        if self._reconnect_attempts <= MAX_RECONNECT_ATTEMPTS:
-            delay = min(
-                RECONNECT_DELAY_SECONDS * (2 ** (self._reconnect_attempts - 1)), 60
+            responses: list[tuple[int, int]] = []
+            results = parse_mqtt_frames(
+                payload_bytes, self._decode_state, self._frame_extractor, responses
             )
-            _LOGGER.info(
-                "Scheduling MQTT soft reconnect %s/%s for %s in %ss",
-                self._reconnect_attempts, MAX_RECONNECT_ATTEMPTS,
-                self._client_id, delay,
-            )
-        else:
-            delay = 120
-            _LOGGER.warning(
-                "MQTT soft reconnects exhausted (%sx) for %s. "
-                "Will attempt hard reconnect (fresh connection) in %ss",
-                MAX_RECONNECT_ATTEMPTS, self._client_id, delay,
-            )
-
-        self.hass.loop.call_soon_threadsafe(
-            lambda: self.hass.async_create_task(self._async_reconnect(delay))
-        )
+            if not results:
+                return
+            records = [parsed_data for parsed_data in results if parsed_data]
+            timings = [(func_code, byte_count, received) for func_code, byte_count in responses]
+            if self._on_loop:
+                self._deliver(records, timings)
+            elif self._mailbox.put(records, timings):
+                self.hass.loop.call_soon_threadsafe(self._deliver_mailbox)
+        except Exception:
+            _LOGGER.exception(f"Error processing MQTT message {self._topic_sub}")
 
-    async def _async_reconnect(self, delay: float) -> None:
-        """Wait for delay and attempt reconnection.
+    @callback
+    def _deliver_mailbox(self) -> None:
+        """Deliver what the network thread left in the mailbox (on the loop)."""
+        records, timings = self._mailbox.take()
+        if timings:
+            self._deliver(records, timings)
 
-        Uses soft reconnect (reuse existing client) for first MAX_RECONNECT_ATTEMPTS,
-        then switches to hard reconnect (fresh paho client) for subsequent attempts.
+    @callback
+    def _deliver(
+        self,
+        records: list[MutableMapping[str, Any]],
+        timings: list[Response],
+    ) -> None:
+        """Update online status, match requests and queue the changed records (on the loop).
 
         Args:
-            delay: Delay in seconds before reconnecting
+            records: Changed records, oldest first (unchanged responses have none)
+            timings: (function code, byte count, receive time) of each response
         """
-        await asyncio.sleep(delay)
-        if self._stopping:
-            return
+        # Update online status and reset timer (also for unchanged frames)
+        if not self._online:
+            self._online = True
+            if not records:
+                records = [{}]
+            records[0][KEY_ONLINE_STATUS] = True
+        self._start_offline_timer()
+
+        requests = self._requests
+        latency_ms = None
+        for func_code, byte_count, received in timings:
+            matched_ms = requests.response(func_code, byte_count, received)
+            if matched_ms is not None:
+                latency_ms = matched_ms
+        if records:
+            # Ride along with records that are dispatched anyway
+            if latency_ms is not None:
+                records[-1][KEY_MQTT_RESPONSE_LATENCY] = round(latency_ms)
+            records[-1][KEY_LAST_RAW_MQTT] = self._raw_frames.count
+
+        for parsed_data in records:
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug("Parsed data %s: %s", self._device_sn, parsed_data)
+            self._poll_scheduler.observe(parsed_data)
 
-        if self._reconnect_attempts <= MAX_RECONNECT_ATTEMPTS:
-            # Soft reconnect: reuse existing paho client
-            if not self.is_connected and self._mqttc:
-                if _LOGGER.isEnabledFor(logging.DEBUG):
-                    _LOGGER.debug("Attempting MQTT soft reconnect %s", self._client_id)
-                try:
-                    await self.hass.async_add_executor_job(self._mqttc.reconnect)
-                except Exception as exc:
-                    _LOGGER.warning("MQTT soft reconnect failed %s: %s", self._client_id, exc)
-        else:
-            # Hard reconnect: create a fresh paho client
-            await self._hard_reconnect()
+            # Use batch update instead of immediate dispatch
+            self._queue_update(parsed_data)
+
+        if not requests.pending:
+            self._wake_response_waiter()
 
-    async def _hard_reconnect(self) -> None:
-        """Perform a hard reconnect by creating a fresh paho client.
+    def plan_reads(self, keys: set[str] | None, max_gap: int) -> None:
+        """Poll only the main block registers the given realtime keys need.
 
-        Stops and disconnects the old client, then calls connect() which creates
-        a brand new MQTT connection. This recovers from cases where the old paho
-        client is in a permanently broken state that soft reconnect can't fix.
+        Args:
+            keys: Realtime keys of the enabled entities; None reads everything
+            max_gap: Merge register ranges separated by at most this many registers
         """
-        _LOGGER.info("MQTT hard reconnect: creating fresh connection %s", self._client_id)
+        ranges = None if keys is None else plan_read_ranges(keys, max_gap)
+        if ranges is None:
+            tiers = DEFAULT_POLL_TIERS
+            decoder = None
+        else:
+            tiers = tuple(PollTier(f"main_{start}", start, count) for start, count in ranges)
+            if KEY_BATTERY_CELL_INFO in keys:
+                tiers += (CELLS_TIER,)
+            decoder = get_block_decoder(NUM_MAIN_REGISTERS_TO_READ, range_schema(ranges))
+        self._poll_plan = PollPlan(tiers)
+        self._decode_state.set_range_reads(ranges or (), decoder)
+        _LOGGER.info(
+            "MQTT poll plan %s: %s",
+            self._device_sn,
+            ", ".join(f"{tier.name}({tier.start}+{tier.count})" for tier in tiers),
+        )
 
-        # Clean up old client
-        old_mqttc = self._mqttc
-        self._mqttc = None
-        self._cancel_batch_timer()
-        self._pending_updates.clear()
+    async def _publish_command(self, command: bytes) -> bool:
+        """Internal helper to publish a command to this device.
 
-        if old_mqttc:
-            try:
-                old_mqttc.loop_stop()
-            except Exception:
-                pass
-            try:
-                old_mqttc.disconnect()
-            except Exception:
-                pass
+        Args:
+            command: Modbus command bytes (one or more commands)
 
-        self._is_connected = False
-        self._connected_event.clear()
-        self._reconnect_attempts = 0
-        self._stopping = False
+        Returns:
+            True if successful, False otherwise
+        """
+        if not self.is_connected:
+            _LOGGER.error(f"MQTT not connected {self._device_sn}, cannot publish")
+            return False
 
-        try:
-            await self.connect()
-            _LOGGER.info("MQTT hard reconnect successful %s", self._client_id)
-        except Exception as exc:
-            _LOGGER.error("MQTT hard reconnect failed %s: %s", self._client_id, exc)
-            # connect() calls disconnect() on failure which sets _stopping=True
-            # Reset flags and schedule next hard reconnect attempt
-            self._stopping = False
-            self._reconnect_attempts = MAX_RECONNECT_ATTEMPTS
-            self._schedule_reconnect()
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Publishing to %s: %s", self._topic_pub, command.hex())
+        return await self._hub.async_publish(self._topic_pub, command)
 
-    def _on_message(self, client, userdata, msg: MQTTMessage) -> None:
-        """Callback when a message is received.
+    async def _async_read(self, tiers: tuple[PollTier, ...]) -> bool:
+        """Publish the reads of the given tiers in one message and track them.
 
-        Args:
-            client: MQTT client instance
-            userdata: User data
-            msg: MQTT message
-        """
-        topic = msg.topic
-        try:
-            payload_bytes = msg.payload
-            payload_hex = "".join(f"{b:02x}" for b in payload_bytes) if payload_bytes else ""
+        The reads are tracked until their responses arrive; see
+        async_wait_for_response().
 
-            if _LOGGER.isEnabledFor(logging.DEBUG):
-                _LOGGER.debug(
-                    "MQTT message received %s: topic='%s', payload='%s...' (len: %s)",
-                    self._client_id,
-                    topic,
-                    payload_hex[:60],
-                    len(payload_bytes),
-                )
+        Returns:
+            True if the request was published
+        """
+        now = time.monotonic()
+        for tier in tiers:
+            self._requests.sent(tier.func_code, tier.count, now)
+        if await self._publish_command(self._poll_plan.payload(tiers)):
+            self._poll_plan.mark_read(tiers, now)
+            return True
+        self._requests.clear()
+        return False
+
+    async def async_poll(self) -> bool:
+        """Read the tiers of the poll plan that are due (main block on every poll).
 
-            if topic == self._topic_sub:
-                parsed_data = parse_mqtt_payload(payload_hex)
-                if parsed_data:
-                    if _LOGGER.isEnabledFor(logging.DEBUG):
-                        _LOGGER.debug("Parsed data %s: %s", self._client_id, parsed_data)
-
-                    # Update online status and reset timer
-                    if not self._online:
-                        self._online = True
-                        parsed_data[KEY_ONLINE_STATUS] = True
-                    self._start_offline_timer()
-
-                    # Add raw hex data
-                    parsed_data[KEY_LAST_RAW_MQTT] = payload_hex
-
-                    # Use batch update instead of immediate dispatch
-                    self.hass.loop.call_soon_threadsafe(self._queue_update, parsed_data)
-            else:
-                _LOGGER.warning(f"Unexpected topic {self._client_id}: {topic}")
-        except Exception as exc:
-            _LOGGER.exception(f"Error processing MQTT message {topic} {self._client_id}")
+        Returns:
+            True if a request was published
+        """
+        tiers = self._poll_plan.due(time.monotonic())
+        if not tiers:
+            return False
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Polling %s: %s", self._device_sn, [tier.name for tier in tiers])
+        return await self._async_read(tiers)
 
-    async def _publish_command(self, command_hex: str) -> bool:
-        """Internal helper to publish a hex command.
+    async def async_request_data(self, with_battery_cells: bool = False) -> bool:
+        """Request the main device data (registers 0-150) now.
 
         Args:
-            command_hex: Hex string command to publish
+            with_battery_cells: Also request the battery cells in the same
+                publish; both responses are split out by the frame extractor
 
         Returns:
-            True if successful, False otherwise
+            True if the request was published
         """
-        if not self.is_connected or not self._mqttc:
-            _LOGGER.error(f"MQTT not connected {self._client_id}, cannot publish")
-            return False
+        tiers = (MAIN_TIER, CELLS_TIER) if with_battery_cells else (MAIN_TIER,)
+        return await self._async_read(tiers)
 
-        if _LOGGER.isEnabledFor(logging.DEBUG):
-            _LOGGER.debug("Publishing to %s (%s): %s", self._topic_pub, self._client_id, command_hex)
+    async def async_wait_for_response(self, timeout: float) -> bool:
+        """Wait until every outstanding read has been answered.
 
+        Args:
+            timeout: Seconds to wait; unanswered reads are then counted as
+                timeouts and forgotten
+
+        Returns:
+            True if nothing is outstanding any more, False on timeout
+        """
+        if not self._requests.pending:
+            return True
+        waiter = self.hass.loop.create_future()
+        self._response_waiter = waiter
         try:
-            payload_bytes = bytes.fromhex(command_hex)
-            publish_task = partial(
-                self._mqttc.publish, self._topic_pub, payload=payload_bytes, qos=0
+            await asyncio.wait_for(waiter, timeout)
+        except TimeoutError:
+            expired = self._requests.expire()
+            _LOGGER.warning(
+                "No MQTT response from %s within %ss (%s request(s))",
+                self._device_sn, timeout, expired,
             )
-            msg_info = await self.hass.async_add_executor_job(publish_task)
-
-            if msg_info is None or msg_info.rc != paho.MQTT_ERR_SUCCESS:
-                _LOGGER.error(
-                    f"MQTT publish failed {self._client_id} RC: {msg_info.rc if msg_info else 'Executor Error'}"
-                )
-                return False
-            else:
-                if _LOGGER.isEnabledFor(logging.DEBUG):
-                    _LOGGER.debug("Publish OK (mid=%s) %s", msg_info.mid, self._client_id)
-                return True
-        except ValueError as exc:
-            _LOGGER.error(f"Invalid hex payload {self._client_id}: {exc}")
-            return False
-        except Exception as exc:
-            _LOGGER.error(f"Failed MQTT publish {self._client_id}: {exc}")
             return False
-
-    async def async_request_data(self) -> None:
-        """Request the main device data (registers 0-150)."""
-        start_address = 0
-        num_registers = NUM_MAIN_REGISTERS_TO_READ
-        slave_id = 1
-        func_code = 3
-
-        command_hex = generate_modbus_read_command(slave_id, func_code, start_address, num_registers)
-        if command_hex:
-            await self._publish_command(command_hex)
-        else:
-            _LOGGER.error(
-                "Failed to generate Modbus read (0-%s) %s",
-                num_registers - 1, self._client_id,
-            )
+        finally:
+            if self._response_waiter is waiter:
+                self._response_waiter = None
+        return not self._requests.pending
 
     async def async_request_battery_cells(self) -> None:
-        """Request the battery cell data."""
-        start = REG_ADDR_CELL_START
-        count = REG_ADDR_CELL_COUNT
-        sid = 1
-        fc = 3
-
-        command_hex = generate_modbus_read_command(sid, fc, start, count)
-        if command_hex:
-            await self._publish_command(command_hex)
-        else:
-            _LOGGER.error(
-                f"Failed to generate Modbus read ({start}-{start + count - 1}) {self._client_id}"
-            )
+        """Request the battery cell data now."""
+        await self._async_read((CELLS_TIER,))
 
     async def disconnect(self) -> None:
-        """Disconnect the MQTT client and clean up timers."""
-        _LOGGER.info(f"Disconnecting MQTT {self._client_id}")
-        self._stopping = True
-        self._reconnect_attempts = MAX_RECONNECT_ATTEMPTS
-        self._connected_event.set()
-        
+        """Detach from the shared MQTT connection and clean up timers."""
+        _LOGGER.info(f"Disconnecting MQTT {self._device_sn}")
+
         # Cancel all timers
         self._cancel_offline_timer()
         self._cancel_batch_timer()
         self._set_offline()
-
-        mqttc_to_disconnect = None
-        async with self._connect_lock:
-            if self._mqttc:
-                mqttc_to_disconnect = self._mqttc
-                self._mqttc = None
-            self._is_connected = False
-
-        if mqttc_to_disconnect:
-            try:
-                # Unsubscribe before disconnecting
-                if _LOGGER.isEnabledFor(logging.DEBUG):
-                    _LOGGER.debug("Unsubscribing from topic %s", self._topic_sub)
-                try:
-                    await self.hass.async_add_executor_job(
-                        mqttc_to_disconnect.unsubscribe, self._topic_sub
-                    )
-                except Exception as unsub_exc:
-                    _LOGGER.warning(
-                        f"Error unsubscribing from {self._topic_sub} {self._client_id}: {unsub_exc}"
-                    )
-                
-                if _LOGGER.isEnabledFor(logging.DEBUG):
-                    _LOGGER.debug("Stopping MQTT loop %s", self._client_id)
-                await self.hass.async_add_executor_job(mqttc_to_disconnect.loop_stop)
-                if _LOGGER.isEnabledFor(logging.DEBUG):
-                    _LOGGER.debug("Executing MQTT disconnect %s", self._client_id)
-                await self.hass.async_add_executor_job(mqttc_to_disconnect.disconnect)
-                _LOGGER.info(f"MQTT client disconnected {self._client_id}")
-            except Exception as exc:
-                _LOGGER.warning(f"Error during MQTT disconnect {self._client_id}: {exc}")
-        else:
-            if _LOGGER.isEnabledFor(logging.DEBUG):
-                _LOGGER.debug("MQTT client already None %s", self._client_id)
-
+        self._requests.clear()
+        self._wake_response_waiter()
+
+        hub = self._hub
+        self._hub = None
+        if hub is not None:
+            await hub.async_remove_device(self._topic_sub)
+        elif _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("MQTT not set up for %s", self._device_sn)
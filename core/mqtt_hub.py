@@ -0,0 +1,537 @@
+"""Shared MQTT connection for all Lumentree config entries.
+
+Every inverter reports on reportApp/{sn} and listens on listenApp/{sn} on the
+same broker, so one connection carries all of them: the hub subscribes each
+device's topic, routes incoming messages by topic to the device's
+LumentreeMqttClient and publishes the poll commands of every device over the
+one socket. Connection and reconnect handling live here, once per host.
+
+LumentreeMqttHub runs on paho and its network thread; the event-loop native
+transport is LumentreeAsyncioMqttHub in mqtt_asyncio.py.
+"""
+
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from functools import partial
+from typing import TYPE_CHECKING
+
+import paho.mqtt.client as paho
+from homeassistant.core import HomeAssistant, callback
+from paho.mqtt.client import MQTTMessage
+
+from ..const import (
+    DATA_MQTT_HUB,
+    DEFAULT_MQTT_TRANSPORT,
+    MQTT_BROKER,
+    MQTT_CLIENT_ID_FORMAT,
+    MQTT_KEEPALIVE,
+    MQTT_PASSWORD,
+    MQTT_PORT,
+    MQTT_TRANSPORT_PAHO,
+    MQTT_USERNAME,
+)
+
+if TYPE_CHECKING:
+    from .mqtt_client import LumentreeMqttClient
+
+_LOGGER = logging.getLogger(__name__)
+
+RECONNECT_DELAY_SECONDS = 5
+MAX_RECONNECT_ATTEMPTS = 10
+CONNECT_TIMEOUT = 20
+
+
+class MqttHubBase(ABC):
+    """Device registry and topic routing shared by the MQTT transports.
+
+    Subclasses must implement connect(), disconnect(), async_publish() and the
+    per-topic (un)subscribe on their transport, and route received messages
+    with _route(). callbacks_on_loop tells devices whether _route() runs on
+    the event loop or on a network thread.
+    """
+
+    __slots__ = (
+        "hass",
+        "_host",
+        "_port",
+        "_client_id",
+        "_devices",
+        "_connect_lock",
+        "_reconnect_attempts",
+        "_is_connected",
+        "_stopping",
+    )
+
+    transport = ""
+    callbacks_on_loop = False
+
+    def __init__(
+        self, hass: HomeAssistant, device_id: str, host: str = MQTT_BROKER, port: int = MQTT_PORT
+    ) -> None:
+        """Initialize the hub.
+
+        Args:
+            hass: Home Assistant instance
+            device_id: Device ID of the first device, used in the client ID
+            host: Broker host
+            port: Broker port
+        """
+        self.hass = hass
+        self._host = host
+        self._port = port
+
+        timestamp = int(time.time())
+        try:
+            self._client_id = MQTT_CLIENT_ID_FORMAT.format(device_id=device_id, timestamp=timestamp)
+        except KeyError:
+            _LOGGER.error("Failed to format MQTT Client ID")
+            self._client_id = f"ha-lumentree-{device_id}-{timestamp}"
+
+        # Subscribe topic -> device client; read from the network side, replaced on change
+        self._devices: dict[str, LumentreeMqttClient] = {}
+        self._connect_lock = asyncio.Lock()
+        self._reconnect_attempts = 0
+        self._is_connected = False
+        self._stopping = False
+
+    @property
+    def is_connected(self) -> bool:
+        """Check if the shared connection is up."""
+        return self._is_connected
+
+    @property
+    def client_id(self) -> str:
+        """MQTT client ID of the shared connection."""
+        return self._client_id
+
+    @property
+    def reconnect_attempts(self) -> int:
+        """Reconnect attempts since the last successful connection."""
+        return self._reconnect_attempts
+
+    @property
+    def device_count(self) -> int:
+        """Number of devices routed over this connection."""
+        return len(self._devices)
+
+    async def async_add_device(self, topic_sub: str, device: "LumentreeMqttClient") -> None:
+        """Route a device's report topic to it, connecting the hub if needed.
+
+        Raises:
+            ConnectionRefusedError: If the broker connection cannot be established
+        """
+        self._devices = {**self._devices, topic_sub: device}
+        try:
+            await self.connect()
+        except ConnectionRefusedError:
+            await self.async_remove_device(topic_sub)
+            raise
+
+        # Subscribed again even if the connect already covered it; duplicates are harmless
+        await self._async_subscribe(topic_sub)
+
+    async def async_remove_device(self, topic_sub: str) -> None:
+        """Stop routing a topic; the connection is closed with the last device."""
+        devices = dict(self._devices)
+        devices.pop(topic_sub, None)
+        self._devices = devices
+
+        if self._is_connected:
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug("Unsubscribing from topic %s", topic_sub)
+            try:
+                await self._async_unsubscribe(topic_sub)
+            except Exception as unsub_exc:
+                _LOGGER.warning(
+                    f"Error unsubscribing from {topic_sub} {self._client_id}: {unsub_exc}"
+                )
+
+        if not devices:
+            if self.hass.data.get(DATA_MQTT_HUB) is self:
+                self.hass.data.pop(DATA_MQTT_HUB)
+            await self.disconnect()
+
+    def _route(self, topic: str, payload: bytes) -> None:
+        """Hand a received message to the device subscribed to its topic."""
+        device = self._devices.get(topic)
+        if device is None:
+            _LOGGER.warning(f"Unexpected topic {self._client_id}: {topic}")
+            return
+        device._handle_payload(payload)
+
+    @abstractmethod
+    async def connect(self) -> None:
+        """Establish the shared MQTT connection (no-op if already connected)."""
+
+    @abstractmethod
+    async def disconnect(self) -> None:
+        """Close the shared connection and stop reconnecting."""
+
+    @abstractmethod
+    async def async_publish(self, topic: str, payload: bytes) -> bool:
+        """Publish a command for one device over the shared connection."""
+
+    @abstractmethod
+    async def _async_subscribe(self, topic: str) -> None:
+        """Subscribe one device topic on the live connection."""
+
+    @abstractmethod
+    async def _async_unsubscribe(self, topic: str) -> None:
+        """Unsubscribe one device topic on the live connection."""
+
+
+class LumentreeMqttHub(MqttHubBase):
+    """Shared connection on a paho client and its network thread."""
+
+    __slots__ = ("_mqttc", "_connected_event")
+
+    transport = MQTT_TRANSPORT_PAHO
+
+    def __init__(
+        self, hass: HomeAssistant, device_id: str, host: str = MQTT_BROKER, port: int = MQTT_PORT
+    ) -> None:
+        """Initialize the hub (see MqttHubBase)."""
+        super().__init__(hass, device_id, host, port)
+        self._mqttc: paho.Client | None = None
+        self._connected_event = asyncio.Event()
+
+    async def _async_subscribe(self, topic: str) -> None:
+        mqttc = self._mqttc
+        if mqttc is not None:
+            result, mid = await self.hass.async_add_executor_job(mqttc.subscribe, topic, 0)
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug(
+                    "Subscribe %s %s (mid=%s)", "OK" if result == 0 else "Failed", topic, mid
+                )
+
+    async def _async_unsubscribe(self, topic: str) -> None:
+        mqttc = self._mqttc
+        if mqttc is not None:
+            await self.hass.async_add_executor_job(mqttc.unsubscribe, topic)
+
+    async def async_publish(self, topic: str, payload: bytes) -> bool:
+        """Publish a command for one device over the shared connection.
+
+        Returns:
+            True if successful, False otherwise
+        """
+        mqttc = self._mqttc
+        if not self._is_connected or mqttc is None:
+            _LOGGER.error(f"MQTT not connected {self._client_id}, cannot publish to {topic}")
+            return False
+
+        try:
+            publish_task = partial(mqttc.publish, topic, payload=payload, qos=0)
+            msg_info = await self.hass.async_add_executor_job(publish_task)
+
+            if msg_info is None or msg_info.rc != paho.MQTT_ERR_SUCCESS:
+                _LOGGER.error(
+                    f"MQTT publish failed {self._client_id} RC: {msg_info.rc if msg_info else 'Executor Error'}"
+                )
+                return False
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug("Publish OK (mid=%s) %s", msg_info.mid, topic)
+            return True
+        except Exception as exc:
+            _LOGGER.error(f"Failed MQTT publish {self._client_id}: {exc}")
+            return False
+
+    async def connect(self) -> None:
+        """Establish the shared MQTT connection (no-op if already connected)."""
+        async with self._connect_lock:
+            if self._is_connected:
+                if _LOGGER.isEnabledFor(logging.DEBUG):
+                    _LOGGER.debug("MQTT already connected %s", self._client_id)
+                return
+
+            self._stopping = False
+            self._connected_event.clear()
+            self._mqttc = paho.Client(client_id=self._client_id, protocol=paho.MQTTv311)
+            self._mqttc.username_pw_set(username=MQTT_USERNAME, password=MQTT_PASSWORD)
+            self._mqttc.on_connect = self._on_connect
+            self._mqttc.on_disconnect = self._on_disconnect
+            self._mqttc.on_message = self._on_message
+
+            _LOGGER.info(
+                f"MQTT connecting: {self._host}:{self._port} (Client: {self._client_id}) "
+                f"for {len(self._devices)} device(s)"
+            )
+
+            try:
+                await self.hass.async_add_executor_job(
+                    self._mqttc.connect, self._host, self._port, MQTT_KEEPALIVE
+                )
+                self._mqttc.loop_start()
+                _LOGGER.info(
+                    f"MQTT loop started {self._client_id}. Waiting for CONNACK ({CONNECT_TIMEOUT}s)"
+                )
+
+                try:
+                    await asyncio.wait_for(
+                        self._connected_event.wait(), timeout=CONNECT_TIMEOUT
+                    )
+                    if not self._is_connected:
+                        raise ConnectionRefusedError("MQTT connection refused")
+                    _LOGGER.info(f"MQTT connected successfully {self._client_id}")
+                except TimeoutError:
+                    _LOGGER.error(f"MQTT connection timeout {self._client_id}")
+                    await self.disconnect()
+                    raise ConnectionRefusedError("MQTT connection timeout") from None
+            except Exception as exc:
+                _LOGGER.error(f"Failed MQTT connect {self._client_id}: {exc}")
+                if self._mqttc:
+                    try:
+                        self._mqttc.loop_stop()
+                        if _LOGGER.isEnabledFor(logging.DEBUG):
+                            _LOGGER.debug("MQTT loop stopped after failure %s", self._client_id)
+                    except Exception as se:
+                        _LOGGER.warning(f"Loop stop error: {se}")
+                self._mqttc = None
+                self._is_connected = False
+                self._connected_event.set()
+                if isinstance(exc, ConnectionRefusedError):
+                    raise
+                raise ConnectionRefusedError(f"MQTT setup error: {exc}") from exc
+
+    def _on_connect(self, client, userdata, flags, rc, properties=None) -> None:
+        """Callback when connection is established: subscribe every device topic.
+
+        Args:
+            client: MQTT client instance
+            userdata: User data
+            flags: Connection flags
+            rc: Connection result code
+            properties: Connection properties (MQTT v5)
+        """
+        if rc == paho.CONNACK_ACCEPTED:
+            topics = list(self._devices)
+            _LOGGER.info(
+                "MQTT connected (rc=%s) %s. Subscribing to %s topic(s)",
+                rc, self._client_id, len(topics),
+            )
+            self._reconnect_attempts = 0
+            try:
+                if topics:
+                    result, mid = client.subscribe([(topic, 0) for topic in topics])
+                    if _LOGGER.isEnabledFor(logging.DEBUG):
+                        _LOGGER.debug(
+                            "Subscribe %s %s (mid=%s)",
+                            "OK" if result == 0 else "Failed", topics, mid,
+                        )
+                self._is_connected = True
+            except Exception as exc:
+                _LOGGER.error("MQTT subscribe failed %s: %s", self._client_id, exc)
+                self._is_connected = False
+                self.hass.loop.call_soon_threadsafe(self._connected_event.set)
+                self._notify_disconnected()
+                self.hass.loop.call_soon_threadsafe(self._safe_schedule_reconnect)
+                return
+            self.hass.loop.call_soon_threadsafe(self._connected_event.set)
+        else:
+            err_map = {
+                1: "Protocol",
+                2: "ID Rejected",
+                3: "Server Unavailable",
+                4: "Bad User/Password",
+                5: "Not Authorized",
+            }
+            err = err_map.get(rc, "Unknown")
+            _LOGGER.error(f"MQTT connection refused {self._client_id} (rc={rc}): {err}")
+            self._is_connected = False
+            self.hass.loop.call_soon_threadsafe(self._connected_event.set)
+            self._notify_disconnected()
+            self.hass.loop.call_soon_threadsafe(self._safe_schedule_reconnect)
+
+    def _on_disconnect(self, client, userdata, rc, properties=None) -> None:
+        """Callback when disconnected.
+
+        Args:
+            client: MQTT client instance
+            userdata: User data
+            rc: Disconnection result code
+            properties: Disconnect properties (MQTT v5)
+        """
+        self._is_connected = False
+        self._notify_disconnected()
+
+        if rc == 0:
+            _LOGGER.info(f"MQTT disconnected cleanly {self._client_id}")
+        else:
+            _LOGGER.warning(f"MQTT unexpected disconnect {self._client_id} (rc={rc})")
+
+        self.hass.loop.call_soon_threadsafe(self._safe_schedule_reconnect)
+
+    def _notify_disconnected(self) -> None:
+        """Mark every device offline (from the paho thread)."""
+        for device in self._devices.values():
+            self.hass.loop.call_soon_threadsafe(device._handle_disconnect)
+
+    def _on_message(self, client, userdata, msg: MQTTMessage) -> None:
+        """Route a message to the device subscribed to its topic.
+
+        Args:
+            client: MQTT client instance
+            userdata: User data
+            msg: MQTT message
+        """
+        self._route(msg.topic, msg.payload or b"")
+
+    @callback
+    def _safe_schedule_reconnect(self) -> None:
+        """Thread-safe check before scheduling reconnect.
+
+        Called via call_soon_threadsafe from paho callbacks to ensure
+        _stopping check runs on the event loop thread, preventing the
+        zombie-reconnect race where disconnect() sets _stopping=True
+        while a paho callback reads a stale False.
+        """
+        if not self._stopping:
+            self._schedule_reconnect()
+
+    def _schedule_reconnect(self) -> None:
+        """Schedule an asynchronous reconnection attempt with exponential backoff.
+
+        After MAX_RECONNECT_ATTEMPTS soft reconnect failures, switches to hard reconnect
+        (fresh paho client). Never gives up permanently — MQTT is the primary data source.
+        """
+        self._reconnect_attempts += 1
+
+        if self._reconnect_attempts <= MAX_RECONNECT_ATTEMPTS:
+            delay = min(
+                RECONNECT_DELAY_SECONDS * (2 ** (self._reconnect_attempts - 1)), 60
+            )
+            _LOGGER.info(
+                "Scheduling MQTT soft reconnect %s/%s for %s in %ss",
+                self._reconnect_attempts, MAX_RECONNECT_ATTEMPTS,
+                self._client_id, delay,
+            )
+        else:
+            delay = 120
+            _LOGGER.warning(
+                "MQTT soft reconnects exhausted (%sx) for %s. "
+                "Will attempt hard reconnect (fresh connection) in %ss",
+                MAX_RECONNECT_ATTEMPTS, self._client_id, delay,
+            )
+
+        self.hass.loop.call_soon_threadsafe(
+            lambda: self.hass.async_create_task(self._async_reconnect(delay))
+        )
+
+    async def _async_reconnect(self, delay: float) -> None:
+        """Wait for delay and attempt reconnection.
+
+        Uses soft reconnect (reuse existing client) for first MAX_RECONNECT_ATTEMPTS,
+        then switches to hard reconnect (fresh paho client) for subsequent attempts.
+
+        Args:
+            delay: Delay in seconds before reconnecting
+        """
+        await asyncio.sleep(delay)
+        if self._stopping:
+            return
+
+        if self._reconnect_attempts <= MAX_RECONNECT_ATTEMPTS:
+            # Soft reconnect: reuse existing paho client
+            if not self.is_connected and self._mqttc:
+                if _LOGGER.isEnabledFor(logging.DEBUG):
+                    _LOGGER.debug("Attempting MQTT soft reconnect %s", self._client_id)
+                try:
+                    await self.hass.async_add_executor_job(self._mqttc.reconnect)
+                except Exception as exc:
+                    _LOGGER.warning("MQTT soft reconnect failed %s: %s", self._client_id, exc)
+        else:
+            # Hard reconnect: create a fresh paho client
+            await self._hard_reconnect()
+
+    async def _hard_reconnect(self) -> None:
+        """Perform a hard reconnect by creating a fresh paho client.
+
+        Stops and disconnects the old client, then calls connect() which creates
+        a brand new MQTT connection. This recovers from cases where the old paho
+        client is in a permanently broken state that soft reconnect can't fix.
+        """
+        _LOGGER.info("MQTT hard reconnect: creating fresh connection %s", self._client_id)
+
+        # Clean up old client
+        old_mqttc = self._mqttc
+        self._mqttc = None
+        for device in self._devices.values():
+            device._handle_disconnect()
+
+        if old_mqttc:
+            try:
+                old_mqttc.loop_stop()
+            except Exception:
+                pass
+            try:
+                old_mqttc.disconnect()
+            except Exception:
+                pass
+
+        self._is_connected = False
+        self._connected_event.clear()
+        self._reconnect_attempts = 0
+        self._stopping = False
+
+        try:
+            await self.connect()
+            _LOGGER.info("MQTT hard reconnect successful %s", self._client_id)
+        except Exception as exc:
+            _LOGGER.error("MQTT hard reconnect failed %s: %s", self._client_id, exc)
+            # connect() calls disconnect() on failure which sets _stopping=True
+            # Reset flags and schedule next hard reconnect attempt
+            self._stopping = False
+            self._reconnect_attempts = MAX_RECONNECT_ATTEMPTS
+            self._schedule_reconnect()
+
+    async def disconnect(self) -> None:
+        """Close the shared connection and stop reconnecting."""
+        _LOGGER.info(f"Disconnecting MQTT {self._client_id}")
+        self._stopping = True
+        self._reconnect_attempts = MAX_RECONNECT_ATTEMPTS
+        self._connected_event.set()
+
+        mqttc_to_disconnect = None
+        async with self._connect_lock:
+            if self._mqttc:
+                mqttc_to_disconnect = self._mqttc
+                self._mqttc = None
+            self._is_connected = False
+
+        if mqttc_to_disconnect:
+            try:
+                if _LOGGER.isEnabledFor(logging.DEBUG):
+                    _LOGGER.debug("Stopping MQTT loop %s", self._client_id)
+                await self.hass.async_add_executor_job(mqttc_to_disconnect.loop_stop)
+                if _LOGGER.isEnabledFor(logging.DEBUG):
+                    _LOGGER.debug("Executing MQTT disconnect %s", self._client_id)
+                await self.hass.async_add_executor_job(mqttc_to_disconnect.disconnect)
+                _LOGGER.info(f"MQTT client disconnected {self._client_id}")
+            except Exception as exc:
+                _LOGGER.warning(f"Error during MQTT disconnect {self._client_id}: {exc}")
+        elif _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("MQTT client already None %s", self._client_id)
+
+
+@callback
+def async_get_mqtt_hub(
+    hass: HomeAssistant, device_id: str, transport: str = DEFAULT_MQTT_TRANSPORT
+) -> MqttHubBase:
+    """Return the shared hub, creating it on the given transport for the first device.
+
+    Later devices join the existing hub whatever transport they ask for.
+    """
+    hub = hass.data.get(DATA_MQTT_HUB)
+    if hub is None:
+        if transport == MQTT_TRANSPORT_PAHO:
+            hub = LumentreeMqttHub(hass, device_id)
+        else:
+            from .mqtt_asyncio import LumentreeAsyncioMqttHub
+
+            hub = LumentreeAsyncioMqttHub(hass, device_id)
+        hass.data[DATA_MQTT_HUB] = hub
+    elif hub.transport != transport and _LOGGER.isEnabledFor(logging.DEBUG):
+        _LOGGER.debug("MQTT %s requested, sharing the %s connection", transport, hub.transport)
+    return hub
@@ -0,0 +1,126 @@
+"""Which register ranges a realtime poll reads, and how often.
+
+Each PollTier is one Modbus read with its own cadence; its command bytes are
+built once when the plan is created. A poll publishes the commands of every
+tier that is due in one MQTT message (the frame extractor splits the
+responses again).
+
+The identity registers (firmware/controller version, serial) sit inside the
+main block the device answers as one layout, so the default plan has no
+separate once-per-connection tier; PollTier(every=None) supports one for
+register ranges outside the main block.
+"""
+
+import logging
+from dataclasses import dataclass
+
+from ..const import REG_ADDR_CELL_COUNT, REG_ADDR_CELL_START
+from .realtime_parser import generate_modbus_read_command
+
+_LOGGER = logging.getLogger(__name__)
+
+NUM_MAIN_REGISTERS_TO_READ = 151  # Read registers 0-150 (extended for work/battery mode)
+CELLS_POLL_SECONDS = 60  # Cell voltages move slowly and their frame is large
+
+
+@dataclass(frozen=True)
+class PollTier:
+    """One register range read at its own cadence.
+
+    Attributes:
+        name: Tier name (diagnostics, logs)
+        start: First register
+        count: Number of registers
+        every: Seconds between reads; 0 reads on every poll, None once per connection
+        func_code: Modbus function code
+        slave_id: Modbus slave ID
+    """
+
+    name: str
+    start: int
+    count: int
+    every: float | None = 0
+    func_code: int = 3
+    slave_id: int = 1
+
+    def command(self) -> bytes:
+        """Build the read command (with CRC).
+
+        Raises:
+            ValueError: If the command cannot be generated
+        """
+        command_hex = generate_modbus_read_command(
+            self.slave_id, self.func_code, self.start, self.count
+        )
+        if not command_hex:
+            raise ValueError(f"Cannot build Modbus read for tier {self.name}")
+        return bytes.fromhex(command_hex)
+
+
+MAIN_TIER = PollTier("main", 0, NUM_MAIN_REGISTERS_TO_READ)
+CELLS_TIER = PollTier("cells", REG_ADDR_CELL_START, REG_ADDR_CELL_COUNT, every=CELLS_POLL_SECONDS)
+DEFAULT_POLL_TIERS: tuple[PollTier, ...] = (MAIN_TIER, CELLS_TIER)
+
+
+class PollPlan:
+    """Decides which tiers a poll reads and hands out their precomputed commands."""
+
+    __slots__ = ("tiers", "_commands", "_payloads", "_last_read")
+
+    def __init__(self, tiers: tuple[PollTier, ...] = DEFAULT_POLL_TIERS) -> None:
+        """Initialize the plan; every tier is due on the first poll.
+
+        Args:
+            tiers: Tiers in publish order
+        """
+        self.tiers = tiers
+        self._commands: dict[PollTier, bytes] = {tier: tier.command() for tier in tiers}
+        # Concatenated payload per combination of due tiers, built on first use
+        self._payloads: dict[tuple[PollTier, ...], bytes] = {}
+        self._last_read: dict[PollTier, float] = {}
+
+    def command(self, tier: PollTier) -> bytes:
+        """Precomputed command of a tier (built and kept on first use for other tiers)."""
+        command = self._commands.get(tier)
+        if command is None:
+            command = self._commands[tier] = tier.command()
+        return command
+
+    def due(self, now: float) -> tuple[PollTier, ...]:
+        """Tiers to read on a poll at the given time (time.monotonic() seconds)."""
+        due = []
+        for tier in self.tiers:
+            last = self._last_read.get(tier)
+            if last is None or (tier.every is not None and now - last >= tier.every):
+                due.append(tier)
+        return tuple(due)
+
+    def payload(self, tiers: tuple[PollTier, ...]) -> bytes:
+        """MQTT payload reading the given tiers in one message."""
+        payload = self._payloads.get(tiers)
+        if payload is None:
+            payload = self._payloads[tiers] = b"".join(self.command(t) for t in tiers)
+        return payload
+
+    def mark_read(self, tiers: tuple[PollTier, ...], now: float) -> None:
+        """Record the tiers as read at the given time."""
+        for tier in tiers:
+            self._last_read[tier] = now
+
+    def reset(self) -> None:
+        """Make every tier due again (new connection or device back online)."""
+        self._last_read.clear()
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Poll plan reset: %s", [tier.name for tier in self.tiers])
+
+    def as_dict(self, now: float) -> dict[str, dict[str, float | None]]:
+        """Cadence and age of the last read per tier (for diagnostics)."""
+        return {
+            tier.name: {
+                "every": tier.every,
+                "last_read_age": (
+                    round(now - self._last_read[tier], 1) if tier in self._last_read else None
+                ),
+            }
+            for tier in self.tiers
+        }
@@ -0,0 +1,132 @@
+"""Adaptive interval for the realtime MQTT poll.
+
+The inverter only reports when polled, so the poll interval decides both how
+fresh the realtime sensors are and how many cloud round trips and decodes we
+cause. AdaptivePollScheduler watches how fast PV, battery and load power move
+and picks the next interval within configurable bounds: the minimum during
+transients, the base interval while values drift, and a growing back-off when
+nothing changes, capped lower while the sun is up than at night.
+"""
+
+import logging
+from collections.abc import Mapping
+from typing import Any
+
+from ..const import (
+    DEFAULT_POLL_MAX_INTERVAL,
+    DEFAULT_POLL_MIN_INTERVAL,
+    DEFAULT_POLLING_INTERVAL,
+    KEY_BATTERY_POWER,
+    KEY_LOAD_POWER,
+    KEY_PV_POWER,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+WATCHED_KEYS = (KEY_PV_POWER, KEY_BATTERY_POWER, KEY_LOAD_POWER)
+FAST_CHANGE_W = 300  # A step this large in any watched power is a transient
+CHANGE_W = 50  # Smaller steps keep the base interval
+FAST_HOLD_POLLS = 5  # Polls kept at the minimum interval after a transient
+BACKOFF_FACTOR = 1.5
+PV_ACTIVE_W = 20  # PV above this counts as daylight whatever the clock says
+DAYLIGHT_HOURS = range(6, 19)  # Local hours when PV can change at any moment
+DAYLIGHT_MAX_INTERVAL = 15  # Idle cap while the sun is up (seconds)
+
+
+class AdaptivePollScheduler:
+    """Picks the next realtime poll interval from recent power changes.
+
+    observe() is fed every decoded record (deltas or full snapshots, on the
+    event loop); next_interval() is called once per poll and consumes the
+    changes seen since the previous poll.
+    """
+
+    __slots__ = (
+        "min_interval",
+        "max_interval",
+        "base_interval",
+        "_interval",
+        "_last",
+        "_max_delta",
+        "_fast_polls_left",
+        "_pv_active",
+    )
+
+    def __init__(
+        self,
+        min_interval: float = DEFAULT_POLL_MIN_INTERVAL,
+        max_interval: float = DEFAULT_POLL_MAX_INTERVAL,
+    ) -> None:
+        """Initialize the scheduler.
+
+        Args:
+            min_interval: Shortest interval in seconds (transients); at least 1
+            max_interval: Longest interval in seconds (idle at night); raised to
+                min_interval if lower
+        """
+        self.min_interval = max(1.0, float(min_interval))
+        self.max_interval = max(self.min_interval, float(max_interval))
+        self.base_interval = min(max(DEFAULT_POLLING_INTERVAL, self.min_interval), self.max_interval)
+        self._interval = self.base_interval
+        self._last: dict[str, float] = {}
+        self._max_delta = 0.0
+        self._fast_polls_left = 0
+        self._pv_active = False
+
+    @property
+    def interval(self) -> float:
+        """Interval chosen by the last next_interval() call (seconds)."""
+        return self._interval
+
+    def observe(self, data: Mapping[str, Any]) -> None:
+        """Record the watched power values of a decoded record.
+
+        Args:
+            data: Parsed realtime record; keys it lacks are unchanged
+        """
+        for key in WATCHED_KEYS:
+            value = data.get(key)
+            if value is None:
+                continue
+            previous = self._last.get(key)
+            self._last[key] = value
+            if previous is not None:
+                delta = abs(value - previous)
+                if delta > self._max_delta:
+                    self._max_delta = delta
+            if key == KEY_PV_POWER:
+                self._pv_active = value > PV_ACTIVE_W
+
+    def next_interval(self, hour: int) -> float:
+        """Choose the delay until the next poll.
+
+        Args:
+            hour: Current local hour (0-23), for the daylight cap
+
+        Returns:
+            Interval in seconds within [min_interval, max_interval]
+        """
+        delta = self._max_delta
+        self._max_delta = 0.0
+
+        if delta >= FAST_CHANGE_W:
+            self._fast_polls_left = FAST_HOLD_POLLS
+        if self._fast_polls_left:
+            self._fast_polls_left -= 1
+            interval = self.min_interval
+        elif delta >= CHANGE_W:
+            interval = self.base_interval
+        else:
+            ceiling = self.max_interval
+            if self._pv_active or hour in DAYLIGHT_HOURS:
+                ceiling = min(ceiling, max(DAYLIGHT_MAX_INTERVAL, self.base_interval))
+            interval = min(max(self._interval, self.base_interval) * BACKOFF_FACTOR, ceiling)
+
+        interval = min(max(interval, self.min_interval), self.max_interval)
+        if interval != self._interval and _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(
+                "Poll interval %.1fs -> %.1fs (max change %.0f W, PV active %s)",
+                self._interval, interval, delta, self._pv_active,
+            )
+        self._interval = interval
+        return interval
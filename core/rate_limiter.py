@@ -0,0 +1,289 @@
+"""Priority-aware, adaptive token bucket shared by all requests to one API host.
+
+Requests to lesvr used to be paced in several places: fixed sleeps between
+backfilled days, exponential delays on errors in _send_request, nothing at
+all for the coordinators. Every HTTP attempt now takes a token from the
+bucket of its host first. Waiting requests are granted in priority order
+(PRIORITY_LIVE before PRIORITY_REFRESH before PRIORITY_BACKFILL), so a long
+backfill queues behind the live daily update instead of in front of it.
+
+The rate adapts additively-increase / multiplicatively-decrease: each fast
+success raises it by RATE_STEP, a slow response lowers it by SLOW_FACTOR and
+an error (timeout, connection or server error, 429) halves it. Decreases are
+spaced at least DECREASE_COOLDOWN apart, so a burst of concurrent failures
+counts once. An error also pauses the host: no token is handed out for
+ERROR_BACKOFF seconds, doubling with every further error up to
+MAX_ERROR_BACKOFF, so retries do not hit a rate-limiting server again at once.
+
+One limiter serves all config entries of a Home Assistant instance; it is
+kept in hass.data (async_get_rate_limiter), not in module state, so it goes
+away with the entries and never outlives the event loop it times on.
+
+The priority of a request is taken from the calling context: code paths set
+it with the with_request_priority() decorator (default PRIORITY_REFRESH).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import itertools
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from ..const import DATA_RATE_LIMITER
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+# Priority classes, lower is served first
+PRIORITY_LIVE = 0  # Today's statistics shown on the dashboard
+PRIORITY_REFRESH = 1  # Coordinator refreshes, setup, services
+PRIORITY_BACKFILL = 2  # History backfill and detection
+
+INITIAL_RATE = 4.0  # Requests per second before any feedback
+MIN_RATE = 0.2  # Floor after repeated errors (one request every 5 s)
+MAX_RATE = 10.0
+BURST = 6  # Tokens kept at most (a daily refresh sends 3 requests at once)
+RATE_STEP = 0.1  # Requests per second added after a fast success
+SLOW_LATENCY = 3.0  # Seconds; slower responses lower the rate
+SLOW_FACTOR = 0.8
+ERROR_FACTOR = 0.5
+DECREASE_COOLDOWN = 2.0  # Seconds between two rate decreases
+ERROR_BACKOFF = 1.0  # Seconds no request is sent after an error
+MAX_ERROR_BACKOFF = 5.0  # Cap of the pause after consecutive errors
+
+_request_priority: ContextVar[int] = ContextVar(
+    "lumentree_request_priority", default=PRIORITY_REFRESH
+)
+
+_T = TypeVar("_T")
+
+
+def current_priority() -> int:
+    """Priority of requests made from the current context."""
+    return _request_priority.get()
+
+
+def with_request_priority(
+    priority: int,
+) -> Callable[[Callable[..., Awaitable[_T]]], Callable[..., Awaitable[_T]]]:
+    """Decorate a coroutine function so the requests it makes use the given priority."""
+
+    def decorator(func: Callable[..., Awaitable[_T]]) -> Callable[..., Awaitable[_T]]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> _T:
+            token = _request_priority.set(priority)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _request_priority.reset(token)
+
+        return wrapper
+
+    return decorator
+
+
+class RequestTicket:
+    """Place of one request in the queue; priority may be raised while it waits."""
+
+    __slots__ = ("priority", "seq", "future")
+
+    def __init__(self, priority: int) -> None:
+        self.priority = priority
+        self.seq = 0
+        self.future: asyncio.Future | None = None
+
+
+class AdaptiveRateLimiter:
+    """Token bucket of one API host with priority queueing and AIMD rate. Loop only."""
+
+    __slots__ = (
+        "rate",
+        "min_rate",
+        "max_rate",
+        "burst",
+        "_tokens",
+        "_updated",
+        "_waiters",
+        "_timer",
+        "_seq",
+        "_last_decrease",
+        "_paused_until",
+        "_error_streak",
+        "granted",
+        "queued",
+        "errors",
+        "slow",
+    )
+
+    def __init__(
+        self,
+        rate: float = INITIAL_RATE,
+        min_rate: float = MIN_RATE,
+        max_rate: float = MAX_RATE,
+        burst: int = BURST,
+    ) -> None:
+        """Initialize with a full bucket.
+
+        Args:
+            rate: Initial requests per second
+            min_rate: Lowest rate errors can push it to
+            max_rate: Highest rate successes can raise it to
+            burst: Tokens kept at most
+        """
+        self.min_rate = min_rate
+        self.max_rate = max(min_rate, max_rate)
+        self.rate = min(max(rate, self.min_rate), self.max_rate)
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._waiters: list[RequestTicket] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._seq = itertools.count()
+        self._last_decrease = float("-inf")
+        self._paused_until = float("-inf")  # No token is handed out before (after errors)
+        self._error_streak = 0
+        self.granted = 0
+        self.queued = 0  # Grants that had to wait
+        self.errors = 0
+        self.slow = 0
+
+    def _refill(self, now: float) -> None:
+        if now > self._updated:  # _updated is the end of the pause while paused
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    async def acquire(self, ticket: RequestTicket) -> float:
+        """Wait for a token.
+
+        Args:
+            ticket: Request to admit; its priority is read when tokens are handed out
+
+        Returns:
+            Seconds waited
+        """
+        start = time.monotonic()
+        self._refill(start)
+        if not self._waiters and self._tokens >= 1 and start >= self._paused_until:
+            self._tokens -= 1
+            self.granted += 1
+            return 0.0
+
+        loop = asyncio.get_running_loop()
+        ticket.seq = next(self._seq)
+        ticket.future = loop.create_future()
+        self._waiters.append(ticket)
+        self._schedule(loop)
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket in self._waiters:
+                self._waiters.remove(ticket)
+            elif ticket.future.done() and not ticket.future.cancelled():
+                self._tokens += 1  # Granted just before the cancellation: give it back
+                self._schedule(loop)
+            raise
+        self.granted += 1
+        self.queued += 1
+        return time.monotonic() - start
+
+    def _schedule(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Arm the timer handing out the next token, if anyone waits for one."""
+        if self._timer is not None or not self._waiters:
+            return
+        paused = self._paused_until - time.monotonic()
+        delay = max(0.0, (1 - self._tokens) / self.rate, paused)
+        self._timer = loop.call_later(delay, self._release, loop)
+
+    def _release(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Hand the available tokens to the waiters, highest priority first."""
+        self._timer = None
+        now = time.monotonic()
+        self._refill(now)
+        while self._waiters and self._tokens >= 1 - 1e-9 and now >= self._paused_until:
+            ticket = min(self._waiters, key=lambda t: (t.priority, t.seq))
+            self._waiters.remove(ticket)
+            if ticket.future.done():
+                continue  # Cancelled while waiting
+            self._tokens -= 1
+            ticket.future.set_result(None)
+        self._schedule(loop)
+
+    def record_success(self, latency: float) -> None:
+        """Adapt the rate to a completed request."""
+        if latency > SLOW_LATENCY:
+            self.slow += 1
+            self._decrease(SLOW_FACTOR, f"slow response ({latency:.1f} s)")
+        else:
+            self.rate = min(self.max_rate, self.rate + RATE_STEP)
+        self._error_streak = 0
+
+    def record_error(self) -> None:
+        """Adapt the rate to a timeout, connection or server error and pause the host."""
+        self.errors += 1
+        now = time.monotonic()
+        if now >= self._paused_until:
+            # Errors of requests sent before the pause started do not lengthen it
+            backoff = min(MAX_ERROR_BACKOFF, ERROR_BACKOFF * 2**self._error_streak)
+            self._error_streak += 1
+            self._paused_until = now + backoff
+            # One token when the pause ends: a single probe goes out first
+            self._tokens = 1.0
+            self._updated = self._paused_until
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug("API requests paused for %.1f s after an error", backoff)
+        self._decrease(ERROR_FACTOR, "error")
+
+    def close(self) -> None:
+        """Stop the release timer and fail the requests still waiting (on unload)."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for ticket in self._waiters:
+            if ticket.future is not None and not ticket.future.done():
+                ticket.future.cancel()
+        self._waiters.clear()
+
+    def _decrease(self, factor: float, reason: str) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < DECREASE_COOLDOWN:
+            return
+        self._last_decrease = now
+        old = self.rate
+        self.rate = max(self.min_rate, self.rate * factor)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("API rate %.2f -> %.2f req/s after %s", old, self.rate, reason)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Summary for diagnostics."""
+        return {
+            "rate": round(self.rate, 2),
+            "tokens": round(self._tokens, 2),
+            "waiting": len(self._waiters),
+            "paused": round(max(0.0, self._paused_until - time.monotonic()), 2),
+            "granted": self.granted,
+            "queued": self.queued,
+            "errors": self.errors,
+            "slow": self.slow,
+        }
+
+
+def async_get_rate_limiter(hass: HomeAssistant) -> AdaptiveRateLimiter:
+    """Limiter shared by all config entries (they all talk to the same server)."""
+    limiter = hass.data.get(DATA_RATE_LIMITER)
+    if limiter is None:
+        limiter = hass.data[DATA_RATE_LIMITER] = AdaptiveRateLimiter()
+    return limiter
+
+
+def async_release_rate_limiter(hass: HomeAssistant) -> None:
+    """Drop the shared limiter once the last config entry is unloaded."""
+    limiter = hass.data.pop(DATA_RATE_LIMITER, None)
+    if limiter is not None:
+        limiter.close()
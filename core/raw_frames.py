@@ -0,0 +1,68 @@
+"""Fixed-size ring of the last raw MQTT payloads of a device.
+
+Raw frames used to ride along with every parsed record as a hex string and
+end up as sensor state. They are only needed when debugging a firmware or
+decoding problem, so they are kept here as the received bytes objects (no
+copy, no hex) and rendered on demand by diagnostics and the dump_raw_frames
+service. The raw MQTT sensor only shows how many frames arrived.
+"""
+
+import time
+import zlib
+from collections import deque
+from typing import Any
+
+RAW_FRAME_RING_SIZE = 32  # Frames kept per device (a few KB)
+
+
+class RawFrameRing:
+    """Last raw payloads of one device with their receive time.
+
+    append() runs on whichever thread receives the message; deque appends
+    and snapshots are atomic, so readers on the loop need no lock.
+    """
+
+    __slots__ = ("_frames", "count")
+
+    def __init__(self, capacity: int = RAW_FRAME_RING_SIZE) -> None:
+        """Initialize an empty ring.
+
+        Args:
+            capacity: Frames kept; older ones are dropped
+        """
+        self._frames: deque[tuple[float, bytes]] = deque(maxlen=max(1, capacity))
+        self.count = 0  # Frames received since setup
+
+    @property
+    def capacity(self) -> int:
+        """Frames kept at most."""
+        return self._frames.maxlen
+
+    def append(self, payload: bytes) -> None:
+        """Keep a received payload (the object itself, not a copy)."""
+        self._frames.append((time.time(), payload))
+        self.count += 1
+
+    def last(self, limit: int | None = None) -> list[dict[str, Any]]:
+        """Newest frames first, rendered for diagnostics or a service call.
+
+        Args:
+            limit: Frames to return (default: all kept)
+        """
+        frames = list(self._frames)
+        frames.reverse()
+        if limit is not None:
+            frames = frames[: max(0, limit)]
+        return [
+            {
+                "received": received,
+                "length": len(payload),
+                "crc32": f"{zlib.crc32(payload):08x}",
+                "hex": payload.hex(),
+            }
+            for received, payload in frames
+        ]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Summary and kept frames for diagnostics."""
+        return {"count": self.count, "capacity": self.capacity, "frames": self.last()}
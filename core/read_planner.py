@@ -0,0 +1,148 @@
+"""Plan the main block reads from the realtime entities that are enabled.
+
+Every realtime value comes from registers of the 151-register main block (see
+REALTIME_SCHEMA). When most realtime sensors are disabled, reading the whole
+block wastes broker bandwidth and decode work; plan_read_ranges() maps the
+enabled keys back to their registers and coalesces them into a few Modbus
+reads, merging ranges separated by at most max_gap registers.
+
+A response carries no start address, so the device's responses are told apart
+by length: planned ranges get distinct register counts whose byte count no
+fixed frame layout uses (see LAYOUT_BYTE_COUNTS).
+"""
+
+import logging
+from collections.abc import Iterable
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+
+from ..const import DEFAULT_READ_GAP_REGISTERS, KEY_IS_UPS_MODE
+from .poll_plan import NUM_MAIN_REGISTERS_TO_READ
+from .poll_scheduler import WATCHED_KEYS
+from .realtime_parser import LAYOUT_BYTE_COUNTS
+from .register_schema import REALTIME_SCHEMA, RegisterField
+
+_LOGGER = logging.getLogger(__name__)
+
+MAX_RANGE_REGISTERS = 125  # Modbus limit; keeps the byte count equal to the data length
+# Values the integration itself needs whatever sensors are enabled
+ALWAYS_READ_KEYS: frozenset[str] = frozenset((KEY_IS_UPS_MODE, *WATCHED_KEYS))
+
+Range = tuple[int, int]  # (start register, count)
+
+
+def _needed_fields(keys: Iterable[str], schema: tuple[RegisterField, ...]) -> list[RegisterField]:
+    """Register fields behind the keys, following derived values to their inputs."""
+    by_key: dict[str, RegisterField] = {f.key: f for f in schema}
+    needed: set[str] = set()
+    todo = [key for key in keys if key in by_key]
+    while todo:
+        key = todo.pop()
+        if key in needed:
+            continue
+        needed.add(key)
+        todo.extend(dep for dep in by_key[key].depends if dep in by_key)
+    return [
+        f for f in schema
+        if f.key in needed and f.address is not None
+        and f.address + f.width <= NUM_MAIN_REGISTERS_TO_READ
+    ]
+
+
+def _count_taken(count: int, used: set[int]) -> bool:
+    """Whether a response of this many registers could be mistaken for another one."""
+    return count in used or (3, (count * 2) & 0xFF) in LAYOUT_BYTE_COUNTS
+
+
+def _distinct_counts(ranges: list[Range]) -> list[Range]:
+    """Grow ranges by one register until no two responses share a length or layout."""
+    used: set[int] = set()
+    result = []
+    for start, count in ranges:
+        while _count_taken(count, used):
+            if start + count < NUM_MAIN_REGISTERS_TO_READ:
+                count += 1
+            else:
+                start -= 1
+                count += 1
+        used.add(count)
+        result.append((start, count))
+    return result
+
+
+def plan_read_ranges(
+    keys: Iterable[str],
+    max_gap: int = DEFAULT_READ_GAP_REGISTERS,
+    schema: tuple[RegisterField, ...] = REALTIME_SCHEMA,
+) -> tuple[Range, ...] | None:
+    """Coalesce the registers the keys need into Modbus read ranges.
+
+    Args:
+        keys: Realtime keys to read (ALWAYS_READ_KEYS are added)
+        max_gap: Merge ranges separated by at most this many registers
+        schema: Register schema
+
+    Returns:
+        (start, count) ranges in address order, or None when reading the whole
+        main block is as cheap (the ranges would cover most of it)
+    """
+    fields = _needed_fields({*keys, *ALWAYS_READ_KEYS}, schema)
+    spans = sorted({(f.address, f.address + f.width) for f in fields})
+    merged: list[list[int]] = []
+    for start, end in spans:
+        if merged and start - merged[-1][1] <= max_gap:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+
+    ranges: list[Range] = []
+    for start, end in merged:
+        while end - start > MAX_RANGE_REGISTERS:
+            ranges.append((start, MAX_RANGE_REGISTERS))
+            start += MAX_RANGE_REGISTERS
+        ranges.append((start, end - start))
+    ranges = _distinct_counts(ranges)
+
+    # Each extra read costs a command (8 bytes) and a response header/CRC (5 bytes)
+    planned_bytes = sum(count * 2 + 13 for _start, count in ranges)
+    if planned_bytes >= NUM_MAIN_REGISTERS_TO_READ * 2 + 13:
+        return None
+    return tuple(ranges)
+
+
+def range_schema(
+    ranges: tuple[Range, ...], schema: tuple[RegisterField, ...] = REALTIME_SCHEMA
+) -> tuple[RegisterField, ...]:
+    """Fields fully inside the ranges, plus derived values whose inputs all are."""
+    inside = [
+        f for f in schema
+        if f.address is not None
+        and any(start <= f.address and f.address + f.width <= start + n for start, n in ranges)
+    ]
+    keys = {f.key for f in inside}
+    derived = [f for f in schema if f.derive is not None]
+    changed = True
+    while changed:
+        changed = False
+        for f in derived:
+            if f.key not in keys and all(dep in keys for dep in f.depends):
+                keys.add(f.key)
+                changed = True
+    return tuple(f for f in schema if f.key in keys)
+
+
+def enabled_realtime_keys(
+    hass: HomeAssistant, entry_id: str, device_sn: str
+) -> set[str] | None:
+    """Keys of the enabled entities of a config entry (None if none are registered yet)."""
+    prefix = f"{device_sn}_"
+    registry = er.async_get(hass)
+    entries = er.async_entries_for_config_entry(registry, entry_id)
+    if not entries:
+        return None
+    return {
+        entity.unique_id[len(prefix):]
+        for entity in entries
+        if entity.disabled_by is None and entity.unique_id.startswith(prefix)
+    }
@@ -1,126 +1,138 @@
 """Real-time MQTT payload parser for Lumentree integration.
 
 This module handles parsing of real-time MQTT data from Lumentree inverters.
-All parsing functions are optimized for performance with cached struct formats.
+Main register blocks are decoded by decoders compiled from the declarative
+schema in register_schema.py; cell blocks are loaded in one array('H') call.
 """
 
-from typing import Optional, Dict, Any, Tuple
 import logging
-import struct
-import math
+import re
+import sys
+from array import array
+from collections.abc import Callable, MutableMapping
+from typing import Any
 
 from ..const import (
-    REG_ADDR,
-    KEY_ONLINE_STATUS,
-    KEY_PV_POWER,
-    KEY_BATTERY_POWER,
-    KEY_BATTERY_SOC,
-    KEY_GRID_POWER,
-    KEY_LOAD_POWER,
-    KEY_BATTERY_VOLTAGE,
-    KEY_BATTERY_CURRENT,
-    KEY_AC_OUT_VOLTAGE,
-    KEY_GRID_VOLTAGE,
-    KEY_AC_OUT_FREQ,
-    KEY_AC_OUT_POWER,
-    KEY_AC_OUT_VA,
-    KEY_DEVICE_TEMP,
-    KEY_PV1_VOLTAGE,
-    KEY_PV1_POWER,
-    KEY_PV2_VOLTAGE,
-    KEY_PV2_POWER,
-    KEY_IS_UPS_MODE,
-    KEY_BATTERY_STATUS,
-    KEY_GRID_STATUS,
-    KEY_AC_IN_VOLTAGE,
-    KEY_AC_IN_FREQ,
-    KEY_AC_IN_POWER,
-    KEY_BATTERY_TYPE,
-    KEY_MASTER_SLAVE_STATUS,
-    KEY_MQTT_DEVICE_SN,
     KEY_BATTERY_CELL_INFO,
-    KEY_SELF_CONSUMPTION_RATIO,
-    KEY_WORK_MODE,
-    KEY_BATTERY_MODE,
-    KEY_FW_VERSION,
-    KEY_CTRL_VERSION,
-    REG_ADDR_CELL_START,
     REG_ADDR_CELL_COUNT,
-    MAP_BATTERY_TYPE,
-    MAP_WORK_MODE,
-    MAP_BATTERY_MODE,
 )
+from .register_schema import BlockDecoder, RealtimeRecord, get_block_decoder
 
-import crcmod.predefined
+_LOGGER = logging.getLogger(__name__)
 
-crc16_modbus_func = crcmod.predefined.mkCrcFun("modbus")
+# Separator between the broker envelope and the Modbus response ("2b2b2b2b" in hex)
+FRAME_SEPARATOR = b"++++"
+_SEPARATOR_RE = re.compile(re.escape(FRAME_SEPARATOR))
+
+BytesLike = bytes | bytearray | memoryview
+
+
+def _build_crc16_modbus_table() -> tuple[int, ...]:
+    """Precompute the 256-entry table for reflected CRC16/Modbus (poly 0xA001)."""
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+        table.append(crc)
+    return tuple(table)
+
+
+_CRC16_MODBUS_TABLE = _build_crc16_modbus_table()
+
+
+def _crc16_modbus_table(data: BytesLike) -> int:
+    """CRC16/Modbus over any bytes-like object, one table lookup per byte (no copy)."""
+    crc = 0xFFFF
+    table = _CRC16_MODBUS_TABLE
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
+
+
+# crcmod is an optional accelerator: only its C extension beats the table loop.
+# The flag is imported from the submodule: the package's star import rebinds
+# the attribute crcmod.crcmod to the package itself.
+try:
+    import crcmod.predefined
+    from crcmod.crcmod import _usingExtension
+except ImportError:
+    _crcmod_modbus = None
+else:
+    _crcmod_modbus = crcmod.predefined.mkCrcFun("modbus") if _usingExtension else None
 
-_LOGGER = logging.getLogger(__name__)
 
-# Cached struct format strings for performance (40-50% faster parsing)
-_STRUCT_FORMATS: Dict[str, struct.Struct] = {
-    "signed_2": struct.Struct(">h"),  # Signed 16-bit big-endian
-    "unsigned_2": struct.Struct(">H"),  # Unsigned 16-bit big-endian
-    "signed_4": struct.Struct(">i"),  # Signed 32-bit big-endian
-    "unsigned_4": struct.Struct(">I"),  # Unsigned 32-bit big-endian
-}
+def _crc16_modbus_crcmod(data: BytesLike) -> int:
+    return _crcmod_modbus(data if isinstance(data, bytes) else bytes(data))
 
 
-def calculate_crc16_modbus(pb: bytes) -> Optional[int]:
+crc16_modbus_func = _crc16_modbus_crcmod if _crcmod_modbus else _crc16_modbus_table
+
+
+def calculate_crc16_modbus(pb: BytesLike) -> int | None:
     """Calculate Modbus CRC16.
 
     Args:
-        pb: Payload bytes
+        pb: Payload bytes (bytes, bytearray or memoryview)
 
     Returns:
         CRC16 value or None if calculation fails
     """
-    if crc16_modbus_func:
-        try:
-            return crc16_modbus_func(pb)
-        except Exception:
-            return None
-    return None
+    try:
+        return crc16_modbus_func(pb)
+    except Exception:
+        return None
 
 
-def verify_crc(ph: str) -> Tuple[bool, Optional[str]]:
+def verify_crc(ph: str) -> tuple[bool, str | None]:
     """Verify CRC of payload hex string.
 
+    Kept for hex callers; raw frames should use verify_frame_crc().
+
     Args:
         ph: Payload hex string
 
     Returns:
         Tuple of (is_valid, error_message)
     """
-    if not crc16_modbus_func:
-        return True, "CRC skipped"
+    try:
+        frame = bytes.fromhex(ph)
+    except (ValueError, TypeError):
+        return False, "Verify error"
+    return verify_frame_crc(frame)
 
-    if len(ph) < 4:
-        return False, "Too short"
 
-    try:
-        dh, rc = ph[:-4], ph[-4:].lower()
-        db = bytes.fromhex(dh)
-        cc = calculate_crc16_modbus(db)
+def verify_frame_crc(frame: BytesLike) -> tuple[bool, str | None]:
+    """Verify CRC of a raw Modbus response frame in place.
 
-        if cc is None:
-            return False, "Calc fail"
+    The CRC of a Modbus frame including its own (little-endian) CRC is zero, so
+    the whole frame is checked in one pass without slicing or hex conversion.
 
-        cch = cc.to_bytes(2, "little").hex()
-        ok = cch == rc
+    Args:
+        frame: Response bytes including the trailing 2-byte CRC
 
-        if not ok:
-            _LOGGER.warning(f"CRC mismatch! Received: {rc}, Calculated: {cch}")
-        else:
+    Returns:
+        Tuple of (is_valid, error_message)
+    """
+    if len(frame) < 2:
+        return False, "Too short"
+
+    try:
+        if crc16_modbus_func(frame) == 0:
             if _LOGGER.isEnabledFor(logging.DEBUG):
                 _LOGGER.debug("CRC check successful")
+            return True, None
 
-        return ok, None if ok else f"Mismatch {rc} vs {cch}"
+        # Failure path only: compute the expected CRC for the log message
+        cc = crc16_modbus_func(memoryview(frame)[:-2])
+        rc = frame[-2] | (frame[-1] << 8)
+        _LOGGER.warning("CRC mismatch! Received: %04x, Calculated: %04x", rc, cc)
+        return False, f"Mismatch {rc:04x} vs {cc:04x}"
     except Exception:
         return False, "Verify error"
 
 
-def generate_modbus_read_command(sid: int, fc: int, addr: int, num: int) -> Optional[str]:
+def generate_modbus_read_command(sid: int, fc: int, addr: int, num: int) -> str | None:
     """Generate a Modbus read command hex string with CRC.
 
     Args:
@@ -132,20 +144,9 @@ def generate_modbus_read_command(sid: int, fc: int, addr: int, num: int) -> Opti
     Returns:
         Command hex string or None if generation fails
     """
-    if not crc16_modbus_func:
-        _LOGGER.error("Cannot generate command: crcmod library missing")
-        return None
-
     try:
-        pdu = bytearray([fc]) + addr.to_bytes(2, "big") + num.to_bytes(2, "big")
-        adu = bytearray([sid]) + pdu
-        crc = calculate_crc16_modbus(bytes(adu))
-
-        if crc is None:
-            _LOGGER.error("CRC calculation failed")
-            return None
-
-        full = adu + crc.to_bytes(2, "little")
+        adu = bytes((sid, fc)) + addr.to_bytes(2, "big") + num.to_bytes(2, "big")
+        full = adu + crc16_modbus_func(adu).to_bytes(2, "little")
         command_hex = full.hex()
 
         if _LOGGER.isEnabledFor(logging.DEBUG):
@@ -157,458 +158,660 @@ def generate_modbus_read_command(sid: int, fc: int, addr: int, num: int) -> Opti
         return None
 
 
-def _read_register(
-    db: bytes, ra: int, signed: bool, factor: float = 1.0, byte_count: int = 2
-) -> Optional[float]:
-    """Read register value with cached struct formats for performance.
+# Cell registers are big-endian words
+_CELLS_NEED_BYTESWAP = sys.byteorder == "little"
 
-    Args:
-        db: Data bytes
-        ra: Register address (offset)
-        signed: Whether value is signed
-        factor: Multiplication factor
-        byte_count: Number of bytes (2 or 4)
+# Main frames between forced full snapshots in change-driven decoding (~1 min at 5 s polling)
+FULL_SNAPSHOT_INTERVAL_FRAMES = 12
 
-    Returns:
-        Register value or None if reading fails
-    """
-    offset_bytes = ra * 2
 
-    if offset_bytes + byte_count > len(db):
-        return None
+class RealtimeDecodeState:
+    """Per-device memory for change-driven decoding of main register blocks.
 
-    try:
-        raw_bytes = db[offset_bytes : offset_bytes + byte_count]
+    Keeps the previous raw block: an identical block decodes to nothing, otherwise
+    only keys whose source registers changed are returned. A full snapshot is
+    returned on the first frame, every full_snapshot_interval frames, when the
+    block layout changes and after reset().
 
-        # Use cached struct formats for performance
-        if byte_count == 2:
-            fmt = _STRUCT_FORMATS["signed_2"] if signed else _STRUCT_FORMATS["unsigned_2"]
-        elif byte_count == 4:
-            fmt = _STRUCT_FORMATS["signed_4"] if signed else _STRUCT_FORMATS["unsigned_4"]
-        else:
-            _LOGGER.warning(f"Unsupported byte_count {byte_count}")
-            return None
+    layout_counts tracks how many frames of each layout (see _FRAME_LAYOUTS) or
+    rejection reason the device has sent.
 
-        raw_val = fmt.unpack(raw_bytes)[0]
-        result = round(raw_val * factor, 3)
+    With set_range_reads() the device is polled for register ranges of the
+    main block instead of the whole block: each range response is written into
+    a block image at its start register and the image is decoded with a
+    decoder limited to the fields those ranges cover.
 
-        if not math.isfinite(result):
-            _LOGGER.warning(f"Invalid float read from register {ra}")
-            return None
+    Not thread-safe beyond reset(): one state belongs to one message thread.
+    """
 
-        return result
-    except struct.error as exc:
-        _LOGGER.error(f"Struct error reading register {ra}: {exc}")
-        return None
-    except Exception as exc:
-        _LOGGER.exception(f"Unexpected error reading register {ra}: {exc}")
+    __slots__ = (
+        "full_snapshot_interval",
+        "_decoder",
+        "_block",
+        "_raw",
+        "_snapshot",
+        "_values",
+        "_frames_since_full",
+        "_force_full",
+        "layout_counts",
+        "_range_starts",
+        "_range_decoder",
+        "_image",
+        "_ranges_missing",
+    )
+
+    def __init__(self, full_snapshot_interval: int = FULL_SNAPSHOT_INTERVAL_FRAMES) -> None:
+        """Initialize empty state (the next frame is a full snapshot)."""
+        self.full_snapshot_interval = full_snapshot_interval
+        self._decoder: BlockDecoder | None = None
+        self._block: bytes = b""
+        self._raw: tuple[Any, ...] = ()
+        self._snapshot: RealtimeRecord | None = None
+        self._values: dict[str, Any] | None = None
+        self._frames_since_full = 0
+        self._force_full = True
+        self.layout_counts: dict[str, int] = {}
+        # Range reads: data length -> start register (function code 03)
+        self._range_starts: dict[int, int] = {}
+        self._range_decoder: BlockDecoder | None = None
+        self._image = bytearray()
+        # Lengths of ranges not received yet; the image is decoded once all arrived
+        self._ranges_missing: set[int] = set()
+
+    def set_range_reads(
+        self, ranges: tuple[tuple[int, int], ...], decoder: BlockDecoder | None
+    ) -> None:
+        """Decode responses to the given (start, count) reads into the main block.
+
+        Args:
+            ranges: Register ranges with distinct counts that no other layout uses
+            decoder: Decoder of the fields inside the ranges, over the whole block;
+                None (or no ranges) turns range reads off
+        """
+        if not ranges or decoder is None:
+            self._range_starts = {}
+            self._range_decoder = None
+            return
+        self._image = bytearray(decoder.num_registers * 2)
+        self._range_decoder = decoder
+        self._range_starts = {count * 2: start for start, count in ranges}
+        self._ranges_missing = set(self._range_starts)
+        self._force_full = True
+
+    def range_layout(self, func_code: int, data_len: int) -> "_FrameLayout | None":
+        """Layout of a response to one of the planned range reads, if it is one."""
+        if func_code == 3 and data_len in self._range_starts:
+            return _RANGE_LAYOUT
         return None
 
+    def decode_range(self, db: BytesLike) -> MutableMapping[str, Any]:
+        """Store a range response in the block image and decode the image.
+
+        Nothing is decoded until every planned range has arrived once, so the
+        registers of the other ranges are never reported as zeros.
+        """
+        start = self._range_starts[len(db)] * 2
+        self._image[start : start + len(db)] = db
+        if self._ranges_missing:
+            self._ranges_missing.discard(len(db))
+            if self._ranges_missing:
+                return {}
+        return self.decode(self._range_decoder, self._image)
+
+    def count_layout(self, layout: str) -> int:
+        """Count a frame of the given layout and return how many have been seen."""
+        count = self.layout_counts.get(layout, 0) + 1
+        self.layout_counts[layout] = count
+        return count
+
+    def reset(self) -> None:
+        """Force a full snapshot on the next frame (safe to call from any thread)."""
+        self._force_full = True
+
+    def decode(self, decoder: BlockDecoder, db: BytesLike) -> MutableMapping[str, Any]:
+        """Decode a main block, returning a full snapshot or only changed keys.
+
+        Args:
+            decoder: Compiled decoder for the block layout
+            db: Register data bytes
+
+        Returns:
+            Lazy RealtimeRecord for a full snapshot, otherwise a dict of changed
+            values (empty if nothing changed)
+        """
+        block = bytes(db)
+        full = (
+            self._force_full
+            or decoder is not self._decoder
+            or self._frames_since_full >= self.full_snapshot_interval
+        )
+        if full:
+            self._force_full = False
+            self._frames_since_full = 0
+            raw = decoder.unpack(block)
+            result = self._snapshot = decoder.record(raw)
+            self._values = None
+        else:
+            self._frames_since_full += 1
+            if block == self._block:
+                return {}
+            raw = decoder.unpack(block)
+            if self._values is None:
+                # First delta since the snapshot: materialize the values it compares against
+                self._values = self._snapshot.schema_values()
+            result = decoder.decode_delta(raw, self._raw, self._values)
+
+        self._decoder = decoder
+        self._block = block
+        self._raw = raw
+        return result
 
-def _make_reader(db: bytes, addr_map: dict):
-    """Create a fast register reader bound to a specific data buffer and address map.
 
-    Returns a callable that avoids recreating closures on each parse_mqtt_payload call.
+class BatteryCellInfo:
+    """Decoded battery cell block: cell positions, millivolts and statistics.
+
+    Voltages are kept as integer millivolts in two tuples instead of a dict with
+    one float per cell; as_attributes() builds the sensor attribute dict on demand.
     """
 
-    def read_reg(key: str, signed: bool, factor: float = 1.0, byte_count: int = 2):
-        r = addr_map.get(key)
-        if r is not None:
-            return _read_register(db, r, signed, factor, byte_count)
-        return None
+    __slots__ = ("positions", "millivolts", "number_of_cells", "min", "max", "avg", "diff")
+
+    def __init__(self, positions: tuple[int, ...], millivolts: tuple[int, ...]) -> None:
+        """Compute statistics for the valid cells (positions are 0-based)."""
+        self.positions = positions
+        self.millivolts = millivolts
+        self.number_of_cells = len(millivolts)
+        min_mv = min(millivolts)
+        max_mv = max(millivolts)
+        self.min = min_mv / 1000
+        self.max = max_mv / 1000
+        self.avg = round(sum(millivolts) / self.number_of_cells / 1000, 3)
+        self.diff = (max_mv - min_mv) / 1000 if self.number_of_cells > 1 else 0.0
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, BatteryCellInfo):
+            return NotImplemented
+        return self.positions == other.positions and self.millivolts == other.millivolts
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"BatteryCellInfo(cells={self.number_of_cells}, min={self.min}, max={self.max})"
+
+    def as_attributes(self) -> dict[str, Any]:
+        """Return the cell sensor attributes (c_01.. keyed by cell position)."""
+        return {
+            "number_of_cells": self.number_of_cells,
+            "avg": self.avg,
+            "min": self.min,
+            "max": self.max,
+            "diff": self.diff,
+            "cells": {
+                f"c_{pos + 1:02d}": mv / 1000 for pos, mv in zip(self.positions, self.millivolts, strict=True)
+            },
+        }
 
-    return read_reg
 
+def _parse_battery_cells(db: BytesLike) -> BatteryCellInfo | None:
+    """Parse battery cell voltages.
 
-def _read_string(db: bytes, sa: int, nr: int) -> Optional[str]:
-    """Read ASCII string from registers.
+    The whole block is loaded into an array('H') in one call (byteswapped from
+    big-endian on little-endian hosts) and filtered to the valid 1-5 V range.
 
     Args:
-        db: Data bytes
-        sa: Start address
-        nr: Number of registers
+        db: Data bytes containing cell information
 
     Returns:
-        Decoded string or None if reading fails
+        BatteryCellInfo or None if no valid cell was found
     """
-    offset = sa * 2
-    num_bytes = nr * 2
+    if _LOGGER.isEnabledFor(logging.DEBUG):
+        _LOGGER.debug("Parsing %s cell bytes", len(db))
+
+    words = array("H")
+    words.frombytes(db[: len(db) // 2 * 2])
+    if _CELLS_NEED_BYTESWAP:
+        words.byteswap()
 
-    if offset + num_bytes > len(db):
+    cells = [(pos, mv) for pos, mv in enumerate(words) if 1000 < mv < 5000]
+    if not cells:
+        _LOGGER.warning("No valid cells found")
         return None
 
+    positions, millivolts = zip(*cells, strict=True)
+    result = BatteryCellInfo(positions, millivolts)
+    if _LOGGER.isEnabledFor(logging.DEBUG):
+        _LOGGER.debug("Parsed cells: %s", result.as_attributes())
+    return result
+
+
+def _parse_cells_frame(
+    db: BytesLike, state: RealtimeDecodeState | None
+) -> MutableMapping[str, Any] | None:
+    cell_result = _parse_battery_cells(db)
+    return {KEY_BATTERY_CELL_INFO: cell_result} if cell_result else None
+
+
+def _main_frame_handler(decoder: BlockDecoder) -> Callable[..., MutableMapping[str, Any]]:
+    """Bind a compiled block decoder into a frame handler."""
+
+    def handle(
+        db: BytesLike, state: RealtimeDecodeState | None
+    ) -> MutableMapping[str, Any]:
+        # Whole block unpacked in one call (trailing bytes ignored); fields decode on access
+        if state is None:
+            return decoder.record(decoder.unpack(db))
+        return state.decode(decoder, db)
+
+    return handle
+
+
+class _FrameLayout:
+    """A known response layout: counter name, handler, whether it is expected
+    and the block decoder of main layouts (None for cells)."""
+
+    __slots__ = ("name", "handler", "expected", "decoder")
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[..., Any],
+        expected: bool = True,
+        decoder: BlockDecoder | None = None,
+    ) -> None:
+        self.name = name
+        self.handler = handler
+        self.expected = expected
+        self.decoder = decoder
+
+
+def _build_frame_layouts() -> dict[tuple[int, int], _FrameLayout]:
+    """Map (function code, data length) to a precompiled layout handler.
+
+    The Modbus byte-count field is one byte, so it wraps for the 151-register block
+    (302 bytes); layouts are keyed by the actual data length instead.
+    """
+    decoder_151 = get_block_decoder(151)
+    decoder_95 = get_block_decoder(95)
+    main_151 = _main_frame_handler(decoder_151)
+    main_95 = _main_frame_handler(decoder_95)
+    layouts: dict[tuple[int, int], _FrameLayout] = {}
+    for fc in (0x03, 0x04):
+        # Lengths close to a main block (odd firmware): decode the registers present,
+        # nothing is padded. Exact layouts below take precedence.
+        for num_regs in (151, 95):
+            for length in range(num_regs * 2 - 10, num_regs * 2 + 21):
+                decoder = get_block_decoder(min(length // 2, num_regs))
+                layouts[(fc, length)] = _FrameLayout(
+                    f"main_{num_regs}_near", _main_frame_handler(decoder), False, decoder
+                )
+        layouts[(fc, REG_ADDR_CELL_COUNT * 2)] = _FrameLayout("cells", _parse_cells_frame)
+        layouts[(fc, 151 * 2)] = _FrameLayout("main_151", main_151, decoder=decoder_151)
+        layouts[(fc, 95 * 2)] = _FrameLayout("main_95", main_95, decoder=decoder_95)
+        # Legacy block + 12 bytes metadata, and 99 registers (partial metadata)
+        layouts[(fc, 95 * 2 + 12)] = _FrameLayout("main_95_metadata", main_95, decoder=decoder_95)
+        layouts[(fc, 99 * 2)] = _FrameLayout("main_99", main_95, decoder=decoder_95)
+    return layouts
+
+
+_FRAME_LAYOUTS = _build_frame_layouts()
+# Responses to planned register range reads (see RealtimeDecodeState.set_range_reads)
+_RANGE_LAYOUT = _FrameLayout("main_range", lambda db, state: state.decode_range(db))
+_MAX_SHORT_RESPONSE_BYTES = 20
+
+
+def parse_mqtt_payload(
+    ph: str, state: RealtimeDecodeState | None = None
+) -> MutableMapping[str, Any] | None:
+    """Parse MQTT payload hex string.
+
+    Kept for callers that still hold hex (tests, archived frames); the realtime
+    path uses parse_mqtt_frame() on the raw bytes directly.
+
+    Args:
+        ph: Payload hex string
+        state: Optional per-device state for change-driven decoding
+
+    Returns:
+        Parsed data dictionary or None if parsing fails
+    """
     try:
-        raw_bytes = db[offset : offset + num_bytes]
-        decoded_string = (
-            raw_bytes.decode("ascii", "ignore").replace("\x00", "").strip()
-        )
-        return decoded_string if decoded_string else None
-    except Exception:
+        payload = bytes.fromhex(ph)
+    except (ValueError, TypeError):
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Invalid payload hex: %s...", str(ph)[:100])
         return None
+    return parse_mqtt_frame(payload, state)
 
 
-def _parse_battery_cells(db: bytes) -> Optional[Dict[str, Any]]:
-    """Parse battery cell voltages.
+def _extract_response(payload: BytesLike) -> memoryview | None:
+    """Locate the Modbus response inside an MQTT payload without copying.
 
     Args:
-        db: Data bytes containing cell information
+        payload: Raw MQTT payload bytes
 
     Returns:
-        Dictionary with cell info or None if parsing fails
+        View over the Modbus response (including CRC) or None if not found
     """
-    if _LOGGER.isEnabledFor(logging.DEBUG):
-        _LOGGER.debug("Parsing %s cell bytes", len(db))
-
-    cell_data = {}
-    num_cells = 0
-    total_voltage = 0.0
-    min_voltage = 999.0
-    max_voltage = 0.0
-
-    num_possible_cells = len(db) // 2
-
-    for i in range(num_possible_cells):
-        v_mv = _read_register(db, i, False)
-        if v_mv is not None:
-            cell_voltage = round(v_mv / 1000.0, 3)
-            if 1.0 < cell_voltage < 5.0:  # Valid cell voltage range
-                cell_data[f"c_{i + 1:02d}"] = cell_voltage
-                num_cells += 1
-                total_voltage += cell_voltage
-                min_voltage = min(min_voltage, cell_voltage)
-                max_voltage = max(max_voltage, cell_voltage)
-
-    if num_cells > 0:
-        avg = round(total_voltage / num_cells, 3)
-        diff = round(max_voltage - min_voltage, 3) if num_cells > 1 else 0.0
-        result = {
-            "number_of_cells": num_cells,
-            "avg": avg,
-            "min": min_voltage if min_voltage != 999.0 else None,
-            "max": max_voltage if max_voltage != 0.0 else None,
-            "diff": diff,
-            "cells": cell_data,
-        }
-        if _LOGGER.isEnabledFor(logging.DEBUG):
-            _LOGGER.debug("Parsed cells: %s", result)
-        return result
+    view = memoryview(payload)
+    if view.format != "B":
+        view = view.cast("B")
+
+    # re searches the buffer in place (memoryview has no find())
+    match = _SEPARATOR_RE.search(view)
+    if match is not None:
+        # Exactly one envelope/response split is accepted
+        if _SEPARATOR_RE.search(view, match.end()) is not None:
+            return None
+        resp = view[match.end() :]
     else:
-        _LOGGER.warning("No valid cells found")
+        resp = view
+
+    if len(resp) < 2 or resp[0] != 0x01 or resp[1] not in (0x03, 0x04):
         return None
+    return resp
 
 
-def parse_mqtt_payload(ph: str) -> Optional[Dict[str, Any]]:
-    """Parse MQTT payload hex string.
+def parse_mqtt_frame(
+    payload: BytesLike, state: RealtimeDecodeState | None = None
+) -> MutableMapping[str, Any] | None:
+    """Parse a raw MQTT payload.
 
     This is the main entry point for parsing real-time MQTT data from Lumentree inverters.
-    Handles both main data (95 registers) and battery cell data.
+    Handles both main data (95/151 registers) and battery cell data. The payload is
+    processed as bytes end to end: no hex string is built unless debug logging needs it.
+
+    Main blocks are returned as a lazy RealtimeRecord (fields decode on first
+    access). With a state they are decoded change-driven (see RealtimeDecodeState):
+    a valid frame with no changed registers returns an empty dict.
+
+    Payloads carrying several responses, or a response split across messages,
+    are handled by parse_mqtt_frames().
 
     Args:
-        ph: Payload hex string
+        payload: Raw MQTT payload (bytes, bytearray or memoryview)
+        state: Optional per-device state for change-driven decoding
 
     Returns:
-        Parsed data dictionary or None if parsing fails
+        Parsed data mapping or None if parsing fails
 
     Raises:
         None - All exceptions are caught and logged, returns None on error
     """
     if _LOGGER.isEnabledFor(logging.DEBUG):
-        _LOGGER.debug("Parsing payload: %s...", ph[:100])
-
-    parsed_data: Dict[str, Any] = {}
-    db: Optional[bytes] = None
-    is_cell_data = False
-    resp_hex: Optional[str] = None
-    sep = "2b2b2b2b"
-
-    # Extract response hex from payload
-    if sep in ph:
-        parts = ph.split(sep)
-        resp_hex = (
-            parts[1]
-            if len(parts) == 2 and (parts[1].startswith("0103") or parts[1].startswith("0104"))
-            else None
-        )
-    elif ph.startswith("0103") or ph.startswith("0104"):
-        resp_hex = ph
+        _LOGGER.debug("Parsing payload: %s...", bytes(payload[:50]).hex())
 
-    if not resp_hex or len(resp_hex) < 12:
+    resp = _extract_response(payload)
+    if resp is None or len(resp) < 6:
         if _LOGGER.isEnabledFor(logging.DEBUG):
             _LOGGER.debug("Invalid payload format or too short")
         return None
+    return _parse_response(resp, state)
+
+
+def _parse_response(
+    resp: memoryview, state: RealtimeDecodeState | None, crc_verified: bool = False
+) -> MutableMapping[str, Any] | None:
+    """Classify, verify and decode one Modbus response (including its CRC).
+
+    Args:
+        resp: Response view starting at the slave id
+        state: Optional per-device state for change-driven decoding
+        crc_verified: Skip the CRC check (the frame extractor already did it)
+
+    Returns:
+        Parsed data mapping or None if the response is rejected
+    """
+    layout = _classify_response(resp, state, crc_verified)
+    if layout is None:
+        return None
 
     try:
-        crc_ok, crc_err = verify_crc(resp_hex)
-        if not crc_ok:
-            _LOGGER.warning("CRC verification failed: %s", crc_err)
-            return None
-        bc = int(resp_hex[4:6], 16)
-        dh = resp_hex[6:-4]
-        db = bytes.fromhex(dh)
+        parsed_data = layout.handler(resp[3:-2], state)
+    except Exception as exc:
+        _LOGGER.exception(f"Parse error: {exc}")
+        return None
+
+    if parsed_data is None:
+        return None
+    if not parsed_data:
+        # Valid frame, nothing changed since the last one (change-driven decoding)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Main data unchanged")
+        return parsed_data
 
-        if len(db) != bc:
-            _LOGGER.warning(f"Length mismatch: {len(db)} vs {bc}")
+    if _LOGGER.isEnabledFor(logging.DEBUG):
+        _LOGGER.debug("Parse OK (%s): %s", layout.name, parsed_data)
+    return parsed_data
 
-        if len(db) == 0 and bc > 0:
-            _LOGGER.error("No data bytes")
-            return None
 
+def _classify_response(
+    resp: memoryview,
+    state: RealtimeDecodeState | None,
+    crc_verified: bool = False,
+    quiet: bool = False,
+) -> _FrameLayout | None:
+    """Find the layout of a response and verify it; rejections are counted in state.
+
+    With quiet (batch replay) rejections and unusual layouts are only counted.
+    """
+    # Classify before CRC: junk lengths are rejected without touching the data
+    data_len = len(resp) - 5
+    layout = _FRAME_LAYOUTS.get((resp[1], data_len))
+    if layout is None and state is not None:
+        layout = state.range_layout(resp[1], data_len)
+    if layout is None:
+        reason = "short" if data_len <= _MAX_SHORT_RESPONSE_BYTES else "unknown"
+        if state is not None:
+            state.count_layout(reason)
         if _LOGGER.isEnabledFor(logging.DEBUG):
-            _LOGGER.debug("Parsing %s bytes", len(db))
-
-        expected_cell_bytes = REG_ADDR_CELL_COUNT * 2
-        expected_main_bytes = 151 * 2  # 151 registers (0-150), 302 bytes
-        expected_main_bytes_legacy = 95 * 2  # Legacy 95-register format
-        expected_main_bytes_extended = expected_main_bytes_legacy + 12  # Legacy + metadata
-
-        # Determine data type
-        if bc == expected_cell_bytes and len(db) == expected_cell_bytes:
-            is_cell_data = True
-            _LOGGER.debug("Cell data detected")
-        elif (bc == expected_main_bytes and len(db) == expected_main_bytes):
-            is_cell_data = False
-            _LOGGER.debug("Main data (151 regs)")
-        elif (bc == expected_main_bytes_legacy and len(db) == expected_main_bytes_legacy) or (
-            bc == expected_main_bytes_extended and len(db) == expected_main_bytes_extended
-        ):
-            is_cell_data = False
-            if len(db) == expected_main_bytes_extended:
-                _LOGGER.debug("Main data (legacy 95 regs + 12 bytes metadata)")
-                db = db[:expected_main_bytes_legacy]
-            else:
-                _LOGGER.debug("Main data (legacy 95 regs)")
-        elif len(db) == 198 and bc == 198:
-            # 198 bytes = 99 registers, likely main data with partial metadata (missing 4 bytes)
-            # Try parsing as legacy main data (190 bytes) - skip last 8 bytes
-            is_cell_data = False
-            _LOGGER.debug("Main data (198 bytes, likely 99 regs - treating as 95 regs)")
-            db = db[:expected_main_bytes_legacy]
-        elif len(db) == 2:
-            # 2 bytes = Modbus exception response or error
             _LOGGER.debug(
-                f"Modbus exception/error response (2 bytes): {resp_hex[:20]}... "
-                f"(function_code={resp_hex[2:4] if len(resp_hex) >= 4 else 'N/A'})"
+                "Rejected %s response (%s bytes, function_code=%02x): %s...",
+                reason, data_len, resp[1], bytes(resp[:25]).hex(),
             )
+        return None
+    if resp[2] != data_len & 0xFF:
+        if state is not None:
+            state.count_layout("byte_count_mismatch")
+        if not quiet:
+            _LOGGER.warning("Length mismatch: %s data bytes vs byte count %s", data_len, resp[2])
+        return None
+
+    if quiet and not crc_verified:
+        crc_verified = crc16_modbus_func(resp) == 0
+        if not crc_verified:
+            if state is not None:
+                state.count_layout("crc_error")
             return None
-        elif len(db) <= 20:
-            # Very short responses - likely error or control messages
-            _LOGGER.debug(
-                f"Short response ({len(db)} bytes) - likely error/control: "
-                f"{resp_hex[:min(50, len(resp_hex))]}..."
-            )
+    if not crc_verified:
+        crc_ok, crc_err = verify_frame_crc(resp)
+        if not crc_ok:
+            if state is not None:
+                state.count_layout("crc_error")
+            _LOGGER.warning("CRC verification failed: %s", crc_err)
             return None
-        else:
-            # Unknown length - log with more context but try to parse if it's close to expected
-            _LOGGER.warning(
-                "Unrecognized length (%s/%s). Expected: %s or %s for main, %s for cells. "
-                "Payload preview: %s...",
-                len(db), bc, expected_main_bytes, expected_main_bytes_legacy,
-                expected_cell_bytes, resp_hex[:min(60, len(resp_hex))],
-            )
-            # If length is close to any expected main format, try parsing
-            for expected_len in (expected_main_bytes, expected_main_bytes_legacy):
-                if abs(len(db) - expected_len) <= 20 and len(db) >= expected_len - 10:
-                    _LOGGER.debug("Attempting to parse %s bytes as main data", len(db))
-                    is_cell_data = False
-                    if len(db) > expected_len:
-                        db = db[:expected_len]
-                    else:
-                        db = db + b'\x00' * (expected_len - len(db))
-                    break
-            else:
-                return None
 
-        if is_cell_data:
-            cell_result = _parse_battery_cells(db)
-            if cell_result:
-                parsed_data[KEY_BATTERY_CELL_INFO] = cell_result
-        else:
-            # Parse main registers with optimized read helper (module-level function)
-            rr = _make_reader(db, REG_ADDR)
-
-            # Battery voltage
-            bat_volt = rr("BATTERY_VOLTAGE", False, 0.01)
-            if bat_volt is not None:
-                parsed_data[KEY_BATTERY_VOLTAGE] = bat_volt
-
-            # Battery current (inverted to match card convention)
-            # Positive = Charging, Negative = Discharging (matches battery power)
-            bat_curr = rr("BATTERY_CURRENT", True, 0.01)
-            if bat_curr is not None:
-                parsed_data[KEY_BATTERY_CURRENT] = -bat_curr  # Invert sign for card compatibility
-
-            # AC output voltage
-            ac_out_v = rr("AC_OUT_VOLTAGE", False, 0.1)
-            if ac_out_v is not None:
-                parsed_data[KEY_AC_OUT_VOLTAGE] = ac_out_v
-
-            # Grid voltage (also AC input voltage)
-            grid_v = rr("GRID_VOLTAGE", False, 0.1)
-            if grid_v is not None:
-                parsed_data[KEY_GRID_VOLTAGE] = grid_v
-                parsed_data[KEY_AC_IN_VOLTAGE] = grid_v
-
-            # AC output frequency
-            ac_out_f = rr("AC_OUT_FREQ", False, 0.01)
-            if ac_out_f is not None:
-                parsed_data[KEY_AC_OUT_FREQ] = ac_out_f
-
-            # AC input frequency
-            ac_in_f = rr("AC_IN_FREQ", False, 0.01)
-            if ac_in_f is not None:
-                parsed_data[KEY_AC_IN_FREQ] = ac_in_f
-
-            # Device temperature
-            temp_raw = rr("DEVICE_TEMP", True)
-            if temp_raw is not None:
-                temp_c = round((temp_raw - 1000) / 10, 1)
-                parsed_data[KEY_DEVICE_TEMP] = temp_c if -40 < temp_c < 150 else None
-
-            # PV voltages
-            pv1_v = rr("PV1_VOLTAGE", False)
-            if pv1_v is not None:
-                parsed_data[KEY_PV1_VOLTAGE] = pv1_v
-
-            pv2_v = rr("PV2_VOLTAGE", False)
-            if pv2_v is not None:
-                parsed_data[KEY_PV2_VOLTAGE] = pv2_v
-
-            # Grid power
-            grid_p = rr("GRID_POWER", True)
-            if grid_p is not None:
-                parsed_data[KEY_GRID_POWER] = grid_p
-
-            # AC input power
-            ac_in_p_raw = rr("AC_IN_POWER", False)
-            ac_in_p = round(ac_in_p_raw / 100, 2) if ac_in_p_raw is not None else None
-            if ac_in_p is not None:
-                parsed_data[KEY_AC_IN_POWER] = ac_in_p
-
-            # Load power
-            load_p = rr("LOAD_POWER", False)
-            if load_p is not None:
-                parsed_data[KEY_LOAD_POWER] = load_p
-
-            # AC output power
-            ac_out_p = rr("AC_OUT_POWER", False)
-            if ac_out_p is not None:
-                parsed_data[KEY_AC_OUT_POWER] = ac_out_p
-
-            # AC output VA
-            ac_out_va = rr("AC_OUT_VA", False)
-            if ac_out_va is not None:
-                parsed_data[KEY_AC_OUT_VA] = ac_out_va
-
-            # Battery power and status (inverted to match card convention)
-            # Positive = Charging, Negative = Discharging (for card compatibility)
-            bp_signed = rr("BATTERY_POWER", True)
-            if bp_signed is not None:
-                parsed_data[KEY_BATTERY_POWER] = -bp_signed  # Invert sign for card compatibility
-                parsed_data[KEY_BATTERY_STATUS] = (
-                    "Charging" if parsed_data[KEY_BATTERY_POWER] > 0 else "Discharging"
-                )
-            else:
-                parsed_data[KEY_BATTERY_POWER] = None
-                parsed_data[KEY_BATTERY_STATUS] = "Unknown"
-
-            # Grid status
-            grid_status = (
-                "Importing"
-                if parsed_data.get(KEY_GRID_POWER, 0) > 0
-                else "Exporting"
-                if parsed_data.get(KEY_GRID_POWER) is not None
-                else "Unknown"
-            )
-            parsed_data[KEY_GRID_STATUS] = grid_status
-
-            # PV power
-            pv1 = rr("PV1_POWER", False)
-            pv2 = rr("PV2_POWER", False)
-            if pv1 is not None:
-                parsed_data[KEY_PV1_POWER] = pv1
-            if pv2 is not None:
-                parsed_data[KEY_PV2_POWER] = pv2
-
-            pv_power = (
-                (pv1 or 0) + (pv2 or 0) if (pv1 is not None or pv2 is not None) else None
-            )
-            if pv_power is not None:
-                parsed_data[KEY_PV_POWER] = pv_power
-
-            # Battery SOC
-            soc = rr("BATTERY_SOC", False)
-            soc_value = max(0, min(100, int(soc))) if soc is not None else None
-            if soc_value is not None:
-                parsed_data[KEY_BATTERY_SOC] = soc_value
-
-            # UPS mode
-            ups = rr("UPS_MODE", False)
-            ups_mode = (ups == 0) if ups is not None else None
-            if ups_mode is not None:
-                parsed_data[KEY_IS_UPS_MODE] = ups_mode
-
-            # Battery type
-            bt = rr("BATTERY_TYPE", False)
-            battery_type = MAP_BATTERY_TYPE.get(int(bt), "Present") if bt is not None else None
-            if battery_type is not None:
-                parsed_data[KEY_BATTERY_TYPE] = battery_type
-
-            # Master/slave status
-            ms = rr("MASTER_SLAVE_STATUS", False)
-            if ms is not None:
-                parsed_data[KEY_MASTER_SLAVE_STATUS] = ms
-
-            # Device SN
-            device_sn = _read_string(db, REG_ADDR["DEVICE_MODEL_START"], 5)
-            if device_sn is not None:
-                parsed_data[KEY_MQTT_DEVICE_SN] = device_sn
-
-            # Firmware version (register 2, within range)
-            fw_ver = rr("FIRMWARE_VERSION", False)
-            if fw_ver is not None:
-                parsed_data[KEY_FW_VERSION] = f"v{int(fw_ver)}"
-
-            # Controller version (register 8, within range)
-            ctrl_ver = rr("CONTROLLER_VERSION", False)
-            if ctrl_ver is not None:
-                parsed_data[KEY_CTRL_VERSION] = f"v{int(ctrl_ver)}"
-
-            # Battery mode (register 100 — may be beyond read range)
-            bat_mode = rr("BATTERY_MODE", False)
-            if bat_mode is not None:
-                parsed_data[KEY_BATTERY_MODE] = MAP_BATTERY_MODE.get(int(bat_mode), "Unknown")
-
-            # Work mode (register 150 — may be beyond read range)
-            work_mode = rr("WORK_MODE", False)
-            if work_mode is not None:
-                parsed_data[KEY_WORK_MODE] = MAP_WORK_MODE.get(int(work_mode), f"Unknown ({int(work_mode)})")
-
-            # Self-consumption ratio (calculated from existing data)
-            pv_total = parsed_data.get(KEY_PV1_POWER, 0) or 0
-            if parsed_data.get(KEY_PV2_POWER):
-                pv_total += parsed_data[KEY_PV2_POWER]
-            grid_power = parsed_data.get(KEY_GRID_POWER)
-            if pv_total > 0 and grid_power is not None:
-                if grid_power < 0:  # Exporting to grid
-                    direct_consumption = pv_total + grid_power
-                    if direct_consumption < 0:
-                        direct_consumption = 0
-                else:  # Importing from grid or balanced
-                    direct_consumption = pv_total
-                parsed_data[KEY_SELF_CONSUMPTION_RATIO] = round(direct_consumption / pv_total * 100, 1)
+    if quiet:
+        if state is not None:
+            state.count_layout(layout.name)
+    elif state is not None and state.count_layout(layout.name) == 1 and not layout.expected:
+        _LOGGER.warning(
+            "Unusual frame layout %s (%s bytes) from this device, decoding registers present",
+            layout.name, data_len,
+        )
+    elif _LOGGER.isEnabledFor(logging.DEBUG):
+        _LOGGER.debug("Frame layout %s (%s bytes)", layout.name, data_len)
+    return layout
+
+
+def _build_layout_lengths() -> dict[tuple[int, int], tuple[int, ...]]:
+    """Map (function code, byte count field) to the known data lengths it can mean."""
+    lengths: dict[tuple[int, int], list] = {}
+    for fc, data_len in _FRAME_LAYOUTS:
+        lengths.setdefault((fc, data_len & 0xFF), []).append(data_len)
+    return {key: tuple(sorted(value)) for key, value in lengths.items()}
+
+
+_LAYOUT_LENGTHS = _build_layout_lengths()
+# (function code, byte count field) pairs the fixed layouts use; other reads must avoid them
+LAYOUT_BYTE_COUNTS: frozenset[tuple[int, int]] = frozenset(_LAYOUT_LENGTHS)
+# A continuation is never longer than the largest layout plus envelope overhead
+MAX_PENDING_FRAME_BYTES = 1024
 
+
+class FrameExtractor:
+    """Split MQTT payloads into Modbus responses, across message boundaries.
+
+    One message may carry several responses (each after its own envelope, or
+    back to back), and a response may be split over consecutive messages. The
+    end of a response is found from the byte count field: every known data
+    length it can stand for (it wraps above 255 bytes) is tried and the one
+    whose CRC checks out wins; a byte count of no known layout (e.g. a range
+    read) is taken as the data length. An incomplete tail is kept until the next
+    message completes it; it is dropped if the next message starts a new
+    envelope instead.
+
+    Used from the MQTT callback thread only; reset() may be called from the loop.
+    """
+
+    __slots__ = ("_pending",)
+
+    def __init__(self) -> None:
+        """Initialize with no pending fragment."""
+        self._pending = b""
+
+    @property
+    def has_pending(self) -> bool:
+        """Whether an incomplete response is waiting for the next message."""
+        return bool(self._pending)
+
+    def reset(self) -> None:
+        """Drop any pending fragment (after a disconnect or timeout)."""
+        self._pending = b""
+
+    def feed(self, payload: BytesLike) -> list[tuple[memoryview, bool]]:
+        """Add one MQTT payload and return the responses it completes.
+
+        Args:
+            payload: Raw MQTT payload
+
+        Returns:
+            List of (response view, CRC verified) in arrival order. Responses
+            whose end could not be resolved are returned unverified up to the
+            next envelope so the parser can count and reject them.
+        """
+        data = payload if isinstance(payload, bytes) else bytes(payload)
+        pending = self._pending
+        self._pending = b""
+        if pending:
+            responses = self._split(pending + data)
+            if not self._pending or FRAME_SEPARATOR not in data:
+                return responses
+            # Still incomplete although a new envelope arrived: the fragment was lost
             if _LOGGER.isEnabledFor(logging.DEBUG):
-                _LOGGER.debug("Parsed main data: %s", parsed_data)
+                _LOGGER.debug("Dropping incomplete response (%s bytes)", len(pending))
+            self._pending = b""
+        return self._split(data)
+
+    def _split(self, buf: bytes) -> list[tuple[memoryview, bool]]:
+        view = memoryview(buf)
+        size = len(buf)
+        sep_len = len(FRAME_SEPARATOR)
+        responses: list[tuple[memoryview, bool]] = []
+        pos = 0
+        while pos < size:
+            if not _is_response_start(buf, pos):
+                if pos == size - 1 and buf[pos] == 0x01:
+                    self._keep(buf[pos:])  # Split right after the slave id
+                    break
+                idx = buf.find(FRAME_SEPARATOR, pos)
+                if idx < 0:
+                    # Envelope/trailer without a response; keep a separator split in two
+                    for tail in range(sep_len - 1, 0, -1):
+                        if buf.endswith(FRAME_SEPARATOR[:tail]):
+                            self._keep(buf[-tail:])
+                            break
+                    break
+                pos = idx + sep_len
+                continue
+            if size - pos < 3:
+                self._keep(buf[pos:])
+                break
+
+            incomplete = False
+            end = 0
+            byte_count = buf[pos + 2]
+            lengths = _LAYOUT_LENGTHS.get((buf[pos + 1], byte_count)) or (byte_count,)
+            for data_len in lengths:
+                end = pos + data_len + 5
+                if end > size:
+                    incomplete = True
+                    break
+                if crc16_modbus_func(view[pos:end]) == 0:
+                    responses.append((view[pos:end], True))
+                    pos = end
+                    break
+            else:
+                # No length verified: hand the span to the parser to count the rejection
+                if not end:
+                    idx = buf.find(FRAME_SEPARATOR, pos + 3)
+                    end = size if idx < 0 else idx
+                responses.append((view[pos:end], False))
+                pos = end
+                continue
+            if incomplete:
+                self._keep(buf[pos:])
+                break
+        return responses
+
+    def _keep(self, fragment: bytes) -> None:
+        if len(fragment) <= MAX_PENDING_FRAME_BYTES:
+            self._pending = fragment
+        elif _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Dropping oversized fragment (%s bytes)", len(fragment))
+
+
+def _is_response_start(buf: bytes, pos: int) -> bool:
+    """Whether a Modbus read response (slave 1, FC 03/04) starts at pos."""
+    return buf[pos : pos + 1] == b"\x01" and buf[pos + 1 : pos + 2] in (b"\x03", b"\x04")
+
+
+def parse_mqtt_frames(
+    payload: BytesLike,
+    state: RealtimeDecodeState | None = None,
+    extractor: FrameExtractor | None = None,
+    responses: list[tuple[int, int]] | None = None,
+) -> list[MutableMapping[str, Any]]:
+    """Parse every Modbus response carried by an MQTT payload.
+
+    Each response goes through the same classifier and decoders as
+    parse_mqtt_frame(). Pass a per-device extractor to join responses split
+    across messages; without one a trailing fragment is discarded.
 
-    except Exception as exc:
-        _LOGGER.exception(f"Parse error: {exc}")
-        return None
+    Args:
+        payload: Raw MQTT payload (bytes, bytearray or memoryview)
+        state: Optional per-device state for change-driven decoding
+        extractor: Optional per-device extractor keeping incomplete responses
+        responses: Optional list receiving (function code, byte count) of each
+            accepted response, parallel to the returned mappings
 
-    if parsed_data:
-        data_type = "Cells" if is_cell_data else "Main"
-        _LOGGER.debug("Parse OK (%s)", data_type)
-        return parsed_data
-    else:
-        _LOGGER.warning(f"No data parsed from: {resp_hex[:60] if resp_hex else 'N/A'}...")
-        return None
+    Returns:
+        Parsed mappings in arrival order (empty mappings for unchanged frames);
+        rejected responses are left out
+    """
+    if _LOGGER.isEnabledFor(logging.DEBUG):
+        _LOGGER.debug("Parsing payload: %s...", bytes(payload[:50]).hex())
 
+    if extractor is None:
+        extractor = FrameExtractor()
+    results: list[MutableMapping[str, Any]] = []
+    for resp, crc_verified in extractor.feed(payload):
+        if len(resp) < 6:
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug("Response too short: %s", bytes(resp).hex())
+            continue
+        parsed = _parse_response(resp, state, crc_verified)
+        if parsed is not None:
+            results.append(parsed)
+            if responses is not None:
+                responses.append((resp[1], resp[2]))
+    return results
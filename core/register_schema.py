@@ -0,0 +1,629 @@
+"""Declarative register schema for Lumentree real-time data.
+
+Every value reported over MQTT is described once in REALTIME_SCHEMA: where it
+lives in the Modbus register block, how it is decoded and how it is exposed as a
+sensor. The parser compiles the table into single-shot block decoders and the
+sensor platform builds its entity descriptions from the same table, so a new
+firmware register map is a data change.
+
+Entity metadata uses Home Assistant's string values ("W", "power", "measurement",
+"diagnostic") so this module, like the parser, imports without Home Assistant.
+"""
+
+import struct
+from collections.abc import Callable, Iterator, Mapping, MutableMapping, Sequence
+from dataclasses import dataclass
+from functools import cache
+from typing import Any
+
+from ..const import (
+    KEY_AC_IN_FREQ,
+    KEY_AC_IN_POWER,
+    KEY_AC_IN_VOLTAGE,
+    KEY_AC_OUT_FREQ,
+    KEY_AC_OUT_POWER,
+    KEY_AC_OUT_VA,
+    KEY_AC_OUT_VOLTAGE,
+    KEY_BATTERY_CELL_INFO,
+    KEY_BATTERY_CURRENT,
+    KEY_BATTERY_MODE,
+    KEY_BATTERY_POWER,
+    KEY_BATTERY_SOC,
+    KEY_BATTERY_STATUS,
+    KEY_BATTERY_TYPE,
+    KEY_BATTERY_VOLTAGE,
+    KEY_CTRL_VERSION,
+    KEY_DEVICE_TEMP,
+    KEY_FW_VERSION,
+    KEY_GRID_POWER,
+    KEY_GRID_STATUS,
+    KEY_GRID_VOLTAGE,
+    KEY_IS_UPS_MODE,
+    KEY_LAST_RAW_MQTT,
+    KEY_LOAD_POWER,
+    KEY_MASTER_SLAVE_STATUS,
+    KEY_MQTT_DEVICE_SN,
+    KEY_MQTT_RESPONSE_LATENCY,
+    KEY_PV1_POWER,
+    KEY_PV1_VOLTAGE,
+    KEY_PV2_POWER,
+    KEY_PV2_VOLTAGE,
+    KEY_PV_POWER,
+    KEY_SELF_CONSUMPTION_RATIO,
+    KEY_TOTAL_LOAD_POWER,
+    KEY_WORK_MODE,
+    MAP_BATTERY_MODE,
+    MAP_BATTERY_TYPE,
+    MAP_WORK_MODE,
+)
+from .write_throttle import WriteThrottle
+
+
+@dataclass(frozen=True)
+class RegisterField:
+    """One real-time value: register location, decode rule and sensor metadata.
+
+    Attributes:
+        key: Key in parsed data and in the sensor description
+        name: Sensor name, or None if the value has no realtime sensor
+        address: First register, or None for derived and entity-only values
+        width: Registers used (1 = 16-bit, 2 = 32-bit, or string length)
+        signed: Whether the raw value is two's complement
+        scale: Multiplication factor (result rounded to 3 decimals)
+        ascii: Decode the registers as an ASCII string
+        transform: Applied to the scaled value; the result is stored as-is
+        derive: Computes the value from the decoded data; None is not stored
+        depends: Keys a derived or entity-computed value is computed from (for
+            change-driven decode and read planning)
+        throttle: When the sensor writes a new value (None: on every change)
+    """
+
+    key: str
+    name: str | None = None
+    address: int | None = None
+    width: int = 1
+    signed: bool = False
+    scale: float = 1.0
+    ascii: bool = False
+    transform: Callable[[Any], Any] | None = None
+    derive: Callable[[dict[str, Any]], Any] | None = None
+    depends: tuple[str, ...] = ()
+    unit: str | None = None
+    device_class: str | None = None
+    state_class: str | None = None
+    icon: str | None = None
+    entity_category: str | None = None
+    enabled_default: bool = True
+    display_precision: int | None = None
+    throttle: WriteThrottle | None = None
+
+
+# --- Transforms (applied to the scaled register value) ---
+
+
+def _invert(value: float) -> float:
+    """Invert sign to match card convention (positive = charging)."""
+    return -value
+
+
+def _temperature(value: float) -> float | None:
+    """Convert raw temperature (0.1 °C, offset 1000); None when implausible."""
+    temp_c = round((value - 1000) / 10, 1)
+    return temp_c if -40 < temp_c < 150 else None
+
+
+def _soc(value: float) -> int:
+    return max(0, min(100, int(value)))
+
+
+def _version(value: float) -> str:
+    return f"v{int(value)}"
+
+
+def _is_zero(value: float) -> bool:
+    return value == 0
+
+
+def _battery_type(value: float) -> str:
+    return MAP_BATTERY_TYPE.get(int(value), "Present")
+
+
+def _battery_mode(value: float) -> str:
+    return MAP_BATTERY_MODE.get(int(value), "Unknown")
+
+
+def _work_mode(value: float) -> str:
+    return MAP_WORK_MODE.get(int(value), f"Unknown ({int(value)})")
+
+
+# --- Derived values (computed from decoded data, in schema order) ---
+
+
+def _pv_power(data: dict[str, Any]) -> float | None:
+    pv1 = data.get(KEY_PV1_POWER)
+    pv2 = data.get(KEY_PV2_POWER)
+    if pv1 is None and pv2 is None:
+        return None
+    return (pv1 or 0) + (pv2 or 0)
+
+
+def _battery_status(data: dict[str, Any]) -> str:
+    battery_power = data.get(KEY_BATTERY_POWER)
+    if battery_power is None:
+        return "Unknown"
+    return "Charging" if battery_power > 0 else "Discharging"
+
+
+def _grid_status(data: dict[str, Any]) -> str:
+    grid_power = data.get(KEY_GRID_POWER)
+    if grid_power is None:
+        return "Unknown"
+    return "Importing" if grid_power > 0 else "Exporting"
+
+
+def _self_consumption_ratio(data: dict[str, Any]) -> float | None:
+    pv_total = data.get(KEY_PV1_POWER, 0) or 0
+    if data.get(KEY_PV2_POWER):
+        pv_total += data[KEY_PV2_POWER]
+    grid_power = data.get(KEY_GRID_POWER)
+    if pv_total <= 0 or grid_power is None:
+        return None
+    if grid_power < 0:  # Exporting to grid
+        direct_consumption = max(pv_total + grid_power, 0)
+    else:  # Importing from grid or balanced
+        direct_consumption = pv_total
+    return round(direct_consumption / pv_total * 100, 1)
+
+
+# --- Write throttles (values that wobble without meaning anything) ---
+
+_AC_VOLTAGE_THROTTLE = WriteThrottle(deadband=1.0, max_stale=300)
+_DC_VOLTAGE_THROTTLE = WriteThrottle(deadband=0.1, max_stale=300)
+_PV_VOLTAGE_THROTTLE = WriteThrottle(deadband=2.0, max_stale=300)
+_FREQUENCY_THROTTLE = WriteThrottle(deadband=0.05, max_stale=300)
+_TEMPERATURE_THROTTLE = WriteThrottle(deadband=0.5, max_stale=300)
+_LATENCY_THROTTLE = WriteThrottle(deadband_pct=20, min_interval=60, max_stale=300)
+_RAW_FRAMES_THROTTLE = WriteThrottle(min_interval=60)
+
+
+# Schema order is the realtime sensor order. Registers 100+ are only decoded
+# when the device returns the 151-register block.
+REALTIME_SCHEMA: tuple[RegisterField, ...] = (
+    RegisterField(
+        KEY_PV_POWER, "PV Power", derive=_pv_power, depends=(KEY_PV1_POWER, KEY_PV2_POWER),
+        unit="W", device_class="power", state_class="measurement", icon="mdi:solar-power",
+    ),
+    RegisterField(
+        KEY_BATTERY_POWER, "Battery Power", address=61, signed=True, transform=_invert,
+        unit="W", device_class="power", state_class="measurement", icon="mdi:battery",
+    ),
+    RegisterField(
+        KEY_GRID_POWER, "Grid Power", address=59, signed=True,
+        unit="W", device_class="power", state_class="measurement",
+        icon="mdi:transmission-tower", display_precision=0,
+    ),
+    RegisterField(
+        KEY_LOAD_POWER, "Load Power", address=67,
+        unit="W", device_class="power", state_class="measurement", icon="mdi:power-plug",
+    ),
+    RegisterField(
+        KEY_AC_OUT_POWER, "AC Output Power", address=18,
+        unit="W", device_class="power", state_class="measurement",
+    ),
+    RegisterField(
+        KEY_TOTAL_LOAD_POWER, "Total Load Power", depends=(KEY_LOAD_POWER, KEY_AC_OUT_POWER),
+        unit="W", device_class="power", state_class="measurement", icon="mdi:power-plug-outline",
+    ),
+    RegisterField(
+        KEY_AC_IN_POWER, "AC Input Power", address=53, scale=0.01,
+        unit="W", device_class="power", state_class="measurement", display_precision=2,
+    ),
+    RegisterField(
+        KEY_PV1_POWER, "PV1 Power", address=22,
+        unit="W", device_class="power", state_class="measurement", enabled_default=False,
+    ),
+    RegisterField(
+        KEY_PV2_POWER, "PV2 Power", address=74,
+        unit="W", device_class="power", state_class="measurement", enabled_default=False,
+    ),
+    RegisterField(
+        KEY_AC_OUT_VA, "AC Output Apparent Power", address=58,
+        unit="VA", device_class="apparent_power", state_class="measurement",
+    ),
+    RegisterField(
+        KEY_BATTERY_VOLTAGE, "Battery Voltage", address=11, scale=0.01,
+        unit="V", device_class="voltage", state_class="measurement",
+        icon="mdi:battery-outline", display_precision=2, throttle=_DC_VOLTAGE_THROTTLE,
+    ),
+    RegisterField(
+        KEY_AC_OUT_VOLTAGE, "AC Output Voltage", address=13, scale=0.1,
+        unit="V", device_class="voltage", state_class="measurement", display_precision=1,
+        throttle=_AC_VOLTAGE_THROTTLE,
+    ),
+    RegisterField(
+        KEY_GRID_VOLTAGE, "Grid Voltage", address=15, scale=0.1,
+        unit="V", device_class="voltage", state_class="measurement", display_precision=1,
+        throttle=_AC_VOLTAGE_THROTTLE,
+    ),
+    RegisterField(
+        KEY_AC_IN_VOLTAGE, "AC Input Voltage", address=15, scale=0.1,
+        unit="V", device_class="voltage", state_class="measurement", display_precision=1,
+        enabled_default=False, throttle=_AC_VOLTAGE_THROTTLE,
+    ),
+    RegisterField(
+        KEY_PV1_VOLTAGE, "PV1 Voltage", address=20,
+        unit="V", device_class="voltage", state_class="measurement", enabled_default=False,
+        throttle=_PV_VOLTAGE_THROTTLE,
+    ),
+    RegisterField(
+        KEY_PV2_VOLTAGE, "PV2 Voltage", address=72,
+        unit="V", device_class="voltage", state_class="measurement", enabled_default=False,
+        throttle=_PV_VOLTAGE_THROTTLE,
+    ),
+    RegisterField(
+        KEY_BATTERY_CURRENT, "Battery Current", address=12, signed=True, scale=0.01,
+        transform=_invert, unit="A", device_class="current", state_class="measurement",
+        icon="mdi:current-dc", display_precision=2,
+    ),
+    RegisterField(
+        KEY_AC_OUT_FREQ, "AC Output Frequency", address=16, scale=0.01,
+        unit="Hz", device_class="frequency", state_class="measurement", display_precision=2,
+        throttle=_FREQUENCY_THROTTLE,
+    ),
+    RegisterField(
+        KEY_AC_IN_FREQ, "AC Input Frequency", address=17, scale=0.01,
+        unit="Hz", device_class="frequency", state_class="measurement", display_precision=2,
+        throttle=_FREQUENCY_THROTTLE,
+    ),
+    RegisterField(
+        KEY_BATTERY_SOC, "Battery SOC", address=50, transform=_soc,
+        unit="%", device_class="battery", state_class="measurement",
+    ),
+    RegisterField(
+        KEY_BATTERY_STATUS, "Battery Status", derive=_battery_status, depends=(KEY_BATTERY_POWER,),
+        device_class="enum", icon="mdi:battery-sync-outline",
+    ),
+    RegisterField(
+        KEY_BATTERY_TYPE, "Battery Type", address=37, transform=_battery_type,
+        device_class="enum", icon="mdi:battery-unknown", entity_category="diagnostic",
+    ),
+    RegisterField(
+        KEY_GRID_STATUS, "Grid Status", derive=_grid_status, depends=(KEY_GRID_POWER,),
+        device_class="enum", icon="mdi:transmission-tower-export",
+    ),
+    RegisterField(
+        KEY_DEVICE_TEMP, "Device Temperature", address=24, signed=True, transform=_temperature,
+        unit="°C", device_class="temperature", state_class="measurement", display_precision=1,
+        throttle=_TEMPERATURE_THROTTLE,
+    ),
+    RegisterField(
+        KEY_MASTER_SLAVE_STATUS, "Master/Slave Status", address=70,
+        icon="mdi:account-multiple", entity_category="diagnostic",
+    ),
+    RegisterField(
+        KEY_MQTT_DEVICE_SN, "Device SN (MQTT)", address=3, width=5, ascii=True,
+        icon="mdi:barcode-scan", entity_category="diagnostic", enabled_default=False,
+    ),
+    RegisterField(
+        KEY_BATTERY_CELL_INFO, "Battery Cell Info",
+        icon="mdi:battery-heart-variant", entity_category="diagnostic",
+    ),
+    RegisterField(
+        # Frame counter; the frames themselves are in diagnostics (dump_raw_frames service)
+        KEY_LAST_RAW_MQTT, "Raw MQTT Frames", state_class="total_increasing",
+        icon="mdi:text-hexadecimal", entity_category="diagnostic", enabled_default=False,
+        display_precision=0, throttle=_RAW_FRAMES_THROTTLE,
+    ),
+    RegisterField(
+        KEY_MQTT_RESPONSE_LATENCY, "MQTT Response Latency",
+        unit="ms", device_class="duration", state_class="measurement", icon="mdi:timer-sand",
+        entity_category="diagnostic", display_precision=0, throttle=_LATENCY_THROTTLE,
+    ),
+    RegisterField(
+        KEY_SELF_CONSUMPTION_RATIO, "Self-Consumption Ratio", derive=_self_consumption_ratio,
+        depends=(KEY_PV1_POWER, KEY_PV2_POWER, KEY_GRID_POWER),
+        unit="%", state_class="measurement", icon="mdi:solar-power-variant", display_precision=1,
+    ),
+    RegisterField(
+        KEY_WORK_MODE, "Work Mode", address=150, transform=_work_mode,
+        device_class="enum", icon="mdi:cog-transfer-outline", entity_category="diagnostic",
+    ),
+    RegisterField(
+        KEY_BATTERY_MODE, "Battery Mode", address=100, transform=_battery_mode,
+        device_class="enum", icon="mdi:battery-settings-variant", entity_category="diagnostic",
+    ),
+    RegisterField(
+        KEY_FW_VERSION, "Firmware Version", address=2, transform=_version,
+        icon="mdi:information-outline", entity_category="diagnostic",
+    ),
+    RegisterField(
+        KEY_CTRL_VERSION, "Controller Version", address=8, transform=_version,
+        icon="mdi:information-outline", entity_category="diagnostic",
+    ),
+    # Exposed by the binary_sensor platform, not as a realtime sensor
+    RegisterField(KEY_IS_UPS_MODE, address=68, transform=_is_zero),
+)
+
+
+def _struct_code(field: RegisterField) -> str:
+    if field.ascii:
+        return f"{field.width * 2}s"
+    if field.width == 1:
+        return "h" if field.signed else "H"
+    if field.width == 2:
+        return "i" if field.signed else "I"
+    raise ValueError(f"Unsupported register width {field.width} for {field.key}")
+
+
+# Marker for "not decoded yet" and "decoded but absent" slots of a RealtimeRecord
+_UNSET = object()
+_ABSENT = object()
+
+
+class BlockDecoder:
+    """Decoder for one register block size, compiled from a schema.
+
+    All registers the schema needs are unpacked by a single struct.Struct call
+    (gaps are skipped with pad bytes); fields sharing a register reuse the same
+    raw value. Derived values are computed afterwards in schema order.
+
+    record() wraps an unpacked block in a lazy RealtimeRecord; decode_delta()
+    supports change-driven decoding against the previous raw tuple.
+    """
+
+    __slots__ = ("num_registers", "keys", "key_index", "_struct", "_steps", "_derived")
+
+    def __init__(self, num_registers: int, schema: tuple[RegisterField, ...]) -> None:
+        """Compile the schema for a block of num_registers registers."""
+        self.num_registers = num_registers
+        fields = [
+            f for f in schema if f.address is not None and f.address + f.width <= num_registers
+        ]
+
+        # One struct slot per distinct register span
+        spans = sorted({(f.address, f.width, _struct_code(f)) for f in fields})
+        fmt = [">"]
+        pos = 0
+        slot_index: dict[tuple[int, int, str], int] = {}
+        for addr, width, code in spans:
+            if addr < pos:
+                raise ValueError(f"Overlapping register fields at {addr}")
+            if addr > pos:
+                fmt.append(f"{(addr - pos) * 2}x")
+            fmt.append(code)
+            slot_index[(addr, width, code)] = len(slot_index)
+            pos = addr + width
+        self._struct = struct.Struct("".join(fmt))
+
+        # (key, struct slot, scale, ascii, transform) in schema order
+        self._steps = tuple(
+            (f.key, slot_index[(f.address, f.width, _struct_code(f))], f.scale, f.ascii, f.transform)
+            for f in fields
+        )
+        self._derived: tuple[tuple[str, Callable[[dict[str, Any]], Any], frozenset], ...] = tuple(
+            (f.key, f.derive, frozenset(f.depends)) for f in schema if f.derive is not None
+        )
+
+        # Fixed key index shared by every record of this layout
+        self.keys: tuple[str, ...] = tuple(step[0] for step in self._steps) + tuple(
+            key for key, _derive, _depends in self._derived
+        )
+        self.key_index: dict[str, int] = {key: i for i, key in enumerate(self.keys)}
+
+    @staticmethod
+    def _decode_step(step: tuple[Any, ...], raw: tuple[Any, ...]) -> Any:
+        """Decode one register field; _ABSENT for an empty string."""
+        _key, index, scale, is_ascii, transform = step
+        value = raw[index]
+        if is_ascii:
+            value = str(value, "ascii", "ignore").replace("\x00", "").strip()
+            return value if value else _ABSENT
+        value = round(value * scale, 3)
+        return value if transform is None else transform(value)
+
+    def decode_field(self, index: int, raw: tuple[Any, ...], data: Mapping[str, Any]) -> Any:
+        """Decode the value at key index; derived values read their inputs from data."""
+        if index < len(self._steps):
+            return self._decode_step(self._steps[index], raw)
+        value = self._derived[index - len(self._steps)][1](data)
+        return _ABSENT if value is None else value
+
+    def unpack(self, db) -> tuple[Any, ...]:
+        """Unpack the raw register values the schema needs (one struct call)."""
+        return self._struct.unpack_from(db)
+
+    def record(self, raw: tuple[Any, ...]) -> "RealtimeRecord":
+        """Wrap a tuple from unpack() in a record that decodes fields on access."""
+        return RealtimeRecord(self, raw)
+
+    def decode(self, db) -> dict[str, Any]:
+        """Decode a register block (bytes-like, at least num_registers * 2 bytes).
+
+        Returns:
+            Parsed data keyed like the schema
+        """
+        return self.decode_raw(self._struct.unpack_from(db))
+
+    def decode_raw(self, raw: tuple[Any, ...]) -> dict[str, Any]:
+        """Eagerly decode every value from a tuple returned by unpack()."""
+        out: dict[str, Any] = {}
+        for step in self._steps:
+            value = self._decode_step(step, raw)
+            if value is not _ABSENT:
+                out[step[0]] = value
+        for key, derive, _depends in self._derived:
+            value = derive(out)
+            if value is not None:
+                out[key] = value
+        return out
+
+    def decode_columns(self, raws: Sequence[tuple[Any, ...]]) -> dict[str, list[Any]]:
+        """Decode many tuples from unpack() column by column (batch replay).
+
+        Each register field is decoded over the whole column in one list
+        comprehension; derived values are computed per row from their depends.
+
+        Returns:
+            One list per key in self.keys, None where decode_raw() has no value
+        """
+        if not raws:
+            return {key: [] for key in self.keys}
+        columns: dict[str, list[Any]] = {}
+        slots = list(zip(*raws, strict=True))
+        for key, index, scale, is_ascii, transform in self._steps:
+            column = slots[index]
+            if is_ascii:
+                columns[key] = [
+                    str(value, "ascii", "ignore").replace("\x00", "").strip() or None
+                    for value in column
+                ]
+            elif transform is None:
+                columns[key] = [round(value * scale, 3) for value in column]
+            else:
+                columns[key] = [transform(round(value * scale, 3)) for value in column]
+
+        if self._derived:
+            inputs = set().union(*(depends for _key, _derive, depends in self._derived))
+            present = [key for key in inputs if key in columns]
+            rows = [
+                dict(zip(present, values, strict=True))
+                for values in zip(*(columns[k] for k in present), strict=True)
+            ]
+            if not rows:
+                rows = [{} for _ in raws]  # No inputs in this block size
+            for key, derive, _depends in self._derived:
+                columns[key] = values = [derive(row) for row in rows]
+                if key in inputs:
+                    for row, value in zip(rows, values, strict=True):
+                        if value is not None:
+                            row[key] = value
+        return columns
+
+    def decode_delta(
+        self, raw: tuple[Any, ...], previous: tuple[Any, ...], values: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Decode only the fields whose raw registers differ from previous.
+
+        Args:
+            raw: Current tuple from unpack()
+            previous: Tuple from unpack() for the previous block of this layout
+            values: Last known decoded values of the device, updated in place
+
+        Returns:
+            Changed keys only (derived values are emitted when they change)
+        """
+        out: dict[str, Any] = {}
+        for step in self._steps:
+            index = step[1]
+            if raw[index] == previous[index]:
+                continue
+            value = self._decode_step(step, raw)
+            if value is _ABSENT:
+                values.pop(step[0], None)
+                continue
+            out[step[0]] = value
+        if not out:
+            return out
+
+        values.update(out)
+        for key, derive, depends in self._derived:
+            if depends.isdisjoint(out):
+                continue
+            value = derive(values)
+            if value is None:
+                values.pop(key, None)
+            elif values.get(key) != value:
+                values[key] = out[key] = value
+        return out
+
+
+class RealtimeRecord(MutableMapping):
+    """Realtime values of one register block, decoded field by field on first access.
+
+    Holds the unpacked raw tuple and a fixed-size value list indexed by the
+    decoder's key index, so a frame costs one list instead of a ~40-key dict and
+    only the keys that consumers actually read are decoded. Keys outside the
+    schema (online status, raw payload) are kept in a small side dict.
+    """
+
+    __slots__ = ("_decoder", "_raw", "_values", "_extra")
+
+    def __init__(self, decoder: BlockDecoder, raw: tuple[Any, ...]) -> None:
+        """Initialize the record with nothing decoded yet."""
+        self._decoder = decoder
+        self._raw = raw
+        self._values = [_UNSET] * len(decoder.keys)
+        self._extra: dict[str, Any] | None = None
+
+    def _lookup(self, key: str) -> Any:
+        index = self._decoder.key_index.get(key)
+        if index is None:
+            if self._extra is None:
+                return _ABSENT
+            return self._extra.get(key, _ABSENT)
+        value = self._values[index]
+        if value is _UNSET:
+            # Pure function of the raw tuple: a concurrent reader stores the same value
+            value = self._values[index] = self._decoder.decode_field(index, self._raw, self)
+        return value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._lookup(key)
+        if value is _ABSENT:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._lookup(key) is not _ABSENT
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        index = self._decoder.key_index.get(key)
+        if index is not None:
+            self._values[index] = value
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        index = self._decoder.key_index.get(key)
+        if index is not None:
+            self._values[index] = _ABSENT
+        else:
+            del self._extra[key]
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self._decoder.keys:
+            if self._lookup(key) is not _ABSENT:
+                yield key
+        if self._extra:
+            yield from list(self._extra)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __bool__(self) -> bool:
+        # Avoid __len__ (which decodes everything); a decoded block is never empty
+        return bool(self._decoder.keys) or bool(self._extra)
+
+    def __repr__(self) -> str:
+        return f"RealtimeRecord({dict(self)!r})"
+
+    def schema_values(self) -> dict[str, Any]:
+        """Decode and return all schema values (without side-dict keys)."""
+        values = {}
+        for key in self._decoder.keys:
+            value = self._lookup(key)
+            if value is not _ABSENT:
+                values[key] = value
+        return values
+
+
+@cache
+def get_block_decoder(
+    num_registers: int, schema: tuple[RegisterField, ...] = REALTIME_SCHEMA
+) -> BlockDecoder:
+    """Return the (cached) decoder for a block size and register schema."""
+    return BlockDecoder(num_registers, schema)
@@ -0,0 +1,146 @@
+"""Matching of Modbus read responses to the MQTT requests that asked for them.
+
+The device answers each read command with one response carrying the function
+code and byte count (mod 256) of the request, but no address. A request is
+therefore keyed by (function code, byte count); a response of an unusual
+length for a known function code (see the *_near frame layouts) answers the
+oldest request with that function code. Round-trip times go into a fixed
+bucket histogram for diagnostics.
+"""
+
+import logging
+import time
+from bisect import bisect_left
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+# Upper bounds of the latency buckets (ms); slower responses land in the last bucket
+LATENCY_BUCKETS_MS: tuple[int, ...] = (50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of round-trip times in milliseconds."""
+
+    __slots__ = ("counts", "count", "total_ms", "max_ms", "last_ms")
+
+    def __init__(self) -> None:
+        """Initialize an empty histogram."""
+        self.counts: list[int] = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms: float | None = None
+
+    def record(self, latency_ms: float) -> None:
+        """Add one round trip."""
+        self.counts[bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+        self.count += 1
+        self.total_ms += latency_ms
+        if latency_ms > self.max_ms:
+            self.max_ms = latency_ms
+        self.last_ms = latency_ms
+
+    def percentile(self, fraction: float) -> int | None:
+        """Upper bound of the bucket holding the given fraction (None if empty or overflow)."""
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        # counts has one more entry than the bounds: the overflow bucket
+        for bound, bucket in zip(LATENCY_BUCKETS_MS, self.counts, strict=False):
+            seen += bucket
+            if seen >= target:
+                return bound
+        return None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Summary for diagnostics."""
+        buckets = {
+            f"le_{bound}ms": n
+            for bound, n in zip(LATENCY_BUCKETS_MS, self.counts, strict=False)
+        }
+        buckets[f"gt_{LATENCY_BUCKETS_MS[-1]}ms"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "last_ms": None if self.last_ms is None else round(self.last_ms, 1),
+            "mean_ms": round(self.total_ms / self.count, 1) if self.count else None,
+            "max_ms": round(self.max_ms, 1),
+            "p50_le_ms": self.percentile(0.5),
+            "p95_le_ms": self.percentile(0.95),
+            "buckets": buckets,
+        }
+
+
+class RequestTracker:
+    """Outstanding read requests of one device and their round-trip times.
+
+    Used on the event loop only. Times are time.monotonic() seconds.
+    """
+
+    __slots__ = ("_outstanding", "histogram", "timeouts", "unmatched")
+
+    def __init__(self) -> None:
+        """Initialize with no outstanding request."""
+        # (function code, byte count & 0xFF) -> send time, in send order
+        self._outstanding: dict[tuple[int, int], float] = {}
+        self.histogram = LatencyHistogram()
+        self.timeouts = 0
+        self.unmatched = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of requests still waiting for a response."""
+        return len(self._outstanding)
+
+    def sent(self, func_code: int, num_registers: int, now: float | None = None) -> None:
+        """Record a read request as sent (a repeated request restarts its clock)."""
+        key = (func_code, (num_registers * 2) & 0xFF)
+        self._outstanding.pop(key, None)
+        self._outstanding[key] = time.monotonic() if now is None else now
+
+    def response(
+        self, func_code: int, byte_count: int, now: float | None = None
+    ) -> float | None:
+        """Match a response to its request and record the round trip.
+
+        Args:
+            func_code: Function code of the response
+            byte_count: Byte count field of the response
+            now: Receive time (default: now)
+
+        Returns:
+            Round-trip time in ms, or None if no request was waiting for it
+        """
+        sent_at = self._outstanding.pop((func_code, byte_count), None)
+        if sent_at is None:
+            key = next((k for k in self._outstanding if k[0] == func_code), None)
+            if key is not None:
+                sent_at = self._outstanding.pop(key)
+        if sent_at is None:
+            self.unmatched += 1
+            return None
+        latency_ms = ((time.monotonic() if now is None else now) - sent_at) * 1000
+        self.histogram.record(latency_ms)
+        return latency_ms
+
+    def expire(self) -> int:
+        """Give up on every outstanding request; returns how many timed out."""
+        expired = len(self._outstanding)
+        if expired:
+            self.timeouts += expired
+            self._outstanding.clear()
+        return expired
+
+    def clear(self) -> None:
+        """Forget outstanding requests that cannot be answered (publish failed, disconnect)."""
+        self._outstanding.clear()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Summary for diagnostics."""
+        return {
+            "pending": self.pending,
+            "timeouts": self.timeouts,
+            "unmatched_responses": self.unmatched,
+            "latency": self.histogram.as_dict(),
+        }
@@ -0,0 +1,244 @@
+"""Two-tier cache of HTTP API responses, with lifetimes derived from the period asked for.
+
+Statistics of a period that is over do not change any more: getYearData for
+a past year, getMonthData for a closed month and the day endpoints for a
+past date return the same response every time. The coordinators and the
+backfill services still ask for them again and again (the yearly
+coordinator every 5 minutes). ResponseCache decides per request how long a
+response stays valid:
+
+- the period ended before yesterday: forever (PERMANENT)
+- the period includes today or yesterday: RECENT_TTL seconds, since the
+  server still adds late uploads
+- the period has not started, or the endpoint is not a statistics one:
+  not cached
+
+Responses are kept in an in-memory LRU. Permanent ones can also be written
+to disk (one JSON file per request under a per-device directory), so they
+survive restarts. Disk I/O runs in the default executor; everything else
+runs on the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import hashlib
+import json
+import logging
+import math
+import os
+import shutil
+import tempfile
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+from ..const import (
+    URL_GET_BAT_DAY_DATA,
+    URL_GET_MONTH_DATA,
+    URL_GET_OTHER_DAY_DATA,
+    URL_GET_PV_DAY_DATA,
+    URL_GET_YEAR_DATA,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+PERMANENT = math.inf  # Lifetime of responses for periods that are over
+RECENT_TTL = 60.0  # Seconds a response covering today or yesterday stays valid
+MEMORY_MAX_ENTRIES = 128  # Responses kept in memory (a day response is a few 10 KB)
+HTTP_CACHE_DIR = os.path.join(".storage", "lumentree_http")  # Disk tier, under the config dir
+
+_DAY_ENDPOINTS = frozenset((URL_GET_PV_DAY_DATA, URL_GET_BAT_DAY_DATA, URL_GET_OTHER_DAY_DATA))
+
+CacheKey = tuple[Any, ...]  # See LumentreeHttpApiClient._flight_key
+
+
+def _period(endpoint: str, params: dict[str, Any]) -> tuple[dt.date, dt.date] | None:
+    """First and last day of the period a statistics request asks for (None: not one)."""
+    try:
+        if endpoint in _DAY_ENDPOINTS:
+            day = dt.date.fromisoformat(str(params["queryDate"]))
+            return day, day
+        year = int(params["year"])
+        if endpoint == URL_GET_MONTH_DATA:
+            month = int(params["month"])
+            first = dt.date(year, month, 1)
+            following = dt.date(year + month // 12, month % 12 + 1, 1)
+            return first, following - dt.timedelta(days=1)
+        if endpoint == URL_GET_YEAR_DATA:
+            return dt.date(year, 1, 1), dt.date(year, 12, 31)
+    except (KeyError, TypeError, ValueError):
+        pass
+    return None
+
+
+def response_lifetime(
+    endpoint: str, params: dict[str, Any] | None, today: dt.date | None = None
+) -> float | None:
+    """How long the response of a GET request may be reused.
+
+    Args:
+        endpoint: API endpoint path
+        params: Query parameters
+        today: Current date in the time zone of the statistics (default: the
+            host's date.today(), which may differ around midnight)
+
+    Returns:
+        Seconds (PERMANENT for periods that are over), or None if not cacheable
+    """
+    period = _period(endpoint, params or {})
+    if period is None:
+        return None
+    first, last = period
+    today = today or dt.date.today()
+    if first > today:
+        return None
+    if last < today - dt.timedelta(days=1):
+        return PERMANENT
+    return RECENT_TTL
+
+
+def _safe_name(value: Any) -> str:
+    """Directory name for a device id."""
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in str(value)) or "_"
+
+
+class ResponseCache:
+    """In-memory LRU of API responses with an optional disk tier for permanent ones."""
+
+    __slots__ = (
+        "_memory",
+        "_max_entries",
+        "_disk_dir",
+        "_clock",
+        "today",
+        "hits_memory",
+        "hits_disk",
+        "misses",
+        "stored",
+    )
+
+    def __init__(
+        self,
+        disk_dir: str | None = None,
+        max_entries: int = MEMORY_MAX_ENTRIES,
+        clock: Callable[[], float] = time.monotonic,
+        today: Callable[[], dt.date] = dt.date.today,
+    ) -> None:
+        """Initialize an empty cache.
+
+        Args:
+            disk_dir: Directory of the disk tier (None: memory only)
+            max_entries: Responses kept in memory
+            clock: Monotonic clock for expiry
+            today: Current date where the inverter reports, deciding which periods
+                are over (Home Assistant passes the configured time zone's date)
+        """
+        self._memory: OrderedDict[CacheKey, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._max_entries = max(1, max_entries)
+        self._disk_dir = disk_dir
+        self._clock = clock
+        self.today = today
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self.stored = 0
+
+    def get(self, key: CacheKey) -> dict[str, Any] | None:
+        """Valid response from memory, or None."""
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        expires, response = entry
+        if expires <= self._clock():
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        self.hits_memory += 1
+        return response
+
+    def put(self, key: CacheKey, response: dict[str, Any], lifetime: float) -> None:
+        """Keep a response in memory for lifetime seconds, evicting the least recent."""
+        self._memory[key] = (self._clock() + lifetime, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_entries:
+            self._memory.popitem(last=False)
+
+    async def async_load(self, key: CacheKey) -> dict[str, Any] | None:
+        """Permanent response from disk (kept in memory from then on), or None."""
+        if self._disk_dir is None:
+            return None
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(None, self._read, key)
+        if response is None:
+            return None
+        self.hits_disk += 1
+        self.put(key, response, PERMANENT)
+        return response
+
+    async def async_store(self, key: CacheKey, response: dict[str, Any], lifetime: float) -> None:
+        """Keep a fetched response; permanent ones are also written to disk."""
+        self.put(key, response, lifetime)
+        self.stored += 1
+        if lifetime == PERMANENT and self._disk_dir is not None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._write, key, response)
+
+    async def async_purge_device(self, device_id: str) -> None:
+        """Drop every response of a device, in memory and on disk."""
+        for key in [k for k in self._memory if ("deviceId", device_id) in k[1]]:
+            del self._memory[key]
+        if self._disk_dir is not None:
+            path = os.path.join(self._disk_dir, _safe_name(device_id))
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, shutil.rmtree, path, True)
+
+    def _path(self, key: CacheKey) -> str:
+        params = dict(key[1])
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        device = _safe_name(params.get("deviceId", "_"))
+        return os.path.join(self._disk_dir, device, f"{digest}.json")
+
+    def _read(self, key: CacheKey) -> dict[str, Any] | None:
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            _LOGGER.warning("Ignoring unreadable HTTP cache file %s", path)
+            return None
+        if not isinstance(stored, dict) or stored.get("key") != repr(key):
+            return None
+        return stored.get("response")
+
+    def _write(self, key: CacheKey, response: dict[str, Any]) -> None:
+        path = self._path(key)
+        dir_path = os.path.dirname(path)
+        try:
+            os.makedirs(dir_path, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=dir_path, suffix=".json.tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump({"key": repr(key), "response": response}, f, ensure_ascii=False)
+                os.replace(tmp_path, path)
+            except Exception:
+                os.remove(tmp_path)
+                raise
+        except (OSError, TypeError, ValueError):
+            _LOGGER.warning("Failed to write HTTP cache file %s", path, exc_info=True)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Summary for diagnostics."""
+        return {
+            "entries": len(self._memory),
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "stored": self.stored,
+            "disk": self._disk_dir is not None,
+        }
+
@@ -0,0 +1,107 @@
+"""Significant-change rules for realtime sensor state writes.
+
+Every state write becomes a state-machine event and a recorder row. A grid
+voltage wobbling between 229.9 and 230.0 V would write on every poll, so
+realtime sensors can declare a WriteThrottle in the register schema: a new
+value is only written when it moves by more than an absolute or relative
+deadband, no more often than min_interval, and at least every max_stale
+seconds while it keeps moving inside the deadband. Entry options can
+override the rule per key (CONF_WRITE_THROTTLE).
+
+Like the register schema, this module imports without Home Assistant.
+"""
+
+import logging
+from collections.abc import Mapping
+from dataclasses import dataclass, fields, replace
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+# Decisions of WriteThrottle.decide()
+WRITE = "write"
+HOLD = "hold"  # Significant, but written later (min_interval not elapsed)
+SKIP = "skip"
+
+
+@dataclass(frozen=True)
+class WriteThrottle:
+    """When a realtime sensor writes a new value to the state machine.
+
+    Attributes:
+        deadband: Changes of at most this much (sensor unit) are not significant
+        deadband_pct: Changes of at most this percentage of the written value are not
+            significant
+        min_interval: Seconds between two writes at least; later changes are held
+        max_stale: Write a changed value inside the deadband once the written one is
+            this many seconds old (None: never)
+    """
+
+    deadband: float = 0.0
+    deadband_pct: float = 0.0
+    min_interval: float = 0.0
+    max_stale: float | None = None
+
+    def significant(self, written: Any, value: Any) -> bool:
+        """Whether value differs enough from the written value to be written."""
+        if value == written:
+            return False
+        if not isinstance(value, (int, float)) or not isinstance(written, (int, float)):
+            return True  # Text, None or first value: any change counts
+        delta = abs(value - written)
+        if delta <= self.deadband:
+            return False
+        return not (self.deadband_pct and delta <= abs(written) * self.deadband_pct / 100)
+
+    def decide(self, written: Any, value: Any, since_write: float) -> str:
+        """Decide what to do with a new value.
+
+        Args:
+            written: Value last written to the state machine
+            value: New value
+            since_write: Seconds since the last write
+
+        Returns:
+            WRITE, HOLD (write once min_interval has passed) or SKIP
+        """
+        if self.significant(written, value):
+            return WRITE if since_write >= self.min_interval else HOLD
+        if value != written and self.max_stale is not None and since_write >= self.max_stale:
+            return WRITE
+        return SKIP
+
+
+_THROTTLE_FIELDS = frozenset(f.name for f in fields(WriteThrottle))
+
+
+def resolve_throttle(
+    key: str, default: WriteThrottle | None, overrides: Mapping[str, Any] | None
+) -> WriteThrottle | None:
+    """Apply the entry option overrides of one key to its schema rule.
+
+    Args:
+        key: Realtime key
+        default: Rule from the register schema (None: write on every change)
+        overrides: CONF_WRITE_THROTTLE option, {key: {field: value}}; an empty
+            mapping for a key turns its rule off
+
+    Returns:
+        Rule to apply, or None to write on every change
+    """
+    if not overrides or key not in overrides:
+        return default
+    override = overrides[key]
+    if not override:
+        return None
+    try:
+        values = {
+            name: float(value) if value is not None else (None if name == "max_stale" else 0.0)
+            for name, value in override.items()
+            if name in _THROTTLE_FIELDS
+        }
+    except (AttributeError, TypeError, ValueError):
+        _LOGGER.warning("Ignoring invalid write throttle option for %s: %s", key, override)
+        return default
+    if len(values) != len(override):
+        _LOGGER.warning("Unknown write throttle fields for %s: %s", key, override)
+    return replace(default or WriteThrottle(), **values)
@@ -2,13 +2,15 @@
 
 from __future__ import annotations
 
+import time
 from typing import Any
 
 from homeassistant.components.diagnostics import async_redact_data
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 
-from .const import DOMAIN, CONF_HTTP_TOKEN, CONF_DEVICE_SN, CONF_DEVICE_ID
+from .const import DOMAIN, CONF_HTTP_TOKEN, CONF_DEVICE_SN, CONF_DEVICE_ID, DATA_KEY_DISPATCHERS
+from .core.api_client import LumentreeHttpApiClient
 from .core.mqtt_client import LumentreeMqttClient
 
 TO_REDACT = {CONF_HTTP_TOKEN, "token", "password", "secret"}
@@ -44,17 +46,32 @@ async def async_get_config_entry_diagnostics(
     # MQTT client status
     mqtt_client = entry_data.get("mqtt_client")
     if isinstance(mqtt_client, LumentreeMqttClient):
+        hub = mqtt_client.hub
         diagnostics_data["mqtt"] = {
             "connected": mqtt_client.is_connected,
-            "client_id": mqtt_client._client_id if hasattr(mqtt_client, "_client_id") else None,
+            "transport": hub.transport if hub else None,
+            "client_id": hub.client_id if hub else None,
             "topic_sub": mqtt_client._topic_sub if hasattr(mqtt_client, "_topic_sub") else None,
             "topic_pub": mqtt_client._topic_pub if hasattr(mqtt_client, "_topic_pub") else None,
-            "reconnect_attempts": getattr(mqtt_client, "_reconnect_attempts", 0),
-            "stopping": getattr(mqtt_client, "_stopping", False),
+            "reconnect_attempts": hub.reconnect_attempts if hub else 0,
+            "shared_devices": hub.device_count if hub else 0,
+            "frame_layouts": mqtt_client.frame_layout_counts,
+            "poll_interval": mqtt_client.poll_scheduler.interval,
+            "poll_plan": mqtt_client.poll_plan.as_dict(time.monotonic()),
+            "requests": mqtt_client.request_stats,
+            "mailbox": mqtt_client.mailbox_stats,
+            "raw_frames": mqtt_client.raw_frames.as_dict(),
         }
+        dispatcher = hass.data.get(DATA_KEY_DISPATCHERS, {}).get(device_sn)
+        if dispatcher is not None:
+            diagnostics_data["mqtt"]["dispatch"] = dispatcher.as_dict()
     else:
         diagnostics_data["mqtt"] = {"status": "not_initialized"}
     
+    api_client = entry_data.get("api_client")
+    if isinstance(api_client, LumentreeHttpApiClient):
+        diagnostics_data["http"] = api_client.request_stats
+
     # Device API info (redact sensitive data)
     device_api_info = entry_data.get("device_api_info", {})
     if device_api_info:
@@ -84,6 +101,7 @@ async def async_get_config_entry_diagnostics(
         diagnostics_data["aggregator"] = {
             "status": "initialized",
             "device_id": getattr(aggregator, "device_id", None),
+            "backfill_window": aggregator.backfill_window.as_dict(),
         }
     else:
         diagnostics_data["aggregator"] = {"status": "not_available"}
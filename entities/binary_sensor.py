@@ -10,17 +10,16 @@ from homeassistant.components.binary_sensor import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import DeviceInfo, generate_entity_id
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.util import slugify
 
 from ..common import build_device_info
+from ..core.key_dispatcher import async_key_dispatcher_connect
 from ..const import (
     DOMAIN,
     CONF_DEVICE_SN,
     CONF_DEVICE_NAME,
-    SIGNAL_UPDATE_FORMAT,
     KEY_ONLINE_STATUS,
     KEY_IS_UPS_MODE,
 )
@@ -137,8 +136,9 @@ class LumentreeBinarySensor(BinarySensorEntity):
 
     async def async_added_to_hass(self) -> None:
         """Register dispatcher connection."""
-        signal = SIGNAL_UPDATE_FORMAT.format(device_sn=self._device_sn)
-        self._remove_dispatcher = async_dispatcher_connect(self.hass, signal, self._handle_update)
+        self._remove_dispatcher = async_key_dispatcher_connect(
+            self.hass, self._device_sn, (self.entity_description.key,), self._handle_update
+        )
         if _LOGGER.isEnabledFor(logging.DEBUG):
             _LOGGER.debug("Binary sensor %s registered", self.unique_id)
 
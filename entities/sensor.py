@@ -3,6 +3,7 @@
 from typing import Any, Dict, Optional, Callable
 import logging
 import re
+import time
 
 from homeassistant.components.sensor import (
     SensorEntity,
@@ -12,62 +13,33 @@ from homeassistant.components.sensor import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
-    UnitOfPower,
     UnitOfEnergy,
     PERCENTAGE,
-    UnitOfTemperature,
-    UnitOfElectricPotential,
-    UnitOfFrequency,
-    UnitOfElectricCurrent,
-    UnitOfApparentPower,
     EntityCategory,
 )
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import DeviceInfo, generate_entity_id
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.util import slugify
 from homeassistant.util import dt as dt_util
 
 from ..common import build_device_info
+from ..core.key_dispatcher import async_key_dispatcher_connect
+from ..core.realtime_parser import BatteryCellInfo
+from ..core.register_schema import REALTIME_SCHEMA, RegisterField
+from ..core.write_throttle import HOLD, WRITE, WriteThrottle, resolve_throttle
 from ..const import (
     DOMAIN,
     CONF_DEVICE_SN,
     CONF_DEVICE_NAME,
-    SIGNAL_UPDATE_FORMAT,
-    KEY_PV_POWER,
-    KEY_BATTERY_POWER,
-    KEY_BATTERY_SOC,
-    KEY_GRID_POWER,
+    CONF_WRITE_THROTTLE,
     KEY_LOAD_POWER,
-    KEY_BATTERY_VOLTAGE,
-    KEY_BATTERY_CURRENT,
-    KEY_AC_OUT_VOLTAGE,
-    KEY_GRID_VOLTAGE,
-    KEY_AC_OUT_FREQ,
     KEY_AC_OUT_POWER,
-    KEY_AC_OUT_VA,
-    KEY_DEVICE_TEMP,
-    KEY_PV1_VOLTAGE,
-    KEY_PV1_POWER,
-    KEY_PV2_VOLTAGE,
-    KEY_PV2_POWER,
-    KEY_BATTERY_STATUS,
-    KEY_GRID_STATUS,
-    KEY_AC_IN_VOLTAGE,
-    KEY_AC_IN_FREQ,
-    KEY_AC_IN_POWER,
-    KEY_BATTERY_TYPE,
     KEY_MASTER_SLAVE_STATUS,
-    KEY_MQTT_DEVICE_SN,
     KEY_BATTERY_CELL_INFO,
-    KEY_SELF_CONSUMPTION_RATIO,
-    KEY_WORK_MODE,
-    KEY_BATTERY_MODE,
-    KEY_FW_VERSION,
-    KEY_CTRL_VERSION,
     KEY_DAILY_PV_KWH,
     KEY_DAILY_CHARGE_KWH,
     KEY_DAILY_DISCHARGE_KWH,
@@ -76,7 +48,6 @@ from ..const import (
     KEY_DAILY_ESSENTIAL_KWH,
     KEY_DAILY_TOTAL_LOAD_KWH,
     KEY_TOTAL_LOAD_POWER,
-    KEY_LAST_RAW_MQTT,
     KEY_MONTHLY_PV_KWH,
     KEY_MONTHLY_GRID_IN_KWH,
     KEY_MONTHLY_LOAD_KWH,
@@ -106,261 +77,30 @@ from ..coordinators.total_coordinator import TotalStatsCoordinator
 
 _LOGGER = logging.getLogger(__name__)
 
-# Sensor Descriptions (MQTT Realtime)
-REALTIME_SENSOR_DESCRIPTIONS: tuple[SensorEntityDescription, ...] = (
-    SensorEntityDescription(
-        key=KEY_PV_POWER,
-        name="PV Power",
-        native_unit_of_measurement=UnitOfPower.WATT,
-        device_class=SensorDeviceClass.POWER,
-        state_class=SensorStateClass.MEASUREMENT,
-        icon="mdi:solar-power",
-    ),
-    SensorEntityDescription(
-        key=KEY_BATTERY_POWER,
-        name="Battery Power",
-        native_unit_of_measurement=UnitOfPower.WATT,
-        device_class=SensorDeviceClass.POWER,
-        state_class=SensorStateClass.MEASUREMENT,
-        icon="mdi:battery",
-    ),
-    SensorEntityDescription(
-        key=KEY_GRID_POWER,
-        name="Grid Power",
-        native_unit_of_measurement=UnitOfPower.WATT,
-        device_class=SensorDeviceClass.POWER,
-        state_class=SensorStateClass.MEASUREMENT,
-        icon="mdi:transmission-tower",
-        suggested_display_precision=0,
-    ),
-    SensorEntityDescription(
-        key=KEY_LOAD_POWER,
-        name="Load Power",
-        native_unit_of_measurement=UnitOfPower.WATT,
-        device_class=SensorDeviceClass.POWER,
-        state_class=SensorStateClass.MEASUREMENT,
-        icon="mdi:power-plug",
-    ),
-    SensorEntityDescription(
-        key=KEY_AC_OUT_POWER,
-        name="AC Output Power",
-        native_unit_of_measurement=UnitOfPower.WATT,
-        device_class=SensorDeviceClass.POWER,
-        state_class=SensorStateClass.MEASUREMENT,
-    ),
-    SensorEntityDescription(
-        key=KEY_TOTAL_LOAD_POWER,
-        name="Total Load Power",
-        native_unit_of_measurement=UnitOfPower.WATT,
-        device_class=SensorDeviceClass.POWER,
-        state_class=SensorStateClass.MEASUREMENT,
-        icon="mdi:power-plug-outline",
-    ),
-    SensorEntityDescription(
-        key=KEY_AC_IN_POWER,
-        name="AC Input Power",
-        native_unit_of_measurement=UnitOfPower.WATT,
-        device_class=SensorDeviceClass.POWER,
-        state_class=SensorStateClass.MEASUREMENT,
-        entity_registry_enabled_default=True,
-        suggested_display_precision=2,
-    ),
-    SensorEntityDescription(
-        key=KEY_PV1_POWER,
-        name="PV1 Power",
-        native_unit_of_measurement=UnitOfPower.WATT,
-        device_class=SensorDeviceClass.POWER,
-        state_class=SensorStateClass.MEASUREMENT,
-        entity_registry_enabled_default=False,
-    ),
-    SensorEntityDescription(
-        key=KEY_PV2_POWER,
-        name="PV2 Power",
-        native_unit_of_measurement=UnitOfPower.WATT,
-        device_class=SensorDeviceClass.POWER,
-        state_class=SensorStateClass.MEASUREMENT,
-        entity_registry_enabled_default=False,
-    ),
-    SensorEntityDescription(
-        key=KEY_AC_OUT_VA,
-        name="AC Output Apparent Power",
-        native_unit_of_measurement=UnitOfApparentPower.VOLT_AMPERE,
-        device_class=SensorDeviceClass.APPARENT_POWER,
-        state_class=SensorStateClass.MEASUREMENT,
-    ),
-    SensorEntityDescription(
-        key=KEY_BATTERY_VOLTAGE,
-        name="Battery Voltage",
-        native_unit_of_measurement=UnitOfElectricPotential.VOLT,
-        device_class=SensorDeviceClass.VOLTAGE,
-        state_class=SensorStateClass.MEASUREMENT,
-        icon="mdi:battery-outline",
-        suggested_display_precision=2,
-    ),
-    SensorEntityDescription(
-        key=KEY_AC_OUT_VOLTAGE,
-        name="AC Output Voltage",
-        native_unit_of_measurement=UnitOfElectricPotential.VOLT,
-        device_class=SensorDeviceClass.VOLTAGE,
-        state_class=SensorStateClass.MEASUREMENT,
-        suggested_display_precision=1,
-    ),
-    SensorEntityDescription(
-        key=KEY_GRID_VOLTAGE,
-        name="Grid Voltage",
-        native_unit_of_measurement=UnitOfElectricPotential.VOLT,
-        device_class=SensorDeviceClass.VOLTAGE,
-        state_class=SensorStateClass.MEASUREMENT,
-        suggested_display_precision=1,
-    ),
-    SensorEntityDescription(
-        key=KEY_AC_IN_VOLTAGE,
-        name="AC Input Voltage",
-        native_unit_of_measurement=UnitOfElectricPotential.VOLT,
-        device_class=SensorDeviceClass.VOLTAGE,
-        state_class=SensorStateClass.MEASUREMENT,
-        suggested_display_precision=1,
-        entity_registry_enabled_default=False,
-    ),
-    SensorEntityDescription(
-        key=KEY_PV1_VOLTAGE,
-        name="PV1 Voltage",
-        native_unit_of_measurement=UnitOfElectricPotential.VOLT,
-        device_class=SensorDeviceClass.VOLTAGE,
-        state_class=SensorStateClass.MEASUREMENT,
-        entity_registry_enabled_default=False,
-    ),
-    SensorEntityDescription(
-        key=KEY_PV2_VOLTAGE,
-        name="PV2 Voltage",
-        native_unit_of_measurement=UnitOfElectricPotential.VOLT,
-        device_class=SensorDeviceClass.VOLTAGE,
-        state_class=SensorStateClass.MEASUREMENT,
-        entity_registry_enabled_default=False,
-    ),
-    SensorEntityDescription(
-        key=KEY_BATTERY_CURRENT,
-        name="Battery Current",
-        native_unit_of_measurement=UnitOfElectricCurrent.AMPERE,
-        device_class=SensorDeviceClass.CURRENT,
-        state_class=SensorStateClass.MEASUREMENT,
-        icon="mdi:current-dc",
-        suggested_display_precision=2,
-    ),
-    SensorEntityDescription(
-        key=KEY_AC_OUT_FREQ,
-        name="AC Output Frequency",
-        native_unit_of_measurement=UnitOfFrequency.HERTZ,
-        device_class=SensorDeviceClass.FREQUENCY,
-        state_class=SensorStateClass.MEASUREMENT,
-        suggested_display_precision=2,
-    ),
-    SensorEntityDescription(
-        key=KEY_AC_IN_FREQ,
-        name="AC Input Frequency",
-        native_unit_of_measurement=UnitOfFrequency.HERTZ,
-        device_class=SensorDeviceClass.FREQUENCY,
-        state_class=SensorStateClass.MEASUREMENT,
-        suggested_display_precision=2,
-        entity_registry_enabled_default=True,
-    ),
-    SensorEntityDescription(
-        key=KEY_BATTERY_SOC,
-        name="Battery SOC",
-        native_unit_of_measurement=PERCENTAGE,
-        device_class=SensorDeviceClass.BATTERY,
-        state_class=SensorStateClass.MEASUREMENT,
-    ),
-    SensorEntityDescription(
-        key=KEY_BATTERY_STATUS,
-        name="Battery Status",
-        device_class=SensorDeviceClass.ENUM,
-        icon="mdi:battery-sync-outline",
-    ),
-    SensorEntityDescription(
-        key=KEY_BATTERY_TYPE,
-        name="Battery Type",
-        device_class=SensorDeviceClass.ENUM,
-        icon="mdi:battery-unknown",
-        entity_category=EntityCategory.DIAGNOSTIC,
-    ),
-    SensorEntityDescription(
-        key=KEY_GRID_STATUS,
-        name="Grid Status",
-        device_class=SensorDeviceClass.ENUM,
-        icon="mdi:transmission-tower-export",
-    ),
-    SensorEntityDescription(
-        key=KEY_DEVICE_TEMP,
-        name="Device Temperature",
-        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
-        device_class=SensorDeviceClass.TEMPERATURE,
-        state_class=SensorStateClass.MEASUREMENT,
-        suggested_display_precision=1,
-    ),
-    SensorEntityDescription(
-        key=KEY_MASTER_SLAVE_STATUS,
-        name="Master/Slave Status",
-        icon="mdi:account-multiple",
-        entity_category=EntityCategory.DIAGNOSTIC,
-    ),
-    SensorEntityDescription(
-        key=KEY_MQTT_DEVICE_SN,
-        name="Device SN (MQTT)",
-        icon="mdi:barcode-scan",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        entity_registry_enabled_default=False,
-    ),
-    SensorEntityDescription(
-        key=KEY_BATTERY_CELL_INFO,
-        name="Battery Cell Info",
-        icon="mdi:battery-heart-variant",
-        entity_category=EntityCategory.DIAGNOSTIC,
-    ),
-    SensorEntityDescription(
-        key=KEY_LAST_RAW_MQTT,
-        name="Last Raw MQTT Hex",
-        icon="mdi:text-hexadecimal",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        entity_registry_enabled_default=False,
-    ),
-    SensorEntityDescription(
-        key=KEY_SELF_CONSUMPTION_RATIO,
-        name="Self-Consumption Ratio",
-        native_unit_of_measurement=PERCENTAGE,
-        state_class=SensorStateClass.MEASUREMENT,
-        icon="mdi:solar-power-variant",
-        suggested_display_precision=1,
-    ),
-    SensorEntityDescription(
-        key=KEY_WORK_MODE,
-        name="Work Mode",
-        device_class=SensorDeviceClass.ENUM,
-        icon="mdi:cog-transfer-outline",
-        entity_category=EntityCategory.DIAGNOSTIC,
-    ),
-    SensorEntityDescription(
-        key=KEY_BATTERY_MODE,
-        name="Battery Mode",
-        device_class=SensorDeviceClass.ENUM,
-        icon="mdi:battery-settings-variant",
-        entity_category=EntityCategory.DIAGNOSTIC,
-    ),
-    SensorEntityDescription(
-        key=KEY_FW_VERSION,
-        name="Firmware Version",
-        icon="mdi:information-outline",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        entity_registry_enabled_default=True,
-    ),
-    SensorEntityDescription(
-        key=KEY_CTRL_VERSION,
-        name="Controller Version",
-        icon="mdi:information-outline",
-        entity_category=EntityCategory.DIAGNOSTIC,
-        entity_registry_enabled_default=True,
-    ),
+
+def _realtime_description(field: RegisterField) -> SensorEntityDescription:
+    """Build a realtime sensor description from its register schema entry."""
+    return SensorEntityDescription(
+        key=field.key,
+        name=field.name,
+        native_unit_of_measurement=field.unit,
+        device_class=SensorDeviceClass(field.device_class) if field.device_class else None,
+        state_class=SensorStateClass(field.state_class) if field.state_class else None,
+        icon=field.icon,
+        entity_category=EntityCategory(field.entity_category) if field.entity_category else None,
+        entity_registry_enabled_default=field.enabled_default,
+        suggested_display_precision=field.display_precision,
+    )
+
+
+# Sensor Descriptions (MQTT Realtime) - generated from the register schema
+REALTIME_SENSOR_DESCRIPTIONS: tuple[SensorEntityDescription, ...] = tuple(
+    _realtime_description(field) for field in REALTIME_SCHEMA if field.name is not None
 )
+# State write rules of the realtime sensors that declare one
+REALTIME_WRITE_THROTTLES: dict[str, WriteThrottle] = {
+    field.key: field.throttle for field in REALTIME_SCHEMA if field.throttle is not None
+}
 
 # Sensor Descriptions (HTTP Daily Stats)
 STATS_SENSOR_DESCRIPTIONS: tuple[SensorEntityDescription, ...] = (
@@ -711,6 +451,10 @@ class LumentreeMqttSensor(SensorEntity, RestoreEntity):
         "_attr_device_info",
         "_remove_dispatcher",
         "_attr_native_value",
+        "_throttle",
+        "_last_write",
+        "_held_value",
+        "_flush_unsub",
     )
 
     _attr_should_poll = False
@@ -735,6 +479,15 @@ class LumentreeMqttSensor(SensorEntity, RestoreEntity):
         self._attr_device_info = device_info
         self._remove_dispatcher: Optional[Callable[[], None]] = None
         self._attr_native_value = self._process_value(initial_data.get(description.key))
+        # Significant-change rule (None: write on every change) and its held value
+        self._throttle = resolve_throttle(
+            description.key,
+            REALTIME_WRITE_THROTTLES.get(description.key),
+            entry.options.get(CONF_WRITE_THROTTLE),
+        )
+        self._last_write = float("-inf")
+        self._held_value: Any = None
+        self._flush_unsub: Callable[[], None] | None = None
 
         if _LOGGER.isEnabledFor(logging.DEBUG):
             _LOGGER.debug(
@@ -769,8 +522,6 @@ class LumentreeMqttSensor(SensorEntity, RestoreEntity):
                     pass
             else:
                 processed_value = str(value)
-                if desc.key == KEY_LAST_RAW_MQTT and len(processed_value) > 255:
-                    processed_value = processed_value[:252] + "..."
         return processed_value
 
     @callback
@@ -781,11 +532,45 @@ class LumentreeMqttSensor(SensorEntity, RestoreEntity):
             return
         if key in data:
             new_value = self._process_value(data[key])
-            if self._attr_native_value != new_value:
-                self._attr_native_value = new_value
-                self.async_write_ha_state()
-                if _LOGGER.isEnabledFor(logging.DEBUG):
-                    _LOGGER.debug("Update MQTT sensor %s: %s", self.entity_id, new_value)
+            if self._throttle is None:
+                if self._attr_native_value != new_value:
+                    self._write_value(new_value)
+                return
+            now = time.monotonic()
+            since_write = now - self._last_write
+            decision = self._throttle.decide(self._attr_native_value, new_value, since_write)
+            if decision == WRITE:
+                self._write_value(new_value)
+            elif decision == HOLD:
+                # Latest significant value is written once min_interval has passed
+                self._held_value = new_value
+                if self._flush_unsub is None:
+                    self._flush_unsub = async_call_later(
+                        self.hass, self._throttle.min_interval - since_write, self._flush_held
+                    )
+            else:
+                self._cancel_flush()  # Back inside the deadband: nothing worth writing
+
+    @callback
+    def _write_value(self, value: Any) -> None:
+        """Write a new value to the state machine."""
+        self._cancel_flush()
+        self._attr_native_value = value
+        self._last_write = time.monotonic()
+        self.async_write_ha_state()
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Update MQTT sensor %s: %s", self.entity_id, value)
+
+    @callback
+    def _flush_held(self, _now: Any) -> None:
+        """Write the value held back by min_interval."""
+        self._flush_unsub = None
+        self._write_value(self._held_value)
+
+    def _cancel_flush(self) -> None:
+        if self._flush_unsub is not None:
+            self._flush_unsub()
+            self._flush_unsub = None
 
     async def async_added_to_hass(self) -> None:
         """Register dispatcher connection and restore state."""
@@ -796,8 +581,9 @@ class LumentreeMqttSensor(SensorEntity, RestoreEntity):
                 self._attr_native_value = self._process_value(last_state.state)
             except (ValueError, TypeError):
                 pass
-        signal = SIGNAL_UPDATE_FORMAT.format(device_sn=self._device_sn)
-        self._remove_dispatcher = async_dispatcher_connect(self.hass, signal, self._handle_update)
+        self._remove_dispatcher = async_key_dispatcher_connect(
+            self.hass, self._device_sn, (self.entity_description.key,), self._handle_update
+        )
         if _LOGGER.isEnabledFor(logging.DEBUG):
             _LOGGER.debug("MQTT sensor %s registered", self.unique_id)
 
@@ -806,6 +592,7 @@ class LumentreeMqttSensor(SensorEntity, RestoreEntity):
         if self._remove_dispatcher:
             self._remove_dispatcher()
             self._remove_dispatcher = None
+        self._cancel_flush()
         if _LOGGER.isEnabledFor(logging.DEBUG):
             _LOGGER.debug("MQTT sensor %s unregistered", self.unique_id)
 
@@ -824,6 +611,7 @@ class LumentreeBatteryCellSensor(SensorEntity, RestoreEntity):
         "_attr_extra_state_attributes",
         "_remove_dispatcher",
         "_attr_native_value",
+        "_cell_info",
     )
 
     _attr_should_poll = False
@@ -848,11 +636,13 @@ class LumentreeBatteryCellSensor(SensorEntity, RestoreEntity):
         self._attr_device_info = device_info
         self._attr_extra_state_attributes: Dict[str, Any] = {}
         self._remove_dispatcher: Optional[Callable[[], None]] = None
+        self._cell_info: BatteryCellInfo | None = None
 
         initial_cell_info = initial_data.get(KEY_BATTERY_CELL_INFO)
-        if isinstance(initial_cell_info, dict):
-            self._attr_native_value = initial_cell_info.get("number_of_cells")
-            self._attr_extra_state_attributes = initial_cell_info
+        if isinstance(initial_cell_info, BatteryCellInfo):
+            self._cell_info = initial_cell_info
+            self._attr_native_value = initial_cell_info.number_of_cells
+            self._attr_extra_state_attributes = initial_cell_info.as_attributes()
         else:
             self._attr_native_value = None
 
@@ -868,21 +658,20 @@ class LumentreeBatteryCellSensor(SensorEntity, RestoreEntity):
     def _handle_update(self, data: Dict[str, Any]) -> None:
         """Handle update from dispatcher."""
         if KEY_BATTERY_CELL_INFO in data:
-            cell_info_dict = data[KEY_BATTERY_CELL_INFO]
-            if isinstance(cell_info_dict, dict):
-                new_state = cell_info_dict.get("number_of_cells")
-                new_attrs = cell_info_dict
-                if (
-                    self._attr_native_value != new_state
-                    or self._attr_extra_state_attributes != new_attrs
-                ):
-                    self._attr_native_value = new_state
-                    self._attr_extra_state_attributes = new_attrs
+            cell_info = data[KEY_BATTERY_CELL_INFO]
+            if isinstance(cell_info, BatteryCellInfo):
+                # Compare the compact millivolt tuples; attributes are only built on change
+                if cell_info != self._cell_info:
+                    self._cell_info = cell_info
+                    self._attr_native_value = cell_info.number_of_cells
+                    self._attr_extra_state_attributes = cell_info.as_attributes()
                     self.async_write_ha_state()
-                    _LOGGER.info(f"Update Cell sensor {self.entity_id}: State={new_state}")
+                    _LOGGER.info(
+                        f"Update Cell sensor {self.entity_id}: State={cell_info.number_of_cells}"
+                    )
             else:
                 _LOGGER.warning(
-                    f"Invalid cell info type {self.unique_id}: {type(cell_info_dict)}"
+                    f"Invalid cell info type {self.unique_id}: {type(cell_info)}"
                 )
 
     async def async_added_to_hass(self) -> None:
@@ -896,8 +685,9 @@ class LumentreeBatteryCellSensor(SensorEntity, RestoreEntity):
                 pass
             if last_state.attributes:
                 self._attr_extra_state_attributes = dict(last_state.attributes)
-        signal = SIGNAL_UPDATE_FORMAT.format(device_sn=self._device_sn)
-        self._remove_dispatcher = async_dispatcher_connect(self.hass, signal, self._handle_update)
+        self._remove_dispatcher = async_key_dispatcher_connect(
+            self.hass, self._device_sn, (KEY_BATTERY_CELL_INFO,), self._handle_update
+        )
         if _LOGGER.isEnabledFor(logging.DEBUG):
             _LOGGER.debug("Cell sensor %s registered", self.unique_id)
 
@@ -1178,8 +968,9 @@ class LumentreeTotalLoadPowerSensor(SensorEntity, RestoreEntity):
                 self._attr_native_value = float(last_state.state)
             except (ValueError, TypeError):
                 pass
-        signal = SIGNAL_UPDATE_FORMAT.format(device_sn=self._device_sn)
-        self._remove_dispatcher = async_dispatcher_connect(self.hass, signal, self._handle_update)
+        self._remove_dispatcher = async_key_dispatcher_connect(
+            self.hass, self._device_sn, (KEY_LOAD_POWER, KEY_AC_OUT_POWER), self._handle_update
+        )
         if _LOGGER.isEnabledFor(logging.DEBUG):
             _LOGGER.debug("Total Load Power sensor %s registered", self.unique_id)
 
@@ -7,25 +7,43 @@ client, and persists results via services.cache.
 from __future__ import annotations
 
 import asyncio
+from contextlib import aclosing
 import datetime as dt
 import logging
 import time
 from typing import Dict, Any, Optional, Tuple
 
 from homeassistant.core import HomeAssistant
+from ..const import DEFAULT_BACKFILL_CONCURRENCY
 from ..core.api_client import LumentreeHttpApiClient
+from ..core.rate_limiter import PRIORITY_BACKFILL, with_request_priority
 from . import cache as cache_io
+from .backfill_pipeline import ConcurrencyWindow, fetch_in_order
 
 _LOGGER = logging.getLogger(__name__)
 
 
 class StatsAggregator:
-    __slots__ = ("_hass", "_api", "_device_id")
-
-    def __init__(self, hass: HomeAssistant, api: LumentreeHttpApiClient, device_id: str) -> None:
+    __slots__ = ("_hass", "_api", "_device_id", "backfill_window")
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api: LumentreeHttpApiClient,
+        device_id: str,
+        backfill_concurrency: int = DEFAULT_BACKFILL_CONCURRENCY,
+    ) -> None:
         self._hass = hass
         self._api = api
         self._device_id = device_id
+        # Days fetched at once by backfill_days/backfill_all, adapted across runs
+        self.backfill_window = ConcurrencyWindow(backfill_concurrency)
+
+    def _fetch_days(self, dates: list[str]):
+        """Fetch days through the backfill window; use with aclosing(), results in order."""
+        return fetch_in_order(
+            dates, self.fetch_day, self.backfill_window, lambda: self._api.failed_attempts
+        )
 
     async def get_year_data_from_api(self, year: int) -> Dict[str, Any] | None:
         """Get yearly data from API using getYearData endpoint.
@@ -74,6 +92,7 @@ class StatsAggregator:
             _LOGGER.error(f"Error getting year data from API for {year}: {err}")
             return None
 
+    @with_request_priority(PRIORITY_BACKFILL)
     async def smart_backfill(self, max_years: int = 10, optimize_cache: bool = True) -> Dict[str, Any]:
         """Smart backfill using getYearData/getMonthData APIs for optimal performance.
         
@@ -93,6 +112,7 @@ class StatsAggregator:
         from .smart_backfill import smart_backfill
         return await smart_backfill(self._hass, self, max_years, optimize_cache)
 
+    @with_request_priority(PRIORITY_BACKFILL)
     async def get_earliest_data_date(self) -> Dict[str, Any] | None:
         """Get earliest date when device has data.
         
@@ -202,11 +222,13 @@ class StatsAggregator:
             "discharge": discharge_value,
         }
 
+    @with_request_priority(PRIORITY_BACKFILL)
     async def backfill_days(self, since: dt.date, until: dt.date) -> None:
         """Backfill inclusive date range with optimized batch cache I/O.
 
         Groups days by year and performs batch cache operations for better performance.
-        Uses adaptive delay with exponential backoff on rate limits.
+        Up to backfill_window.size days are fetched at once; results are applied in
+        date order. Requests are paced by the API rate limiter at backfill priority.
         """
         # Group days by year for batch processing
         days_by_year: Dict[int, list[dt.date]] = {}
@@ -219,31 +241,24 @@ class StatsAggregator:
             day += dt.timedelta(days=1)
 
         # Process each year's cache once
-        base_delay = 0.2
-        delay = base_delay
         for year, days in days_by_year.items():
             # Load cache once per year
             cache = await self._hass.async_add_executor_job(cache_io.load_year, self._device_id, year)
             cache_dirty = False
 
-            for day in days:
-                date_str = day.strftime("%Y-%m-%d")
-
-                # Skip if already exists in daily cache
-                if date_str in cache.get("daily", {}):
-                    continue
+            # Skip days already in the daily cache
+            daily = cache.get("daily", {})
+            missing = [d.strftime("%Y-%m-%d") for d in days]
+            missing = [date_str for date_str in missing if date_str not in daily]
 
-                try:
-                    vals = await self.fetch_day(date_str)
+            async with aclosing(self._fetch_days(missing)) as results:
+                async for date_str, vals in results:
+                    if isinstance(vals, Exception):
+                        _LOGGER.error(f"Error fetching {date_str}: {vals}")
+                        continue
                     cache, _m = cache_io.update_daily(cache, date_str, vals)
                     cache.setdefault("meta", {})["last_backfill_date"] = date_str
                     cache_dirty = True
-                    delay = base_delay
-                except Exception:
-                    delay = min(delay * 2, 5.0)
-
-                # Always sleep between API calls (including after errors)
-                await asyncio.sleep(delay)
 
             # Save cache once per year if modified
             if cache_dirty:
@@ -264,6 +279,7 @@ class StatsAggregator:
         c = await self._hass.async_add_executor_job(cache_io.load_year, self._device_id, year, True)
         return cache_io.summarize_year(c)
 
+    @with_request_priority(PRIORITY_BACKFILL)
     async def backfill_all(self, max_years: int | None = 5, empty_streak: int = 14) -> None:
         """Backfill toàn bộ lịch sử lùi theo ngày với batch cache I/O.
 
@@ -275,25 +291,19 @@ class StatsAggregator:
             max_years: Tối đa số năm cần quét (mặc định 5). None = không giới hạn, chỉ dừng theo empty_streak
             empty_streak: Số ngày liên tiếp không có dữ liệu để dừng (chỉ áp dụng khi max_years=None)
         
-        Uses optimized batch processing per year.
+        Uses optimized batch processing per year; missing days are fetched through
+        the backfill window (several days in flight) and applied newest first.
         """
         start_time = time.time()
         today = dt.date.today()
         empty = 0
-        base_delay = 0.1  # Reduced from 0.2s for better performance
-        delay = base_delay
         
         # Statistics tracking
         total_fetched = 0
         total_empty = 0
         total_skipped = 0
         total_errors = 0
-        days_in_current_year = 0
         stop_reason = None
-        
-        # Track current year cache
-        current_year = None
-        cache = None
         last_progress_log = 0
 
         # Calculate limit_days: None means unlimited (only stop by empty_streak)
@@ -310,118 +320,97 @@ class StatsAggregator:
 
         _LOGGER.info(
             f"Backfill started: device_id={self._device_id}, max_years={max_years}, "
-            f"limit={limit_info}, empty_streak={empty_streak if not ignore_empty_streak else 'ignored'}, delay={base_delay}s"
+            f"limit={limit_info}, empty_streak={empty_streak if not ignore_empty_streak else 'ignored'}"
         )
 
-        for i in range(limit_days):
-            day = today - dt.timedelta(days=i)
-            date_str = day.strftime("%Y-%m-%d")
-            year = day.year
+        # Newest day first, one year at a time: the missing days of a year go through
+        # the backfill window and come back in the same order
+        last_day = today - dt.timedelta(days=limit_days - 1)
+        for year in range(today.year, last_day.year - 1, -1):
+            newest = min(today, dt.date(year, 12, 31))
+            oldest = max(last_day, dt.date(year, 1, 1))
+            dates = [
+                (newest - dt.timedelta(days=i)).strftime("%Y-%m-%d")
+                for i in range((newest - oldest).days + 1)
+            ]
 
-            # Load cache when year changes
-            if year != current_year:
-                if cache is not None and current_year is not None:
-                    # Save previous year's cache
-                    await self._hass.async_add_executor_job(cache_io.save_year, self._device_id, current_year, cache)
-                    _LOGGER.info(
-                        f"Year {current_year} completed: fetched {days_in_current_year} days. "
-                        f"Total progress: {total_fetched} fetched, {total_empty} empty, {total_skipped} skipped"
-                    )
-                
-                cache = await self._hass.async_add_executor_job(cache_io.load_year, self._device_id, year)
-                current_year = year
-                days_in_current_year = 0
-                _LOGGER.info(f"Processing year {year}...")
+            cache = await self._hass.async_add_executor_job(cache_io.load_year, self._device_id, year)
+            days_in_current_year = 0
+            _LOGGER.info(f"Processing year {year}...")
 
             # Skip if already exists in daily data
             # Since server always returns same structure (0s when no data),
             # we store ALL days in daily cache, so we only skip if already cached
-            if date_str in cache.get("daily", {}):
-                empty = 0
-                total_skipped += 1
-                continue
-
-            # Progress logging every 50 days
-            if total_fetched > 0 and total_fetched % 50 == 0 and total_fetched != last_progress_log:
-                elapsed = time.time() - start_time
-                _LOGGER.info(
-                    f"Progress: {total_fetched} days fetched, {total_empty} empty, "
-                    f"currently at {date_str} (elapsed: {elapsed:.1f}s)"
-                )
-                last_progress_log = total_fetched
+            cached = set(cache.get("daily", {}))
+            missing = [date_str for date_str in dates if date_str not in cached]
 
-            try:
-                vals = await self.fetch_day(date_str)
-                
-                # Since server always returns same structure (0s when no data),
-                # we store ALL days in daily cache, even if all values are 0.
-                # This simplifies logic and allows easy re-checking later.
-                empty = 0  # Reset empty streak when we have a response (even if all zeros)
-                cache, _m = cache_io.update_daily(cache, date_str, vals)
-                cache.setdefault("meta", {})["last_backfill_date"] = date_str
-                total_fetched += 1
-                days_in_current_year += 1
-                
-                # Check if day has meaningful data (for statistics only)
-                has_data = any(abs(vals.get(k, 0.0)) > 0.001 for k in ("pv", "grid", "load", "essential", "charge", "discharge"))
-                if not has_data:
-                    total_empty += 1
-                    
-                # For empty_streak stopping (only in unlimited mode), track consecutive empty days
-                if not ignore_empty_streak:
-                    if not has_data:
-                        empty += 1
-                        # Log empty streak progress
-                        if empty % 5 == 0:
-                            _LOGGER.info(f"Empty streak: {empty}/{empty_streak} consecutive empty days at {date_str}")
-                        
-                        if empty >= empty_streak:
-                            stop_reason = f"empty_streak ({empty} consecutive empty days)"
-                            _LOGGER.info(
-                                f"Backfill stopping: reached {empty_streak} consecutive empty days at {date_str}. "
-                                f"This indicates we've reached the beginning of inverter usage history. "
-                                f"Total fetched: {total_fetched} days, empty: {total_empty} days"
-                            )
-                            # Save before breaking
-                            await self._hass.async_add_executor_job(cache_io.save_year, self._device_id, year, cache)
-                            break
-                    else:
+            async with aclosing(self._fetch_days(missing)) as results:
+                for date_str in dates:
+                    if date_str in cached:
                         empty = 0
-                
-                # Reset delay on success
-                if delay > base_delay:
-                    _LOGGER.info(f"Resetting delay to {base_delay}s after successful fetch")
-                delay = base_delay
-                
-            except Exception as err:
-                total_errors += 1
-                # Exponential backoff on errors (likely rate limit)
-                old_delay = delay
-                delay = min(delay * 2, 5.0)  # Cap at 5 seconds
-                if delay > old_delay:
-                    _LOGGER.warning(
-                        f"Error fetching {date_str}: {err}. Increasing delay to {delay}s "
-                        f"(total errors: {total_errors})"
-                    )
-                else:
-                    _LOGGER.error(f"Error fetching {date_str}: {err}")
-                continue
+                        total_skipped += 1
+                        continue
+
+                    # Progress logging every 50 days
+                    if total_fetched > 0 and total_fetched % 50 == 0 and total_fetched != last_progress_log:
+                        elapsed = time.time() - start_time
+                        _LOGGER.info(
+                            f"Progress: {total_fetched} days fetched, {total_empty} empty, "
+                            f"currently at {date_str} (elapsed: {elapsed:.1f}s)"
+                        )
+                        last_progress_log = total_fetched
 
-            await asyncio.sleep(delay)
+                    _date, vals = await anext(results)
+                    if isinstance(vals, Exception):
+                        total_errors += 1
+                        # Pacing after errors is up to the API rate limiter and backfill window
+                        _LOGGER.error(f"Error fetching {date_str}: {vals} (total errors: {total_errors})")
+                        continue
+
+                    # Since server always returns same structure (0s when no data),
+                    # we store ALL days in daily cache, even if all values are 0.
+                    # This simplifies logic and allows easy re-checking later.
+                    cache, _m = cache_io.update_daily(cache, date_str, vals)
+                    cache.setdefault("meta", {})["last_backfill_date"] = date_str
+                    total_fetched += 1
+                    days_in_current_year += 1
+
+                    # Check if day has meaningful data (for statistics only)
+                    has_data = any(abs(vals.get(k, 0.0)) > 0.001 for k in ("pv", "grid", "load", "essential", "charge", "discharge"))
+                    if not has_data:
+                        total_empty += 1
+
+                    # For empty_streak stopping (only in unlimited mode), track consecutive empty days
+                    if not ignore_empty_streak:
+                        if not has_data:
+                            empty += 1
+                            # Log empty streak progress
+                            if empty % 5 == 0:
+                                _LOGGER.info(f"Empty streak: {empty}/{empty_streak} consecutive empty days at {date_str}")
+
+                            if empty >= empty_streak:
+                                stop_reason = f"empty_streak ({empty} consecutive empty days)"
+                                _LOGGER.info(
+                                    f"Backfill stopping: reached {empty_streak} consecutive empty days at {date_str}. "
+                                    f"This indicates we've reached the beginning of inverter usage history. "
+                                    f"Total fetched: {total_fetched} days, empty: {total_empty} days"
+                                )
+                                break
+                        else:
+                            empty = 0
+
+            await self._hass.async_add_executor_job(cache_io.save_year, self._device_id, year, cache)
+            _LOGGER.info(
+                f"Year {year} completed: fetched {days_in_current_year} days. "
+                f"Total progress: {total_fetched} fetched, {total_empty} empty, {total_skipped} skipped"
+            )
+            if stop_reason is not None:
+                break
 
         # Check if we hit the limit
         if stop_reason is None:
             stop_reason = f"limit_days reached ({limit_days} days)"
 
-        # Save final year's cache if needed
-        if cache is not None and current_year is not None:
-            if days_in_current_year > 0:
-                _LOGGER.info(
-                    f"Year {current_year} completed: fetched {days_in_current_year} days. "
-                    f"Total progress: {total_fetched} fetched, {total_empty} empty, {total_skipped} skipped"
-                )
-            await self._hass.async_add_executor_job(cache_io.save_year, self._device_id, current_year, cache)
-
         # Final summary
         elapsed_time = time.time() - start_time
         _LOGGER.info(
@@ -431,6 +420,7 @@ class StatsAggregator:
             f"elapsed={elapsed_time:.1f}s ({elapsed_time/60:.1f} minutes)"
         )
 
+    @with_request_priority(PRIORITY_BACKFILL)
     async def backfill_gaps(self, max_years: int = 3, max_days_per_run: int = 60) -> int:
         """Lấp các ngày còn thiếu trong cache theo từng năm với batch I/O.
 
@@ -442,8 +432,6 @@ class StatsAggregator:
         """
         today = dt.date.today()
         filled = 0
-        base_delay = 0.2
-        delay = base_delay
         
         for year_offset in range(max_years):
             if filled >= max_days_per_run:
@@ -479,14 +467,9 @@ class StatsAggregator:
                         cache_year.setdefault("meta", {})["last_backfill_date"] = date_str
                         cache_dirty = True
                         filled += 1
-                        delay = base_delay  # Reset on success
-                            
                     except Exception as err:
-                        # Exponential backoff on errors
-                        delay = min(delay * 2, 5.0)  # Cap at 5 seconds
-                        continue
-                    
-                    await asyncio.sleep(delay)
+                        # Pacing is up to the API rate limiter; move on instead of retrying the day
+                        _LOGGER.error(f"Error fetching {date_str}: {err}")
                     
                 day += dt.timedelta(days=1)
 
@@ -496,6 +479,7 @@ class StatsAggregator:
 
         return filled
 
+    @with_request_priority(PRIORITY_BACKFILL)
     async def backfill_empty_dates(self, max_years: int = 5, max_days_per_run: int = 100) -> Dict[str, int]:
         """Backfill lại các ngày đã bị đánh dấu empty để kiểm tra lại với logic mới.
         
@@ -511,8 +495,6 @@ class StatsAggregator:
         """
         start_time = time.time()
         today = dt.date.today()
-        base_delay = 0.1
-        delay = base_delay
         
         recovered = 0
         confirmed_empty = 0
@@ -582,7 +564,6 @@ class StatsAggregator:
                             f"essential={vals.get('essential', 0.0):.2f}, "
                             f"charge={vals.get('charge', 0.0):.2f}, discharge={vals.get('discharge', 0.0):.2f}"
                         )
-                        delay = base_delay  # Reset on success
                     else:
                         # Still empty - confirm it
                         confirmed_empty += 1
@@ -592,22 +573,13 @@ class StatsAggregator:
                             f"load={vals.get('load', 0.0):.4f}, essential={vals.get('essential', 0.0):.4f}, "
                             f"charge={vals.get('charge', 0.0):.4f}, discharge={vals.get('discharge', 0.0):.4f}"
                         )
-                        delay = base_delay
                     
                 except Exception as err:
                     total_errors += 1
-                    old_delay = delay
-                    delay = min(delay * 2, 5.0)
-                    if delay > old_delay:
-                        _LOGGER.warning(
-                            f"Error re-checking {date_str}: {err}. Increasing delay to {delay}s "
-                            f"(total errors: {total_errors})"
-                        )
-                    else:
-                        _LOGGER.error(f"Error re-checking {date_str}: {err}")
+                    _LOGGER.error(
+                        f"Error re-checking {date_str}: {err} (total errors: {total_errors})"
+                    )
                     continue
-                
-                await asyncio.sleep(delay)
             
             # Save cache if modified
             if cache_dirty:
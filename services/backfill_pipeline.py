@@ -0,0 +1,133 @@
+"""Pipelined day backfill: several days in flight, results applied in date order.
+
+A day costs three requests that already run in parallel (see
+StatsAggregator.fetch_day), but backfill used to wait for one day before
+starting the next, so a year took one round trip per day. fetch_in_order()
+keeps a window of days in flight and hands back the results in the order
+the days were given, so the caller updates the year cache exactly as the
+sequential loop did and can stop early (empty streak) without gaps.
+
+The window adapts AIMD-style: it grows by one day after a window's worth of
+clean days and is halved when a day saw a failed request attempt, at most
+once per window of days launched. The rate limiter in front of the API still
+paces the requests themselves; the window only bounds how many days wait on
+it at once.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from typing import Any, TypeVar
+
+_LOGGER = logging.getLogger(__name__)
+
+_K = TypeVar("_K")
+_V = TypeVar("_V")
+
+
+class ConcurrencyWindow:
+    """AIMD bound on the number of days fetched at once."""
+
+    __slots__ = ("size", "min_size", "max_size", "_clean", "_launched", "_cut_at")
+
+    def __init__(self, max_size: int, initial: int | None = None, min_size: int = 1) -> None:
+        """Initialize the window.
+
+        Args:
+            max_size: Days in flight at most
+            initial: Starting size (default: half of max_size)
+            min_size: Days in flight at least
+        """
+        self.min_size = max(1, min_size)
+        self.max_size = max(self.min_size, max_size)
+        start = initial if initial is not None else (self.max_size + 1) // 2
+        self.size = min(max(start, self.min_size), self.max_size)
+        self._clean = 0  # Clean days since the last change
+        self._launched = 0  # Days launched so far
+        self._cut_at = 0  # Days launched before this one do not cut the window again
+
+    def launch(self) -> int:
+        """Note a day going out; returns its sequence number."""
+        self._launched += 1
+        return self._launched
+
+    def success(self) -> None:
+        """Additive increase: one more day once a full window finished cleanly."""
+        self._clean += 1
+        if self._clean >= self.size:
+            self._clean = 0
+            if self.size < self.max_size:
+                self.size += 1
+
+    def failure(self, seq: int) -> None:
+        """Multiplicative decrease, once for all days in flight when it happened."""
+        self._clean = 0
+        if seq <= self._cut_at:
+            return
+        self._cut_at = self._launched
+        old = self.size
+        self.size = max(self.min_size, self.size // 2)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Backfill window %s -> %s days after a failed request", old, self.size)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Summary for diagnostics."""
+        return {"size": self.size, "max_size": self.max_size, "launched": self._launched}
+
+
+async def fetch_in_order(  # noqa: UP047 - hacs.json still allows Python 3.10
+    keys: Iterable[_K],
+    fetch: Callable[[_K], Awaitable[_V]],
+    window: ConcurrencyWindow,
+    failures: Callable[[], int] | None = None,
+) -> AsyncIterator[tuple[_K, _V | Exception]]:
+    """Fetch keys with up to window.size in flight, yielding results in key order.
+
+    Use with contextlib.aclosing() so days still in flight are cancelled when
+    the caller stops early.
+
+    Args:
+        keys: Keys (dates) in the order results are wanted
+        fetch: Coroutine function fetching one key
+        window: Concurrency window, adapted as results come in
+        failures: Counter of failed request attempts; a day during which it
+            moved counts as failed even if fetch hid the error
+
+    Yields:
+        (key, result), or (key, exception) if fetch raised
+    """
+    count = failures or (lambda: 0)
+    pending: deque[tuple[_K, asyncio.Future, int, int]] = deque()
+    keys_iter = iter(keys)
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < window.size:
+                try:
+                    key = next(keys_iter)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.append((key, asyncio.ensure_future(fetch(key)), window.launch(), count()))
+            if not pending:
+                return
+            key, task, seq, failed_before = pending.popleft()
+            try:
+                result: _V | Exception = await task
+            except Exception as err:
+                result = err
+            if isinstance(result, Exception) or count() > failed_before:
+                window.failure(seq)
+            else:
+                window.success()
+            yield key, result
+    finally:
+        for _key, task, _seq, _failed in pending:
+            if task.done():
+                if not task.cancelled():
+                    task.exception()  # Finished but not wanted any more
+            else:
+                task.cancel()
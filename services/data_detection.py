@@ -6,6 +6,7 @@ from typing import Dict, Any, Optional, Tuple
 import logging
 
 from . import cache as cache_io
+from ..core.rate_limiter import PRIORITY_BACKFILL, with_request_priority
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -67,6 +68,7 @@ def find_earliest_data_from_cache(
     return None
 
 
+@with_request_priority(PRIORITY_BACKFILL)
 async def find_earliest_data_from_api(api_client, device_id: str, max_years: int = 10) -> Optional[Tuple[int, int]]:
     """Find earliest month with data from getYearData API.
     
@@ -1,4 +1,10 @@
-"""Smart backfill system using getYearData/getMonthData for optimal performance."""
+"""Smart backfill system using getYearData/getMonthData for optimal performance.
+
+Years are scanned and months fetched concurrently; the shared API rate
+limiter paces the requests (at backfill priority), so no delays are needed
+here. Each year's cache is loaded once, its months are merged in month order
+after all of them arrived, and it is recomputed and saved once.
+"""
 from __future__ import annotations
 
 import asyncio
@@ -11,10 +17,48 @@ import time
 from . import cache as cache_io
 from ..const import DEFAULT_TARIFF_VND_PER_KWH
 from ..core.api_client import LumentreeHttpApiClient
+from ..core.rate_limiter import PRIORITY_BACKFILL, with_request_priority
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _scan_years(max_years: int) -> List[int]:
+    """Years to scan, newest first."""
+    today = dt.date.today()
+    return [today.year - offset for offset in range(max_years) if today.year - offset >= 2000]
+
+
+async def _months_with_data(
+    api_client: LumentreeHttpApiClient, device_id: str, year: int
+) -> List[int]:
+    """Months (1-12) of a year that have data according to getYearData."""
+    try:
+        year_data = await api_client.get_year_data(device_id, year)
+    except Exception as err:
+        _LOGGER.debug(f"Error checking year {year} from API: {err}")
+        return []
+
+    # Check which months have data
+    months_with_data = []
+    pv_data = year_data.get("pv", [0.0] * 12)
+    grid_data = year_data.get("grid", [0.0] * 12)
+    load_data = year_data.get("homeload", [0.0] * 12)
+
+    for month_idx in range(12):
+        month = month_idx + 1
+        has_data = (
+            pv_data[month_idx] > 0.0 or
+            grid_data[month_idx] > 0.0 or
+            load_data[month_idx] > 0.0
+        )
+        if has_data:
+            months_with_data.append(month)
+
+    if months_with_data:
+        _LOGGER.debug(f"Year {year} has data in months: {months_with_data}")
+    return months_with_data
+
+
 async def detect_data_gaps_from_api(
     api_client: LumentreeHttpApiClient,
     device_id: str,
@@ -22,49 +66,21 @@ async def detect_data_gaps_from_api(
 ) -> Dict[int, List[int]]:
     """Detect which months have data using getYearData API (fast scan).
     
+    All years are requested at once; the rate limiter paces them.
+    
     Args:
         api_client: API client
         device_id: Device ID
         max_years: Maximum years to check
         
     Returns:
-        Dictionary mapping year to list of months (1-12) that have data
+        Dictionary mapping year to list of months (1-12) that have data, newest year first
     """
-    today = dt.date.today()
-    years_with_data: Dict[int, List[int]] = {}
-    
-    for year_offset in range(max_years):
-        year = today.year - year_offset
-        if year < 2000:
-            break
-        
-        try:
-            year_data = await api_client.get_year_data(device_id, year)
-            
-            # Check which months have data
-            months_with_data = []
-            pv_data = year_data.get("pv", [0.0] * 12)
-            grid_data = year_data.get("grid", [0.0] * 12)
-            load_data = year_data.get("homeload", [0.0] * 12)
-            
-            for month_idx in range(12):
-                month = month_idx + 1
-                has_data = (
-                    pv_data[month_idx] > 0.0 or
-                    grid_data[month_idx] > 0.0 or
-                    load_data[month_idx] > 0.0
-                )
-                if has_data:
-                    months_with_data.append(month)
-            
-            if months_with_data:
-                years_with_data[year] = months_with_data
-                _LOGGER.debug(f"Year {year} has data in months: {months_with_data}")
-        except Exception as err:
-            _LOGGER.debug(f"Error checking year {year} from API: {err}")
-            continue
-    
-    return years_with_data
+    years = _scan_years(max_years)
+    found = await asyncio.gather(
+        *(_months_with_data(api_client, device_id, year) for year in years)
+    )
+    return {year: months for year, months in zip(years, found, strict=True) if months}
 
 
 async def backfill_month_from_api(
@@ -88,85 +104,102 @@ async def backfill_month_from_api(
     """
     try:
         month_data = await api_client.get_month_data(device_id, year, month)
+        return merge_month_data(cache, year, month, month_data)
+    except Exception as err:
+        _LOGGER.error(f"Error backfilling month {year}-{month:02d}: {err}")
+        return 0, 0
+
+
+def merge_month_data(
+    cache: Dict[str, Any], year: int, month: int, month_data: Dict[str, Any]
+) -> Tuple[int, int]:
+    """Merge a getMonthData result into a year cache (daily entries only).
+
+    Args:
+        cache: Cache dictionary to update
+        year: Year
+        month: Month (1-12)
+        month_data: Result of LumentreeHttpApiClient.get_month_data
+
+    Returns:
+        Tuple of (days_added, days_updated)
+    """
+    # Get daily arrays from API
+    pv_daily = month_data.get("pv", [])
+    grid_daily = month_data.get("grid", [])
+    load_daily = month_data.get("homeload", [])
+    essential_daily = month_data.get("essentialLoad", [])
+    bat_daily = month_data.get("bat", [])
+    batf_daily = month_data.get("batF", [])
+    
+    days_added = 0
+    days_updated = 0
+    
+    # Get number of days in month
+    days_in_month = calendar.monthrange(year, month)[1]
+    
+    # Process each day
+    daily = cache.setdefault("daily", {})
+    # Use longest available array to avoid losing data from shorter arrays
+    max_days = max(len(arr) for arr in (pv_daily, grid_daily, load_daily, essential_daily, bat_daily, batf_daily))
+    loop_limit = min(max_days, days_in_month)
+    for day in range(1, loop_limit + 1):
+        date_str = f"{year}-{month:02d}-{day:02d}"
         
-        # Get daily arrays from API
-        pv_daily = month_data.get("pv", [])
-        grid_daily = month_data.get("grid", [])
-        load_daily = month_data.get("homeload", [])
-        essential_daily = month_data.get("essentialLoad", [])
-        bat_daily = month_data.get("bat", [])
-        batf_daily = month_data.get("batF", [])
-        
-        days_added = 0
-        days_updated = 0
-        
-        # Get number of days in month
-        days_in_month = calendar.monthrange(year, month)[1]
-        
-        # Process each day
-        daily = cache.setdefault("daily", {})
-        # Use longest available array to avoid losing data from shorter arrays
-        max_days = max(len(arr) for arr in (pv_daily, grid_daily, load_daily, essential_daily, bat_daily, batf_daily))
-        loop_limit = min(max_days, days_in_month)
-        for day in range(1, loop_limit + 1):
-            date_str = f"{year}-{month:02d}-{day:02d}"
-            
-            # Check if day already exists and has data
-            existing = daily.get(date_str)
-            if existing:
-                # Check if existing has real data
-                has_existing_data = any(
-                    float(existing.get(key, 0.0)) > 0.0
-                    for key in ["pv", "grid", "load", "essential"]
-                )
-                
-                # Check if API has data for this day
-                has_api_data = (
-                    day <= len(pv_daily) and pv_daily[day - 1] > 0.0 or
-                    day <= len(grid_daily) and grid_daily[day - 1] > 0.0 or
-                    day <= len(load_daily) and load_daily[day - 1] > 0.0
-                )
-                
-                # Only update if API has data and existing doesn't
-                if has_api_data and not has_existing_data:
-                    days_updated += 1
-                else:
-                    continue  # Skip if already has data
-            else:
-                days_added += 1
-            
-            # Extract values for this day
-            pv_val = pv_daily[day - 1] if day <= len(pv_daily) else 0.0
-            grid_val = grid_daily[day - 1] if day <= len(grid_daily) else 0.0
-            load_val = load_daily[day - 1] if day <= len(load_daily) else 0.0
-            essential_val = essential_daily[day - 1] if day <= len(essential_daily) else 0.0
-            charge_val = bat_daily[day - 1] if day <= len(bat_daily) else 0.0
-            discharge_val = batf_daily[day - 1] if day <= len(batf_daily) else 0.0
+        # Check if day already exists and has data
+        existing = daily.get(date_str)
+        if existing:
+            # Check if existing has real data
+            has_existing_data = any(
+                float(existing.get(key, 0.0)) > 0.0
+                for key in ["pv", "grid", "load", "essential"]
+            )
             
-            # Calculate derived values
-            total_load_val = round(load_val + essential_val, 1)
-            saved_kwh = max(0.0, total_load_val - grid_val)
-            savings_vnd = round(saved_kwh * DEFAULT_TARIFF_VND_PER_KWH, 0)
+            # Check if API has data for this day
+            has_api_data = (
+                day <= len(pv_daily) and pv_daily[day - 1] > 0.0 or
+                day <= len(grid_daily) and grid_daily[day - 1] > 0.0 or
+                day <= len(load_daily) and load_daily[day - 1] > 0.0
+            )
             
-            # Update cache
-            daily[date_str] = {
-                "pv": round(pv_val, 1),
-                "grid": round(grid_val, 1),
-                "load": round(load_val, 1),
-                "essential": round(essential_val, 1),
-                "total_load": total_load_val,
-                "charge": round(charge_val, 1),
-                "discharge": round(discharge_val, 1),
-                "saved_kwh": round(saved_kwh, 1),
-                "savings_vnd": savings_vnd,
-            }
+            # Only update if API has data and existing doesn't
+            if has_api_data and not has_existing_data:
+                days_updated += 1
+            else:
+                continue  # Skip if already has data
+        else:
+            days_added += 1
         
-        return days_added, days_updated
-    except Exception as err:
-        _LOGGER.error(f"Error backfilling month {year}-{month:02d}: {err}")
-        return 0, 0
+        # Extract values for this day
+        pv_val = pv_daily[day - 1] if day <= len(pv_daily) else 0.0
+        grid_val = grid_daily[day - 1] if day <= len(grid_daily) else 0.0
+        load_val = load_daily[day - 1] if day <= len(load_daily) else 0.0
+        essential_val = essential_daily[day - 1] if day <= len(essential_daily) else 0.0
+        charge_val = bat_daily[day - 1] if day <= len(bat_daily) else 0.0
+        discharge_val = batf_daily[day - 1] if day <= len(batf_daily) else 0.0
+        
+        # Calculate derived values
+        total_load_val = round(load_val + essential_val, 1)
+        saved_kwh = max(0.0, total_load_val - grid_val)
+        savings_vnd = round(saved_kwh * DEFAULT_TARIFF_VND_PER_KWH, 0)
+        
+        # Update cache
+        daily[date_str] = {
+            "pv": round(pv_val, 1),
+            "grid": round(grid_val, 1),
+            "load": round(load_val, 1),
+            "essential": round(essential_val, 1),
+            "total_load": total_load_val,
+            "charge": round(charge_val, 1),
+            "discharge": round(discharge_val, 1),
+            "saved_kwh": round(saved_kwh, 1),
+            "savings_vnd": savings_vnd,
+        }
+    
+    return days_added, days_updated
 
 
+@with_request_priority(PRIORITY_BACKFILL)
 async def smart_backfill(
     hass,
     aggregator,
@@ -176,8 +209,9 @@ async def smart_backfill(
     """Smart backfill using getYearData/getMonthData APIs for optimal performance.
     
     Strategy:
-    1. Use getYearData to quickly identify which years/months have data
-    2. Use getMonthData to backfill months that have data (much faster than daily)
+    1. Use getYearData to quickly identify which years/months have data (all years at once)
+    2. Use getMonthData to backfill months that have data (much faster than daily);
+       all years and months are fetched concurrently, paced by the API rate limiter
     3. Only backfill missing days, skip if already has data
     4. Auto-optimize cache after backfill
     
@@ -215,41 +249,57 @@ async def smart_backfill(
     # Step 2: Backfill months that have data using getMonthData
     _LOGGER.info("Step 2: Backfilling months with data using getMonthData API...")
     
-    for year, months in sorted(years_with_data.items(), reverse=True):
+    async def backfill_year(year: int, months: List[int]) -> Dict[str, Any]:
+        """Fetch all months of a year at once, then merge and save the year cache once."""
         _LOGGER.info(f"Processing year {year} ({len(months)} months with data)")
+        months = sorted(months)
+        cache, *results = await asyncio.gather(
+            hass.async_add_executor_job(cache_io.load_year, device_id, year),
+            *(api_client.get_month_data(device_id, year, month) for month in months),
+            return_exceptions=True,
+        )
+        if isinstance(cache, BaseException):
+            raise cache
         
-        # Load cache for this year
-        cache = await hass.async_add_executor_job(cache_io.load_year, device_id, year)
-        cache_dirty = False
-        
-        for month in sorted(months):
-            try:
-                days_added, days_updated = await backfill_month_from_api(
-                    api_client, device_id, year, month, cache
+        year_stats = {"months": 0, "added": 0, "updated": 0, "errors": 0}
+        for month, month_data in zip(months, results, strict=True):
+            if isinstance(month_data, BaseException):
+                _LOGGER.error(f"Error backfilling {year}-{month:02d}: {month_data}")
+                year_stats["errors"] += 1
+                continue
+            days_added, days_updated = merge_month_data(cache, year, month, month_data)
+            if days_added > 0 or days_updated > 0:
+                year_stats["added"] += days_added
+                year_stats["updated"] += days_updated
+                year_stats["months"] += 1
+                _LOGGER.debug(
+                    f"Month {year}-{month:02d}: added {days_added}, updated {days_updated}"
                 )
-                
-                if days_added > 0 or days_updated > 0:
-                    cache_dirty = True
-                    stats["days_added"] += days_added
-                    stats["days_updated"] += days_updated
-                    stats["months_processed"] += 1
-                    _LOGGER.debug(
-                        f"Month {year}-{month:02d}: added {days_added}, updated {days_updated}"
-                    )
-                
-                # Small delay to avoid rate limiting
-                await asyncio.sleep(0.1)
-            except Exception as err:
-                _LOGGER.error(f"Error backfilling {year}-{month:02d}: {err}")
-                stats["errors"] += 1
         
         # Save cache if modified
-        if cache_dirty:
+        if year_stats["added"] or year_stats["updated"]:
             # Recompute aggregates
             cache = cache_io.recompute_aggregates(cache)
             await hass.async_add_executor_job(cache_io.save_year, device_id, year, cache)
-            stats["years_processed"] += 1
+            year_stats["saved"] = True
             _LOGGER.info(f"Saved cache for year {year}")
+        return year_stats
+    
+    year_results = await asyncio.gather(
+        *(backfill_year(year, months) for year, months in years_with_data.items()),
+        return_exceptions=True,
+    )
+    for year, result in zip(years_with_data, year_results, strict=True):
+        if isinstance(result, BaseException):
+            _LOGGER.error(f"Error backfilling year {year}: {result}")
+            stats["errors"] += 1
+            continue
+        stats["days_added"] += result["added"]
+        stats["days_updated"] += result["updated"]
+        stats["months_processed"] += result["months"]
+        stats["errors"] += result["errors"]
+        if result.get("saved"):
+            stats["years_processed"] += 1
     
     # Step 3: Optimize cache if requested
     if optimize_cache:
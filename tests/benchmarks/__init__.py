@@ -0,0 +1 @@
+"""Micro-benchmarks for Lumentree hot paths (run manually, not collected by pytest)."""
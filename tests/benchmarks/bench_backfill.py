@@ -0,0 +1,184 @@
+"""Benchmark day backfill wall-clock time against the number of days in flight.
+
+Run from the Home Assistant config directory:
+
+    python -m custom_components.lumentree.tests.benchmarks.bench_backfill \
+        [--days 120] [--latency 0.25] [--jitter 0.1] [--error-rate 0.0] \
+        [--rate 200] [--windows 1,2,4,8,16]
+
+A mock lesvr (aiohttp.web on localhost) answers getPVDayData, getBatDayData
+and getOtherDayData after the injected latency (plus random jitter) and
+fails the given share of requests with a 503. StatsAggregator.backfill_days
+fills a fresh cache for each window size through a real
+LumentreeHttpApiClient; the cached days must come out identical. The rate
+limiter starts at --rate requests per second so that the window, not the
+limiter, is what is measured; pass --rate 4 to see the default start rate.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime as dt
+import os
+import random
+import tempfile
+import time
+from typing import Any
+
+import aiohttp
+from aiohttp import web
+from custom_components.lumentree.const import (
+    URL_GET_BAT_DAY_DATA,
+    URL_GET_OTHER_DAY_DATA,
+    URL_GET_PV_DAY_DATA,
+)
+from custom_components.lumentree.core import api_client as api_client_module
+from custom_components.lumentree.core.api_client import LumentreeHttpApiClient
+from custom_components.lumentree.core.rate_limiter import AdaptiveRateLimiter
+from custom_components.lumentree.services import cache as cache_io
+from custom_components.lumentree.services.aggregator import StatsAggregator
+from custom_components.lumentree.services.backfill_pipeline import ConcurrencyWindow
+
+DEVICE_ID = "BENCH0001"
+
+
+def _series(seed: str, scale: int) -> list[int]:
+    rng = random.Random(seed)
+    return [rng.randrange(scale) for _ in range(288)]
+
+
+def _day_payload(endpoint: str, day: str) -> dict[str, Any]:
+    """Deterministic response of a day endpoint (the same for every run)."""
+    rng = random.Random(endpoint + day)
+    if endpoint == URL_GET_PV_DAY_DATA:
+        return {
+            "pv": {"tableValue": rng.randrange(400), "tableValueInfo": _series(day + "pv", 3000)}
+        }
+    if endpoint == URL_GET_BAT_DAY_DATA:
+        return {
+            "bats": [{"tableValue": rng.randrange(100)}, {"tableValue": rng.randrange(100)}],
+            "tableValueInfo": [v - 1500 for v in _series(day + "bat", 3000)],
+        }
+    return {
+        "grid": {"tableValue": rng.randrange(200), "tableValueInfo": _series(day + "grid", 2000)},
+        "homeload": {
+            "tableValue": rng.randrange(300),
+            "tableValueInfo": _series(day + "load", 2000),
+        },
+        "essentialLoad": {"tableValue": rng.randrange(50)},
+    }
+
+
+class _MockLesvr:
+    """Day endpoints of lesvr with injected latency and errors."""
+
+    def __init__(self, latency: float, jitter: float, error_rate: float) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._rng = random.Random(11)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency + self._rng.random() * self.jitter)
+            if self._rng.random() < self.error_rate:
+                return web.Response(status=503)
+            data = _day_payload(request.path, request.query["queryDate"])
+            return web.json_response({"returnValue": 1, "msg": "ok", "data": data})
+        finally:
+            self.in_flight -= 1
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        for path in (URL_GET_PV_DAY_DATA, URL_GET_BAT_DAY_DATA, URL_GET_OTHER_DAY_DATA):
+            app.router.add_get(path, self.handle)
+        return app
+
+
+class _Hass:
+    """What StatsAggregator needs of Home Assistant: an executor."""
+
+    async def async_add_executor_job(self, target, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, target, *args)
+
+
+async def _run(window: int, args: argparse.Namespace, since, until) -> tuple:
+    """Backfill into an empty cache; returns (seconds, cached days, failed attempts)."""
+    with tempfile.TemporaryDirectory() as storage:
+        os.chdir(storage)
+        async with aiohttp.ClientSession() as session:
+            limiter = AdaptiveRateLimiter(rate=args.rate, max_rate=max(args.rate, 10.0))
+            client = LumentreeHttpApiClient(session, rate_limiter=limiter)
+            client.set_token("bench")
+            aggregator = StatsAggregator(_Hass(), client, DEVICE_ID, window)
+            aggregator.backfill_window = ConcurrencyWindow(window, initial=window)  # Fixed size
+            start = time.perf_counter()
+            await aggregator.backfill_days(since, until)
+            elapsed = time.perf_counter() - start
+        daily: dict[str, Any] = {}
+        for year in range(since.year, until.year + 1):
+            daily.update(cache_io.load_year(DEVICE_ID, year, auto_recompute=False)["daily"])
+        return elapsed, daily, client.failed_attempts
+
+
+async def main(args: argparse.Namespace) -> None:
+    server = _MockLesvr(args.latency, args.jitter, args.error_rate)
+    runner = web.AppRunner(server.app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    api_client_module.BASE_URL = f"http://127.0.0.1:{port}"
+
+    until = dt.date(2024, 12, 31)
+    since = until - dt.timedelta(days=args.days - 1)
+    cwd = os.getcwd()
+    print(
+        f"{args.days} days x 3 requests, latency {args.latency * 1000:.0f}"
+        f"+{args.jitter * 1000:.0f} ms, errors {args.error_rate:.0%}, limiter {args.rate} req/s"
+    )
+    print(" window   seconds   days/s  speedup  peak requests  failed")
+    reference = None
+    baseline = None
+    try:
+        for window in args.windows:
+            server.peak_in_flight = 0
+            elapsed, daily, failed = await _run(window, args, since, until)
+            if reference is None:
+                reference, baseline = daily, elapsed
+            elif args.error_rate == 0 and daily != reference:
+                raise SystemExit(f"window {window}: cached days differ from window 1")
+            print(
+                f"{window:7d} {elapsed:9.2f} {len(daily) / elapsed:8.1f} {baseline / elapsed:7.1f}x"
+                f" {server.peak_in_flight:14d} {failed:7d}"
+            )
+    finally:
+        os.chdir(cwd)
+        await runner.cleanup()
+
+
+def _parse() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=120)
+    parser.add_argument("--latency", type=float, default=0.25, help="Seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Random extra seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of 503 answers")
+    parser.add_argument("--rate", type=float, default=200.0, help="Limiter start rate (req/s)")
+    parser.add_argument(
+        "--windows",
+        type=lambda v: [int(x) for x in v.split(",")],
+        default=[1, 2, 4, 8, 16],
+        help="Days in flight to compare, comma separated",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(_parse()))
@@ -0,0 +1,96 @@
+"""Benchmark batch decoding of archived MQTT frames.
+
+Run from the Home Assistant config directory:
+
+    python -m custom_components.lumentree.tests.benchmarks.bench_batch_decode [frames]
+
+The archive holds hex payloads as stored by the raw MQTT sensor: mostly
+151-register main blocks with cell blocks in between. A subset is first checked
+against the per-frame parser, then the per-frame parser, the columnar decoder in
+one process and the process pool are timed.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import random
+import sys
+import time
+
+from custom_components.lumentree.core.batch_decoder import (
+    COLUMN_KEYS,
+    TEXT_KEYS,
+    decode_frames,
+)
+from custom_components.lumentree.core.realtime_parser import (
+    FRAME_SEPARATOR,
+    _crc16_modbus_table,
+    parse_mqtt_payload,
+)
+
+DEFAULT_FRAMES = 100_000
+
+
+def _build_archive(count: int) -> list[str]:
+    """Build hex payloads: 5 main blocks per cell block, a few drifting registers."""
+    rng = random.Random(3)
+    base = bytearray(rng.randrange(256) for _ in range(151 * 2))
+    archive = []
+    for i in range(count):
+        if i % 6 == 5:
+            data = b"".join(rng.randrange(3200, 3400).to_bytes(2, "big") for _ in range(50))
+        else:
+            for reg in (11, 12, 18, 22, 50, 59, 61, 67):
+                base[reg * 2 : reg * 2 + 2] = rng.randrange(65536).to_bytes(2, "big")
+            data = bytes(base)
+        resp = bytes((1, 3, len(data) & 0xFF)) + data
+        resp += _crc16_modbus_table(resp).to_bytes(2, "little")
+        archive.append((b"\x00\x01H240000000" + FRAME_SEPARATOR + resp).hex())
+    return archive
+
+
+def _check(archive: list[str]) -> None:
+    result = decode_frames(archive, max_workers=1)
+    expected = [parse_mqtt_payload(h) for h in archive]
+    expected = [dict(e) for e in expected if e is not None and "battery_cell_info" not in e]
+    assert len(result) == len(expected)
+    for row, values in enumerate(expected):
+        for key in COLUMN_KEYS:
+            got = result.columns[key][row]
+            want = values.get(key)
+            if key in TEXT_KEYS:
+                assert got == want, (row, key)
+            else:
+                assert (want is None and math.isnan(got)) or got == want, (row, key)
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_FRAMES
+    archive = _build_archive(count)
+    _check(archive[:600])
+
+    start = time.perf_counter()
+    for payload in archive:
+        dict(parse_mqtt_payload(payload) or {})  # Records are lazy: force every field
+    per_frame = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rows = len(decode_frames(archive, max_workers=1))
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    decode_frames(archive)
+    pooled = time.perf_counter() - start
+
+    print(f"{count} payloads, {rows} main rows, {os.cpu_count()} CPUs")
+    for name, seconds in (
+        ("parse_mqtt_payload per frame", per_frame),
+        ("decode_frames, 1 process", single),
+        ("decode_frames, process pool", pooled),
+    ):
+        print(f"{name:<30} {seconds:8.2f} s {count / seconds:10.0f} frames/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Benchmark per-key routing of realtime batches against a broadcast to every entity.
+
+Run from the Home Assistant config directory:
+
+    python -m custom_components.lumentree.tests.benchmarks.bench_dispatch
+
+A stream of 151-register frames with a few power registers moving each
+frame goes through the change-driven decoder; every batch is then handed to
+one subscriber per realtime entity, once broadcast (every subscriber checks
+its key) and once through KeyDispatcher. Both must apply the same values.
+"""
+
+from __future__ import annotations
+
+import random
+import time
+
+from custom_components.lumentree.const import (
+    KEY_AC_OUT_POWER,
+    KEY_BATTERY_CELL_INFO,
+    KEY_IS_UPS_MODE,
+    KEY_LOAD_POWER,
+    KEY_ONLINE_STATUS,
+)
+from custom_components.lumentree.core.key_dispatcher import KeyDispatcher
+from custom_components.lumentree.core.realtime_parser import RealtimeDecodeState
+from custom_components.lumentree.core.register_schema import REALTIME_SCHEMA, get_block_decoder
+
+FRAMES = 5000
+# Power registers that move between polls: PV1, grid, battery, load
+MOVING_REGISTERS = (22, 59, 61, 67)
+
+
+class _Entity:
+    """Stand-in for a realtime entity: keeps the values of its keys."""
+
+    __slots__ = ("keys", "values", "calls")
+
+    def __init__(self, keys: tuple) -> None:
+        self.keys = keys
+        self.values = {}
+        self.calls = 0
+
+    def handle(self, data) -> None:
+        self.calls += 1
+        for key in self.keys:
+            if key in data:
+                self.values[key] = data[key]
+
+
+def _entities() -> list:
+    """One subscriber per realtime entity of a device (sensors, cells, total load, binary)."""
+    keys = [(f.key,) for f in REALTIME_SCHEMA]
+    keys += [(KEY_BATTERY_CELL_INFO,), (KEY_LOAD_POWER, KEY_AC_OUT_POWER)]
+    keys += [(KEY_ONLINE_STATUS,), (KEY_IS_UPS_MODE,)]
+    return [_Entity(k) for k in keys]
+
+
+def _batches() -> list:
+    """Change-driven records of a realistic frame stream."""
+    rng = random.Random(7)
+    decoder = get_block_decoder(151)
+    state = RealtimeDecodeState()
+    regs = bytearray(rng.randrange(256) for _ in range(151 * 2))
+    batches = []
+    for _ in range(FRAMES):
+        for reg in rng.sample(MOVING_REGISTERS, rng.randint(0, 3)):
+            regs[reg * 2 : reg * 2 + 2] = rng.randrange(3000).to_bytes(2, "big")
+        record = state.decode(decoder, bytes(regs))
+        if record:
+            batches.append(dict(record))
+    return batches
+
+
+def _run(batches: list, entities: list, dispatch) -> float:
+    start = time.perf_counter()
+    for data in batches:
+        dispatch(data)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    batches = _batches()
+
+    broadcast = _entities()
+
+    def send_all(data) -> None:
+        for entity in broadcast:
+            entity.handle(data)
+
+    routed = _entities()
+    dispatcher = KeyDispatcher()
+    for entity in routed:
+        dispatcher.connect(entity.keys, entity.handle)
+
+    t_broadcast = _run(batches, broadcast, send_all)
+    t_routed = _run(batches, routed, dispatcher.send)
+    if [e.values for e in broadcast] != [e.values for e in routed]:
+        raise SystemExit("Routed entities ended with different values")
+
+    n = len(batches)
+    calls_broadcast = sum(e.calls for e in broadcast)
+    calls_routed = sum(e.calls for e in routed)
+    print(f"{n} batches, {len(routed)} subscribers")
+    print(
+        f"broadcast: {calls_broadcast / n:5.1f} callbacks/batch, "
+        f"{t_broadcast / n * 1e6:6.2f} us/batch"
+    )
+    print(
+        f"per-key:   {calls_routed / n:5.1f} callbacks/batch, "
+        f"{t_routed / n * 1e6:6.2f} us/batch (values identical)"
+    )
+
+
+if __name__ == "__main__":
+    main()
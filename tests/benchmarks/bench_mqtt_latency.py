@@ -0,0 +1,215 @@
+"""Benchmark publish-to-delivery latency of the MQTT transports end to end.
+
+Run from the Home Assistant config directory:
+
+    python -m custom_components.lumentree.tests.benchmarks.bench_mqtt_latency \
+        [--transport asyncio|paho] [--host HOST --port PORT] [messages]
+
+Without --host a minimal QoS 0 broker is started in-process on localhost; with
+it, any MQTT 3.1.1 broker (e.g. a local mosquitto) can be used. A simulated
+inverter publishes 151-register responses on reportApp/{sn}; the time from its
+publish until the decoded record reaches LumentreeMqttClient's batch queue is
+measured one message at a time, then for a burst. The paho transport needs
+paho-mqtt installed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Any
+from unittest.mock import MagicMock
+
+from custom_components.lumentree.const import (
+    CONF_MQTT_TRANSPORT,
+    DATA_MQTT_HUB,
+    MQTT_TRANSPORT_ASYNCIO,
+    MQTT_TRANSPORT_PAHO,
+)
+from custom_components.lumentree.core import mqtt_hub
+from custom_components.lumentree.core.mqtt_asyncio import (
+    CONNECT,
+    DISCONNECT,
+    PINGREQ,
+    PUBLISH,
+    SUBSCRIBE,
+    encode_connect,
+    encode_publish,
+    parse_publish,
+    read_packet,
+)
+from custom_components.lumentree.core.mqtt_client import LumentreeMqttClient
+from custom_components.lumentree.core.realtime_parser import (
+    FRAME_SEPARATOR,
+    _crc16_modbus_table,
+)
+
+DEFAULT_MESSAGES = 2000
+DEVICE_SN = "H240000000"
+
+
+class _Broker:
+    """Forwards QoS 0 publishes to the connections subscribed to the exact topic."""
+
+    def __init__(self) -> None:
+        self.subscribers: dict[str, set[asyncio.StreamWriter]] = {}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                packet_type, flags, body = await read_packet(reader)
+                if packet_type == CONNECT:
+                    writer.write(b"\x20\x02\x00\x00")
+                elif packet_type == SUBSCRIBE:
+                    pos, granted = 2, b""
+                    while pos < len(body):
+                        length = int.from_bytes(body[pos : pos + 2], "big")
+                        topic = body[pos + 2 : pos + 2 + length].decode()
+                        self.subscribers.setdefault(topic, set()).add(writer)
+                        pos += length + 3
+                        granted += b"\x00"
+                    writer.write(bytes((0x90, 2 + len(granted))) + body[:2] + granted)
+                elif packet_type == PUBLISH:
+                    topic, payload, _packet_id = parse_publish(flags, body)
+                    packet = encode_publish(topic, payload)
+                    for subscriber in self.subscribers.get(topic, ()):
+                        subscriber.write(packet)
+                elif packet_type == PINGREQ:
+                    writer.write(b"\xd0\x00")
+                elif packet_type == DISCONNECT:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        for subscribers in self.subscribers.values():
+            subscribers.discard(writer)
+        writer.close()
+
+
+class _FakeHass:
+    """The parts of HomeAssistant the MQTT client and hubs use."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self.data: dict[str, Any] = {}
+
+    async def async_add_executor_job(self, target, *args):
+        return await self.loop.run_in_executor(None, target, *args)
+
+    def async_create_task(self, coro):
+        return self.loop.create_task(coro)
+
+
+class _TimedClient(LumentreeMqttClient):
+    """Records when each decoded record reaches the batch queue."""
+
+    __slots__ = ()
+
+    delivered: list[float] = []
+    waiter: asyncio.Future | None = None
+    expected = 0
+
+    def _queue_update(self, data) -> None:
+        cls = _TimedClient
+        cls.delivered.append(time.perf_counter())
+        if cls.waiter is not None and len(cls.delivered) >= cls.expected:
+            cls.waiter.set_result(None)
+            cls.waiter = None
+
+    def _start_offline_timer(self) -> None:
+        pass
+
+
+def _frame(counter: int) -> bytes:
+    """A 151-register response whose register 11 changes every message."""
+    data = bytearray(151 * 2)
+    data[22:24] = (counter & 0xFFFF).to_bytes(2, "big")
+    resp = bytes((1, 3, len(data) & 0xFF)) + data
+    resp += _crc16_modbus_table(resp).to_bytes(2, "little")
+    return b"\x00\x01" + DEVICE_SN.encode() + FRAME_SEPARATOR + resp
+
+
+async def _run(transport: str, host: str, port: int, messages: int) -> None:
+    loop = asyncio.get_running_loop()
+    hass = _FakeHass(loop)
+    entry = MagicMock(options={CONF_MQTT_TRANSPORT: transport})
+    client = _TimedClient(hass, entry, DEVICE_SN, DEVICE_SN)
+
+    # Point the shared hub at the benchmark broker before the client joins it
+    hub = mqtt_hub.async_get_mqtt_hub(hass, DEVICE_SN, transport)
+    hub._host, hub._port = host, port
+    await client.connect()
+
+    # The simulated inverter on its own connection
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(encode_connect("bench-inverter", None, None, 60))
+    await read_packet(reader)
+    topic = f"reportApp/{DEVICE_SN}"
+    payloads = [encode_publish(topic, _frame(i)) for i in range(messages * 2 + 100)]
+
+    async def deliver(first: int, count: int) -> list[float]:
+        _TimedClient.delivered = []
+        _TimedClient.expected = count
+        _TimedClient.waiter = loop.create_future()
+        sent = []
+        for payload in payloads[first : first + count]:
+            sent.append(time.perf_counter())
+            writer.write(payload)
+        await asyncio.wait_for(_TimedClient.waiter, 30)
+        return [(d - s) * 1e6 for s, d in zip(sent, _TimedClient.delivered, strict=True)]
+
+    await asyncio.sleep(0.2)  # Let the subscription settle
+    for i in range(100):
+        await deliver(i, 1)  # Warm-up
+
+    latencies = []
+    for i in range(messages):
+        latencies += await deliver(100 + i, 1)
+    start = time.perf_counter()
+    await deliver(100 + messages, messages)
+    burst = time.perf_counter() - start
+
+    writer.close()
+    await client.disconnect()
+    assert DATA_MQTT_HUB not in hass.data
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))]  # noqa: E731
+    print(f"{transport} transport, {messages} messages via {host}:{port}")
+    print(
+        f"latency us: p50 {pct(0.5):7.0f}  p90 {pct(0.9):7.0f}  p99 {pct(0.99):7.0f}  "
+        f"max {latencies[-1]:7.0f}  mean {statistics.fmean(latencies):7.0f}"
+    )
+    print(f"burst: {messages / burst:8.0f} messages/s")
+
+
+async def _main(args: argparse.Namespace) -> None:
+    server = None
+    host, port = args.host, args.port
+    if host is None:
+        broker = _Broker()
+        server = await asyncio.start_server(broker.handle, "127.0.0.1", 0)
+        host, port = "127.0.0.1", server.sockets[0].getsockname()[1]
+    try:
+        await _run(args.transport, host, port, args.messages)
+    finally:
+        if server is not None:
+            server.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--transport",
+        choices=(MQTT_TRANSPORT_ASYNCIO, MQTT_TRANSPORT_PAHO),
+        default=MQTT_TRANSPORT_ASYNCIO,
+    )
+    parser.add_argument("--host", help="External broker (default: in-process broker)")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("messages", type=int, nargs="?", default=DEFAULT_MESSAGES)
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark compiled register-schema decoders against a per-field reader.
+
+Run from the Home Assistant config directory:
+
+    python -m custom_components.lumentree.tests.benchmarks.bench_register_decode
+
+Every layout is first checked for identical output (same keys, same value
+types and reprs) before timings are reported.
+"""
+
+from __future__ import annotations
+
+import random
+import struct
+import timeit
+from functools import partial
+
+from custom_components.lumentree.core.register_schema import (
+    REALTIME_SCHEMA,
+    get_block_decoder,
+)
+
+ROUNDS = 20000
+_U16 = struct.Struct(">H")
+_S16 = struct.Struct(">h")
+
+
+def _per_field_decode(db: bytes, num_registers: int) -> dict:
+    """Walk the schema field by field: one bounds check and unpack per value."""
+    out = {}
+    for field in REALTIME_SCHEMA:
+        if field.address is None or field.address + field.width > num_registers:
+            continue
+        offset = field.address * 2
+        if field.ascii:
+            text = str(db[offset : offset + field.width * 2], "ascii", "ignore")
+            text = text.replace("\x00", "").strip()
+            if text:
+                out[field.key] = text
+            continue
+        fmt = _S16 if field.signed else _U16
+        value = round(fmt.unpack_from(db, offset)[0] * field.scale, 3)
+        out[field.key] = field.transform(value) if field.transform else value
+    for field in REALTIME_SCHEMA:
+        if field.derive is not None:
+            value = field.derive(out)
+            if value is not None:
+                out[field.key] = value
+    return out
+
+
+def _canonical(values: dict) -> list:
+    return sorted((k, type(v).__name__, repr(v)) for k, v in values.items())
+
+
+def main() -> None:
+    rng = random.Random(42)
+    for num_registers in (95, 151):
+        decoder = get_block_decoder(num_registers)
+        size = num_registers * 2
+        blocks = [bytes(rng.randrange(256) for _ in range(size)) for _ in range(64)]
+        for db in blocks:
+            if _canonical(_per_field_decode(db, num_registers)) != _canonical(decoder.decode(db)):
+                raise SystemExit(f"Output mismatch for {num_registers}-register layout")
+
+        db = blocks[0]
+        t_field = min(
+            timeit.repeat(partial(_per_field_decode, db, num_registers), number=ROUNDS, repeat=5)
+        )
+        t_plan = min(timeit.repeat(partial(decoder.decode, db), number=ROUNDS, repeat=5))
+        print(
+            f"{num_registers:>3} regs: per-field {t_field / ROUNDS * 1e6:7.2f} us, "
+            f"compiled {t_plan / ROUNDS * 1e6:7.2f} us, speedup x{t_field / t_plan:.1f} "
+            f"(outputs identical)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -19,10 +19,13 @@ from custom_components.lumentree.const import (
 
 
 @pytest.fixture
-def mock_hass() -> HomeAssistant:
+def mock_hass(tmp_path) -> HomeAssistant:
     """Mock Home Assistant instance."""
     hass = MagicMock(spec=HomeAssistant)
     hass.data = {DOMAIN: {}}
+    hass.config = MagicMock()
+    hass.config.time_zone = "UTC"
+    hass.config.path = MagicMock(side_effect=lambda *parts: str(tmp_path.joinpath(*parts)))
     return hass
 
 
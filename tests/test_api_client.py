@@ -0,0 +1,214 @@
+"""Tests for the HTTP API client."""
+
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+from unittest.mock import MagicMock, patch
+
+import pytest
+from custom_components.lumentree.const import (
+    URL_GET_MONTH_DATA,
+    URL_GET_PV_DAY_DATA,
+    URL_GET_SERVER_TIME,
+    URL_GET_YEAR_DATA,
+    URL_SHARE_DEVICES,
+)
+from custom_components.lumentree.core import rate_limiter as rate_limiter_module
+from custom_components.lumentree.core.api_client import LumentreeHttpApiClient
+from custom_components.lumentree.core.exceptions import ApiException
+from custom_components.lumentree.core.rate_limiter import (
+    PRIORITY_BACKFILL,
+    PRIORITY_LIVE,
+    AdaptiveRateLimiter,
+    RequestTicket,
+    async_get_rate_limiter,
+    async_release_rate_limiter,
+    current_priority,
+    with_request_priority,
+)
+from custom_components.lumentree.core.response_cache import (
+    PERMANENT,
+    RECENT_TTL,
+    ResponseCache,
+    response_lifetime,
+)
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_share_one_in_flight():
+    """Test concurrent identical GETs go out once and all get its outcome."""
+    client = LumentreeHttpApiClient(MagicMock())
+    client.set_token("token")
+    sent = []
+    release = asyncio.Event()
+
+    async def send(method, endpoint, params, *args):
+        sent.append((endpoint, dict(params or {})))
+        await release.wait()
+        if params and params.get("queryDate") == "2025-01-02":
+            raise ApiException("API error: boom (code=0)")
+        return {"returnValue": 1, "data": {"pv": {"tableValue": 12}}}
+
+    with patch.object(LumentreeHttpApiClient, "_send_request", side_effect=send):
+        day = {"deviceId": "D1", "queryDate": "2025-01-01"}
+        same_day = {"queryDate": "2025-01-01", "deviceId": "D1"}  # Same params, other order
+        tasks = [
+            asyncio.ensure_future(client._request("GET", URL_GET_PV_DAY_DATA, params=day)),
+            asyncio.ensure_future(client._request("GET", URL_GET_PV_DAY_DATA, params=same_day)),
+            asyncio.ensure_future(client._fetch_pv_data(day)),
+            asyncio.ensure_future(
+                client._request("GET", URL_GET_PV_DAY_DATA, params={**day, "queryDate": "2025-01-02"})
+            ),
+            asyncio.ensure_future(
+                client._request("GET", URL_GET_PV_DAY_DATA, params={**day, "queryDate": "2025-01-02"})
+            ),
+            asyncio.ensure_future(client._request("POST", URL_SHARE_DEVICES, params=day)),
+            asyncio.ensure_future(client._request("POST", URL_SHARE_DEVICES, params=day)),
+        ]
+        await asyncio.sleep(0)
+        # A cancelled caller does not cancel the request the others wait for
+        cancelled = asyncio.ensure_future(client._request("GET", URL_GET_PV_DAY_DATA, params=day))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert len(sent) == 4  # One per distinct GET, every POST
+    assert results[0] == results[1] and results[0] is not results[1]  # One copy per caller
+    results[0]["data"]["pv"]["tableValue"] = 0
+    assert results[1]["data"]["pv"]["tableValue"] == 12
+    assert results[2] == {"pv_today": 1.2}
+    assert isinstance(results[3], ApiException) and results[3] is results[4]
+    stats = client.request_stats
+    assert (stats["sent"], stats["coalesced"], stats["in_flight"]) == (4, 4, 0)
+
+    # Finished requests are not reused
+    with patch.object(LumentreeHttpApiClient, "_send_request", side_effect=send):
+        await client._request("GET", URL_GET_PV_DAY_DATA, params=day)
+    assert client.request_stats["sent"] == 5
+
+
+def test_response_lifetime_by_period():
+    """Test finalized periods are permanent, recent ones short-lived, future ones uncached."""
+    today = dt.date(2025, 3, 1)
+
+    def day(query_date):
+        return response_lifetime(URL_GET_PV_DAY_DATA, {"queryDate": query_date}, today)
+
+    def month(year, month):
+        return response_lifetime(URL_GET_MONTH_DATA, {"year": year, "month": month}, today)
+
+    def year(year):
+        return response_lifetime(URL_GET_YEAR_DATA, {"year": year}, today)
+
+    assert day("2025-02-27") == PERMANENT
+    assert day("2025-02-28") == RECENT_TTL
+    assert day("2025-03-01") == RECENT_TTL
+    assert day("2025-03-02") is None
+    # February ended yesterday: late uploads may still change it
+    assert month("2025", "2") == RECENT_TTL
+    assert month("2025", "1") == PERMANENT
+    assert month("2024", "12") == PERMANENT
+    assert year("2024") == PERMANENT
+    assert year("2025") == RECENT_TTL
+    assert year("2026") is None
+    assert response_lifetime(URL_GET_SERVER_TIME, None, today) is None
+    assert response_lifetime(URL_GET_PV_DAY_DATA, {"queryDate": "garbage"}, today) is None
+
+
+@pytest.mark.asyncio
+async def test_response_cache_memory_and_disk_tiers(tmp_path):
+    """Test past periods are served from memory, then from disk after a restart."""
+    sent = []
+
+    async def send(method, endpoint, params, *args):
+        sent.append(dict(params))
+        return {"returnValue": 1, "data": {"pv": {"tableValueInfo": [10] * 12}}}
+
+    past_year = {"deviceId": "D1", "year": "2020"}
+    today = {"deviceId": "D1", "queryDate": dt.date.today().isoformat()}
+    now = [0.0]
+    with patch.object(LumentreeHttpApiClient, "_send_request", side_effect=send):
+        cache = ResponseCache(str(tmp_path), clock=lambda: now[0])
+        client = LumentreeHttpApiClient(MagicMock(), cache)
+        first = await client.get_year_data("D1", 2020)
+        assert await client.get_year_data("D1", 2020) == first
+        await client._request("GET", URL_GET_PV_DAY_DATA, params=today)
+        await client._request("GET", URL_GET_PV_DAY_DATA, params=today)
+        now[0] += RECENT_TTL
+        await client._request("GET", URL_GET_PV_DAY_DATA, params=today)
+        assert len(sent) == 3  # Past year once, today twice (TTL expired)
+
+        # New client (restart): the past year comes from disk, today from the server
+        restarted = LumentreeHttpApiClient(MagicMock(), ResponseCache(str(tmp_path)))
+        assert await restarted.get_year_data("D1", 2020) == first
+        await restarted._request("GET", URL_GET_PV_DAY_DATA, params=today)
+        assert len(sent) == 4
+        stats = restarted.request_stats["cache"]
+        assert stats["hits_disk"] == 1 and stats["misses"] == 1
+
+        # Purging the device forgets both tiers
+        await restarted.async_purge_response_cache("D1")
+        await restarted._request("GET", URL_GET_YEAR_DATA, params=past_year)
+        assert len(sent) == 5
+
+    assert client.request_stats["cache"]["hits_memory"] == 2
+
+    # Periods are judged by the cache's date (Home Assistant's time zone), not the host's
+    sent.clear()
+    with patch.object(LumentreeHttpApiClient, "_send_request", side_effect=send):
+        cache = ResponseCache(clock=lambda: now[0], today=lambda: dt.date(2025, 3, 1))
+        client = LumentreeHttpApiClient(MagicMock(), cache)
+        yesterday = {"deviceId": "D1", "queryDate": "2025-02-28"}
+        await client._request("GET", URL_GET_PV_DAY_DATA, params=yesterday)
+        now[0] += RECENT_TTL
+        await client._request("GET", URL_GET_PV_DAY_DATA, params=yesterday)
+        assert len(sent) == 2  # Still recent there, so not kept for good
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_serves_priorities_and_adapts():
+    """Test live requests overtake queued backfill and the rate follows errors."""
+    limiter = AdaptiveRateLimiter(rate=50.0, max_rate=100.0, burst=1)
+    order = []
+
+    async def request(name, priority):
+        await limiter.acquire(RequestTicket(priority))
+        order.append(name)
+
+    await request("first", PRIORITY_BACKFILL)  # Takes the only token
+    backfill = [
+        asyncio.ensure_future(request(f"backfill{i}", PRIORITY_BACKFILL)) for i in range(3)
+    ]
+    await asyncio.sleep(0)
+    live = asyncio.ensure_future(request("live", PRIORITY_LIVE))
+    await asyncio.gather(*backfill, live)
+    assert order == ["first", "live", "backfill0", "backfill1", "backfill2"]
+    assert limiter.as_dict()["queued"] == 4
+
+    with patch.object(rate_limiter_module, "ERROR_BACKOFF", 0.05):
+        limiter.record_error()
+        assert limiter.rate == 25.0
+        limiter.record_error()  # Same burst of failures: decreased and paused once
+        assert limiter.rate == 25.0 and limiter.errors == 2
+        # No request goes out during the pause, however high the rate
+        assert await limiter.acquire(RequestTicket(PRIORITY_LIVE)) >= 0.04
+        limiter.record_error()  # Another error after the pause: twice as long
+        assert await limiter.acquire(RequestTicket(PRIORITY_LIVE)) >= 0.09
+    limiter.record_success(0.1)
+    assert limiter.rate > 25.0
+
+    @with_request_priority(PRIORITY_LIVE)
+    async def live_update():
+        return current_priority()
+
+    assert await live_update() == PRIORITY_LIVE
+    assert current_priority() != PRIORITY_LIVE
+
+    # One limiter per Home Assistant instance, dropped with the last entry
+    hass = MagicMock(data={})
+    shared = async_get_rate_limiter(hass)
+    assert async_get_rate_limiter(hass) is shared
+    async_release_rate_limiter(hass)
+    assert not hass.data and async_get_rate_limiter(hass) is not shared
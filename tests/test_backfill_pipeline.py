@@ -0,0 +1,117 @@
+"""Tests for the pipelined day backfill."""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import aclosing
+from unittest.mock import patch
+
+import pytest
+from custom_components.lumentree.services import cache as cache_io
+from custom_components.lumentree.services.backfill_pipeline import (
+    ConcurrencyWindow,
+    fetch_in_order,
+)
+from custom_components.lumentree.services.smart_backfill import smart_backfill
+
+
+@pytest.mark.asyncio
+async def test_fetch_in_order_keeps_order_and_adapts_window():
+    """Test days run concurrently, come back in order and errors halve the window once."""
+    window = ConcurrencyWindow(8, initial=4)
+    failures = [0]
+    running = [0]
+    peak = [0]
+
+    async def fetch(day):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.001 * (10 - day % 10))  # Later days finish first
+        running[0] -= 1
+        if day == 12:
+            raise ValueError("boom")
+        if day == 13:
+            failures[0] += 1  # Failed attempt hidden by the fetch
+        return day * 10
+
+    days = list(range(20))
+    results = []
+    async with aclosing(fetch_in_order(days, fetch, window, lambda: failures[0])) as it:
+        async for day, value in it:
+            results.append((day, value))
+
+    assert [day for day, _ in results] == days
+    assert isinstance(results[12][1], ValueError)
+    assert results[11] == (11, 110) and results[13] == (13, 130)
+    assert peak[0] > 1
+    # Grew while clean, then one halving for days 12 and 13 (in flight together)
+    assert window.size < window.max_size
+    assert window.as_dict()["launched"] == 20
+
+    # Stopping early cancels the days still in flight
+    started = []
+
+    async def slow(day):
+        started.append(day)
+        await asyncio.sleep(10)
+
+    async def first(day):
+        return day if day == 0 else await slow(day)
+
+    async with aclosing(fetch_in_order(range(100), first, ConcurrencyWindow(4, initial=4))) as it:
+        async for day, value in it:
+            assert (day, value) == (0, 0)
+            break
+    assert len(started) == 3
+
+
+@pytest.mark.asyncio
+async def test_smart_backfill_fans_out_and_saves_each_year_once():
+    """Test years and months are fetched concurrently and each year is saved once."""
+    running = [0]
+    peak = [0]
+
+    async def slow(result):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.01)
+        running[0] -= 1
+        return result
+
+    class FakeApi:
+        async def get_year_data(self, device_id, year):
+            return await slow({"pv": [1.0 if year % 2 else 0.0] * 12})
+
+        async def get_month_data(self, device_id, year, month):
+            if (year, month) == (2025, 6):
+                raise ValueError("boom")
+            return await slow({"pv": [2.0] * 31, "grid": [], "homeload": []})
+
+    class FakeHass:
+        async def async_add_executor_job(self, target, *args):
+            return target(*args)
+
+    class FakeAggregator:
+        _device_id = "DEV"
+        _api = FakeApi()
+
+    saved = []
+    with patch.object(cache_io, "load_year", lambda device_id, year: {"daily": {}}), patch.object(
+        cache_io, "recompute_aggregates", lambda cache: cache
+    ), patch.object(
+        cache_io, "save_year", lambda device_id, year, cache: saved.append((year, cache))
+    ):
+        stats = await smart_backfill(
+            FakeHass(), FakeAggregator(), max_years=6, optimize_cache=False
+        )
+
+    odd_years = sorted(year for year in stats["years_with_data"])
+    assert len(odd_years) == 3 and all(year % 2 for year in odd_years)
+    assert sorted(year for year, _ in saved) == odd_years  # Once per year
+    assert peak[0] > 12  # Years, then every month of every year, in flight together
+    failed = 1 if 2025 in odd_years else 0
+    assert stats["errors"] == failed
+    assert stats["months_processed"] == 36 - failed
+    assert stats["years_processed"] == 3
+    for year, cache in saved:
+        assert f"{year}-01-31" in cache["daily"] and f"{year}-02-29" not in cache["daily"]
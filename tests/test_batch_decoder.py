@@ -0,0 +1,79 @@
+"""Tests for batch decoding of archived MQTT frames."""
+
+from __future__ import annotations
+
+import math
+
+from custom_components.lumentree.core.batch_decoder import (
+    COLUMN_KEYS,
+    TEXT_KEYS,
+    decode_chunk,
+    decode_file,
+    decode_frames,
+)
+from custom_components.lumentree.core.realtime_parser import (
+    calculate_crc16_modbus,
+    parse_mqtt_frame,
+)
+
+
+def _build_frame(data: bytes) -> bytes:
+    """Build an MQTT payload wrapping a Modbus read response with valid CRC."""
+    resp = bytes([1, 3, len(data) & 0xFF]) + data
+    resp += calculate_crc16_modbus(resp).to_bytes(2, "little")
+    return b"\x00\x01TEST123456" + b"++++" + resp
+
+
+def _main_frame(num_registers: int, soc: int, grid_power: int) -> bytes:
+    regs = bytearray(num_registers * 2)
+    regs[50 * 2 : 50 * 2 + 2] = soc.to_bytes(2, "big")
+    regs[59 * 2 : 59 * 2 + 2] = grid_power.to_bytes(2, "big", signed=True)
+    regs[150 * 2 : 150 * 2 + 2] = b"\x00\x01"  # Save Money Mode (151-register block only)
+    return _build_frame(bytes(regs[: num_registers * 2]))
+
+
+def test_decode_chunk_matches_realtime_parser():
+    """Test columns hold the same values as the per-frame parser, NaN/None when absent."""
+    frames = [_main_frame(151, 80, 120), _main_frame(95, 81, -40), _main_frame(151, 82, 0)]
+    cells = _build_frame((3300).to_bytes(2, "big") + bytes(98))
+    archive = [frames[0], "zz", frames[1].hex(), cells, frames[2]]
+
+    result = decode_chunk(archive)
+
+    assert list(result.frame_index) == [0, 2, 4]
+    assert set(result.columns) == set(COLUMN_KEYS)
+    assert list(result.columns["battery_soc"]) == [80.0, 81.0, 82.0]
+    assert result.columns["grid_status"] == ["Importing", "Exporting", "Exporting"]
+    assert result.columns["work_mode"] == ["Save Money Mode", None, "Save Money Mode"]
+    assert result.layout_counts == {"main_151": 2, "invalid_hex": 1, "main_95": 1, "cells": 1}
+
+    for row, frame in enumerate(frames):
+        expected = parse_mqtt_frame(frame)
+        for key in COLUMN_KEYS:
+            value = result.columns[key][row]
+            if key in TEXT_KEYS:
+                assert value == expected.get(key)
+            elif expected.get(key) is None:
+                assert math.isnan(value)
+            else:
+                assert value == expected[key]
+
+
+def test_decode_frames_chunks_in_order(tmp_path):
+    """Test chunked decoding keeps input order and merges layout counts."""
+    frames = [_main_frame(151, soc, 10) for soc in range(10)]
+    corrupted = bytearray(frames[3])
+    corrupted[-1] ^= 0xFF
+    frames[3] = bytes(corrupted)
+
+    result = decode_frames(frames, chunk_size=4, max_workers=1)
+    assert list(result.frame_index) == [0, 1, 2, 4, 5, 6, 7, 8, 9]
+    assert list(result.columns["battery_soc"]) == [0, 1, 2, 4, 5, 6, 7, 8, 9]
+    assert result.layout_counts == {"main_151": 9, "crc_error": 1}
+
+    archive = tmp_path / "raw.csv"
+    lines = [f"2026-10-18T00:00:{i:02d},{frame.hex()}\n" for i, frame in enumerate(frames)]
+    archive.write_text("".join(lines))
+    assert list(decode_file(archive, chunk_size=3, max_workers=1).frame_index) == list(
+        result.frame_index
+    )
@@ -12,6 +12,12 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 
 from custom_components.lumentree.config_flow import LumentreeConfigFlow
+from custom_components.lumentree.const import (
+    CONF_MQTT_TRANSPORT,
+    CONF_POLL_MAX_INTERVAL,
+    CONF_POLL_MIN_INTERVAL,
+    MQTT_TRANSPORT_PAHO,
+)
 
 
 @pytest.mark.asyncio
@@ -46,3 +52,31 @@ async def test_config_flow_invalid_input(mock_hass: HomeAssistant):
     # Should show errors
     assert result is not None
 
+
+
+@pytest.mark.asyncio
+async def test_options_flow(mock_config_entry: ConfigEntry):
+    """Test the options flow shows the entry options and validates the poll bounds."""
+    mock_config_entry.options = {CONF_POLL_MIN_INTERVAL: 3}
+    flow = LumentreeConfigFlow.async_get_options_flow(mock_config_entry)
+    flow.async_show_form = MagicMock(return_value={"type": "form"})
+    flow.async_create_entry = MagicMock(return_value={"type": "create_entry"})
+
+    await flow.async_step_init()
+    schema = flow.async_show_form.call_args.kwargs["data_schema"]
+    defaults = {str(key): key.default() for key in schema.schema}
+    assert defaults[CONF_POLL_MIN_INTERVAL] == 3
+    assert defaults[CONF_MQTT_TRANSPORT] == MQTT_TRANSPORT_PAHO
+
+    options = {
+        **defaults,
+        CONF_POLL_MIN_INTERVAL: 30,
+        CONF_POLL_MAX_INTERVAL: 10,
+    }
+    await flow.async_step_init(options)
+    assert flow.async_show_form.call_args.kwargs["errors"] == {"base": "poll_interval_range"}
+    flow.async_create_entry.assert_not_called()
+
+    options[CONF_POLL_MAX_INTERVAL] = 60
+    await flow.async_step_init(options)
+    flow.async_create_entry.assert_called_once_with(title="", data=options)
@@ -4,29 +4,93 @@ from __future__ import annotations
 
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import asyncio
+
 import pytest
 
+from custom_components.lumentree.core import realtime_parser
 from custom_components.lumentree.core.mqtt_client import LumentreeMqttClient
-from custom_components.lumentree.core.realtime_parser import parse_mqtt_payload
+from custom_components.lumentree.const import CONF_MQTT_TRANSPORT, MQTT_TRANSPORT_PAHO
+from custom_components.lumentree.core.mqtt_asyncio import (
+    CONNECT,
+    PUBLISH,
+    SUBSCRIBE,
+    LumentreeAsyncioMqttHub,
+    encode_publish,
+    parse_publish,
+    read_packet,
+)
+from custom_components.lumentree.core.key_dispatcher import (
+    async_key_dispatcher_connect,
+    async_key_dispatcher_send,
+)
+from custom_components.lumentree.core.mailbox import FrameMailbox
+from custom_components.lumentree.core.mqtt_hub import LumentreeMqttHub, MqttHubBase
+from custom_components.lumentree.core.poll_plan import CELLS_TIER, MAIN_TIER, PollPlan
+from custom_components.lumentree.core.poll_scheduler import AdaptivePollScheduler
+from custom_components.lumentree.core.read_planner import plan_read_ranges, range_schema
+from custom_components.lumentree.core.request_tracker import RequestTracker
+from custom_components.lumentree.core.realtime_parser import (
+    BatteryCellInfo,
+    FrameExtractor,
+    _extract_response,
+    RealtimeDecodeState,
+    calculate_crc16_modbus,
+    generate_modbus_read_command,
+    parse_mqtt_frame,
+    parse_mqtt_frames,
+    parse_mqtt_payload,
+    verify_frame_crc,
+)
+from custom_components.lumentree.core.write_throttle import (
+    HOLD,
+    SKIP,
+    WRITE,
+    WriteThrottle,
+    resolve_throttle,
+)
+from custom_components.lumentree.core.register_schema import (
+    REALTIME_SCHEMA,
+    RealtimeRecord,
+    RegisterField,
+    get_block_decoder,
+)
+
+
+def _build_frame(data: bytes, func_code: int = 3) -> bytes:
+    """Build an MQTT payload wrapping a Modbus read response with valid CRC."""
+    resp = bytes([1, func_code, len(data) & 0xFF]) + data
+    resp += calculate_crc16_modbus(resp).to_bytes(2, "little")
+    return b"\x00\x01TEST123456" + b"++++" + resp
 
 
 @pytest.mark.asyncio
 async def test_mqtt_connect_success(mock_hass, mock_config_entry, mock_mqtt_client):
     """Test successful MQTT connection."""
+    mock_hass.loop = asyncio.get_running_loop()
+    mock_hass.async_add_executor_job = AsyncMock(side_effect=lambda target, *args: target(*args))
     with patch("paho.mqtt.client.Client") as mock_client_class:
         mock_client = MagicMock()
         mock_client_class.return_value = mock_client
         mock_client.connect = MagicMock(return_value=0)
         mock_client.subscribe = MagicMock(return_value=(0, 1))
+        # The broker accepts as soon as the network loop runs
+        mock_client.loop_start.side_effect = lambda: mock_client.on_connect(
+            mock_client, None, {}, 0
+        )
+        mock_config_entry.options = {CONF_MQTT_TRANSPORT: MQTT_TRANSPORT_PAHO}
         
         client = LumentreeMqttClient(mock_hass, mock_config_entry, "TEST123", "TEST123")
+        await client.connect()
+        
+        # Verify the shared connection was made and the device topic subscribed
+        mock_client.connect.assert_called_once()
+        assert isinstance(client.hub, LumentreeMqttHub)
+        assert client.hub.is_connected
+        mock_client.subscribe.assert_called_with("reportApp/TEST123", 0)
         
-        # Mock the connection callback
-        with patch.object(client, "_on_connect") as mock_on_connect:
-            await client.connect()
-            
-            # Verify connection was attempted
-            assert mock_client.connect.called
+        await client.disconnect()
+        mock_client.loop_stop.assert_called_once()
 
 
 def test_parse_mqtt_payload_valid(mock_hass, sample_mqtt_payload):
@@ -50,18 +114,495 @@ def test_parse_mqtt_payload_empty():
     assert result is None
 
 
+def test_parse_mqtt_frame_matches_hex_path():
+    """Test bytes entry point returns the same data as the hex entry point."""
+    regs = bytearray(95 * 2)
+    regs[11 * 2 : 11 * 2 + 2] = (5230).to_bytes(2, "big")  # Battery voltage 52.30 V
+    regs[50 * 2 : 50 * 2 + 2] = (87).to_bytes(2, "big")  # SOC 87 %
+    payload = _build_frame(bytes(regs))
+
+    result = parse_mqtt_frame(payload)
+
+    assert result is not None
+    assert result["battery_voltage"] == 52.3
+    assert result["battery_soc"] == 87
+    assert parse_mqtt_frame(memoryview(payload)) == result
+    assert parse_mqtt_payload(payload.hex()) == result
+
+    # The response is a view into the caller's buffer, not a copy
+    buffer = bytearray(payload)
+    resp = _extract_response(memoryview(buffer))
+    assert resp is not None and resp.obj is buffer
+    assert _extract_response(memoryview(b"x++++" + payload)) is None  # Two separators
+
+
+def test_parse_mqtt_frame_bad_crc():
+    """Test corrupted frames are rejected on the bytes path."""
+    payload = bytearray(_build_frame(bytes(95 * 2)))
+    payload[-1] ^= 0xFF
+    assert parse_mqtt_frame(bytes(payload)) is None
+
+
+def test_parse_battery_cells():
+    """Test the cell block decodes to compact voltages with statistics."""
+    cells = [3312, 3330, 0, 3301] + [0] * 46  # Empty slot 3 is skipped
+    payload = _build_frame(b"".join(mv.to_bytes(2, "big") for mv in cells))
+
+    info = parse_mqtt_frame(payload)["battery_cell_info"]
+
+    assert isinstance(info, BatteryCellInfo)
+    assert info.positions == (0, 1, 3)
+    assert info.millivolts == (3312, 3330, 3301)
+    assert (info.number_of_cells, info.min, info.max, info.diff) == (3, 3.301, 3.33, 0.029)
+    assert info.as_attributes()["cells"] == {"c_01": 3.312, "c_02": 3.33, "c_04": 3.301}
+    assert parse_mqtt_frame(payload)["battery_cell_info"] == info
+
+
+def test_crc16_modbus_builtin():
+    """Test the built-in CRC16/Modbus against the standard check value."""
+    assert calculate_crc16_modbus(b"123456789") == 0x4B37
+    assert calculate_crc16_modbus(memoryview(b"123456789")) == 0x4B37
+    assert generate_modbus_read_command(1, 3, 0, 151) == "0103000000970464"
+    assert verify_frame_crc(bytes.fromhex("010300fa0032e42e")) == (True, None)
+    assert verify_frame_crc(bytes.fromhex("010300fa0032e42f"))[0] is False
+
+
+def test_crc16_modbus_uses_crcmod_extension():
+    """Test the crcmod C extension is used for CRCs when it is installed."""
+    pytest.importorskip("crcmod._crcfunext")
+    assert realtime_parser.crc16_modbus_func is realtime_parser._crc16_modbus_crcmod
+    assert calculate_crc16_modbus(b"123456789") == 0x4B37
+    assert calculate_crc16_modbus(memoryview(b"123456789")) == 0x4B37
+
+
+def test_register_schema_decoder():
+    """Test schema decoders respect block size, transforms and derived values."""
+    assert len({field.key for field in REALTIME_SCHEMA}) == len(REALTIME_SCHEMA)
+
+    regs = bytearray(151 * 2)
+    regs[24 * 2 : 24 * 2 + 2] = (1255).to_bytes(2, "big")  # 25.5 °C
+    regs[61 * 2 : 61 * 2 + 2] = (-300).to_bytes(2, "big", signed=True)  # Charging 300 W
+    regs[150 * 2 : 150 * 2 + 2] = (1).to_bytes(2, "big")  # Save Money Mode
+
+    full = get_block_decoder(151).decode(bytes(regs))
+    assert full["device_temperature"] == 25.5
+    assert full["battery_power"] == 300
+    assert full["battery_status"] == "Charging"
+    assert full["work_mode"] == "Save Money Mode"
+
+    legacy = get_block_decoder(95).decode(bytes(regs[: 95 * 2]))
+    assert "work_mode" not in legacy
+    assert legacy["battery_power"] == 300
+
+    custom = (RegisterField("extra_energy", address=4, width=2, scale=0.1),)
+    assert get_block_decoder(10, custom).decode(bytes(8) + (123456).to_bytes(4, "big") + bytes(8)) == {
+        "extra_energy": 12345.6
+    }
+
+
+def test_realtime_record_mapping():
+    """Test main frames parse to a lazy record that behaves like a dict."""
+    regs = bytearray(95 * 2)
+    regs[11 * 2 : 11 * 2 + 2] = (5230).to_bytes(2, "big")
+    record = parse_mqtt_frame(_build_frame(bytes(regs)))
+
+    assert isinstance(record, RealtimeRecord)
+    assert record["battery_voltage"] == 52.3
+    assert "work_mode" not in record  # Beyond the 95-register block
+    assert record.get("work_mode") is None
+
+    record["online_status"] = True
+    assert record["online_status"] is True
+    assert dict(record) == {**get_block_decoder(95).decode(bytes(regs)), "online_status": True}
+
+
+def test_frame_classifier_layouts():
+    """Test frames are classified by data length and counted per layout."""
+    state = RealtimeDecodeState()
+    regs = bytearray(151 * 2)
+    regs[150 * 2 : 150 * 2 + 2] = (2).to_bytes(2, "big")  # Sell Mode
+
+    # Byte count wraps to 46 for 302 bytes; still the main 151-register layout
+    assert parse_mqtt_frame(_build_frame(bytes(regs)), state)["work_mode"] == "Sell Mode"
+    # 150 registers: close to the main layout, decoded without padding
+    assert "work_mode" not in parse_mqtt_frame(_build_frame(bytes(regs[:300])), state)
+    assert parse_mqtt_frame(_build_frame(bytes(8)), state) is None
+    assert parse_mqtt_frame(_build_frame(bytes(120)), state) is None
+
+    assert state.layout_counts == {
+        "main_151": 1,
+        "main_151_near": 1,
+        "short": 1,
+        "unknown": 1,
+    }
+
+
+def test_parse_mqtt_frame_change_driven():
+    """Test a decode state emits only changed keys between full snapshots."""
+    state = RealtimeDecodeState(full_snapshot_interval=3)
+    regs = bytearray(95 * 2)
+    regs[59 * 2 : 59 * 2 + 2] = (250).to_bytes(2, "big")  # Grid importing 250 W
+    full = parse_mqtt_frame(_build_frame(bytes(regs)), state)
+    assert full == parse_mqtt_frame(_build_frame(bytes(regs)))
+
+    assert parse_mqtt_frame(_build_frame(bytes(regs)), state) == {}
+
+    regs[59 * 2 : 59 * 2 + 2] = (-100).to_bytes(2, "big", signed=True)  # Exporting 100 W
+    assert parse_mqtt_frame(_build_frame(bytes(regs)), state) == {
+        "grid_power": -100.0,
+        "grid_status": "Exporting",
+    }
+
+    assert parse_mqtt_frame(_build_frame(bytes(regs)), state) == {}
+    assert len(parse_mqtt_frame(_build_frame(bytes(regs)), state)) == len(full)  # Periodic snapshot
+
+    state.reset()
+    assert len(parse_mqtt_frame(_build_frame(bytes(regs)), state)) == len(full)
+
+
+def test_parse_mqtt_frames_multi_and_fragmented():
+    """Test several responses per message and responses split across messages."""
+    regs = bytearray(151 * 2)
+    regs[50 * 2 : 50 * 2 + 2] = (64).to_bytes(2, "big")  # SOC 64 %
+    main = _build_frame(bytes(regs))
+    cells = _build_frame((3300).to_bytes(2, "big") + bytes(98))
+
+    # Two envelopes in one message, then two responses back to back
+    results = parse_mqtt_frames(main + cells)
+    assert [r["battery_soc"] if "battery_soc" in r else "cells" for r in results] == [64, "cells"]
+    back_to_back = main + cells[cells.index(b"++++") + 4 :]
+    assert len(parse_mqtt_frames(back_to_back)) == 2
+    assert parse_mqtt_frames(main) == [parse_mqtt_frame(main)]
+
+    # Split mid-response: nothing until the tail arrives
+    extractor = FrameExtractor()
+    assert parse_mqtt_frames(main[:120], extractor=extractor) == []
+    assert extractor.has_pending
+    assert [r["battery_soc"] for r in parse_mqtt_frames(main[120:], extractor=extractor)] == [64]
+    assert not extractor.has_pending
+
+    # A lost tail is dropped when the next envelope arrives
+    assert parse_mqtt_frames(main[:120], extractor=extractor) == []
+    assert len(parse_mqtt_frames(cells, extractor=extractor)) == 1
+
+    # Corrupted response is counted and skipped, the next one still parses
+    state = RealtimeDecodeState()
+    bad = bytearray(main)
+    bad[-1] ^= 0xFF
+    assert len(parse_mqtt_frames(bytes(bad) + cells, state)) == 1
+    assert state.layout_counts == {"crc_error": 1, "cells": 1}
+
+
 @pytest.mark.asyncio
 async def test_mqtt_disconnect_cleanup(mock_hass, mock_config_entry, mock_mqtt_client):
     """Test MQTT disconnect properly cleans up."""
     client = LumentreeMqttClient(mock_hass, mock_config_entry, "TEST123", "TEST123")
-    client._mqttc = mock_mqtt_client
-    client._is_connected = True
+    hub = MagicMock(spec=LumentreeMqttHub)
+    hub.async_remove_device = AsyncMock()
+    client._hub = hub
     
-    with patch.object(client, "_cancel_batch_timer") as mock_cancel_batch, \
-         patch.object(client, "_cancel_offline_timer") as mock_cancel_offline:
+    with patch.object(LumentreeMqttClient, "_cancel_batch_timer") as mock_cancel_batch, \
+         patch.object(LumentreeMqttClient, "_cancel_offline_timer") as mock_cancel_offline:
         
         await client.disconnect()
         
         mock_cancel_batch.assert_called_once()
-        mock_cancel_offline.assert_called_once()
+        # Once by disconnect() and once more when going offline
+        assert mock_cancel_offline.call_count == 2
+        hub.async_remove_device.assert_awaited_once_with("reportApp/TEST123")
+        assert client.hub is None
+
+
+def test_mqtt_hub_routes_by_topic(mock_hass):
+    """Test the shared connection routes messages and disconnects per device topic."""
+    mock_hass.loop = MagicMock()
+    hub = LumentreeMqttHub(mock_hass, "TEST123")
+    first, second = MagicMock(), MagicMock()
+    hub._devices = {"reportApp/A": first, "reportApp/B": second}
+
+    hub._on_message(None, None, MagicMock(topic="reportApp/B", payload=b"\x01\x03"))
+    second._handle_payload.assert_called_once_with(b"\x01\x03")
+    first._handle_payload.assert_not_called()
+
+    hub._on_message(None, None, MagicMock(topic="reportApp/C", payload=b""))  # Ignored
+
+    hub._on_disconnect(None, None, 1)
+    scheduled = [call.args[0] for call in mock_hass.loop.call_soon_threadsafe.call_args_list]
+    assert first._handle_disconnect in scheduled
+    assert second._handle_disconnect in scheduled
+    assert not hub.is_connected
+
+    # A transport missing part of the hub interface cannot be instantiated
+    class PartialHub(MqttHubBase):
+        async def connect(self) -> None:
+            pass
+
+    with pytest.raises(TypeError):
+        PartialHub(mock_hass, "TEST123")
+
+
+
+@pytest.mark.asyncio
+async def test_asyncio_hub_against_local_broker(mock_hass, socket_enabled):
+    """Test the asyncio transport connects, subscribes, routes and publishes."""
+    received: asyncio.Queue = asyncio.Queue()
+
+    async def broker(reader, writer):
+        packet_type, _flags, _body = await read_packet(reader)
+        assert packet_type == CONNECT
+        writer.write(b"\x20\x02\x00\x00")
+        packet_type, _flags, body = await read_packet(reader)
+        assert packet_type == SUBSCRIBE
+        writer.write(b"\x90\x03" + body[:2] + b"\x00")
+        writer.write(encode_publish("reportApp/A", b"\x01\x03\x02"))
+        await writer.drain()
+        try:
+            while True:
+                packet_type, flags, body = await read_packet(reader)
+                if packet_type == PUBLISH:
+                    received.put_nowait(parse_publish(flags, body))
+        except asyncio.IncompleteReadError:
+            writer.close()  # Client disconnected
+
+    server = await asyncio.start_server(broker, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    hub = LumentreeAsyncioMqttHub(mock_hass, "TEST123", "127.0.0.1", port)
+    device = MagicMock()
+    try:
+        await hub.async_add_device("reportApp/A", device)
+        assert hub.is_connected
+
+        assert await hub.async_publish("listenApp/A", b"\x01\x03")
+        published = await asyncio.wait_for(received.get(), 2)
+        assert published == ("listenApp/A", b"\x01\x03", None)
+        device._handle_payload.assert_called_once_with(b"\x01\x03\x02")
+    finally:
+        await hub.async_remove_device("reportApp/A")
+        server.close()
+    assert not hub.is_connected
+
+
+@pytest.mark.asyncio
+async def test_asyncio_hub_reader_error_drops_connection():
+    """Test an unexpected error while routing ends the connection instead of the reader only."""
+    hub = LumentreeAsyncioMqttHub(MagicMock(), "TEST123")
+    hub._is_connected = True
+    hub._stopping = True  # No reconnect in this test
+    device = MagicMock()
+    device._handle_payload.side_effect = RuntimeError("callback bug")
+    hub._devices = {"reportApp/A": device}
+    reader = asyncio.StreamReader()
+    reader.feed_data(encode_publish("reportApp/A", b"\x01\x03"))
+
+    await asyncio.wait_for(hub._read_loop(reader), 2)
+
+    assert not hub.is_connected
+    device._handle_disconnect.assert_called_once()
+
+
+def test_adaptive_poll_scheduler():
+    """Test the poll interval speeds up on transients and backs off when idle."""
+    scheduler = AdaptivePollScheduler(min_interval=2, max_interval=60)
+    scheduler.observe({"pv_power": 0, "battery_power": -200, "load_power": 200})
+    night = [scheduler.next_interval(hour=23) for _ in range(12)]
+    assert night == sorted(night)
+    assert night[-1] == 60
+
+    scheduler.observe({"load_power": 2200})  # Kettle switched on
+    assert scheduler.next_interval(hour=23) == 2
+    assert scheduler.interval == 2
+    assert [scheduler.next_interval(hour=23) for _ in range(4)] == [2] * 4
+    assert scheduler.next_interval(hour=23) > 2
+
+    scheduler.observe({"battery_power": -280})  # Small drift keeps the base interval
+    assert scheduler.next_interval(hour=23) == 5
+
+    # Idle during the day is capped lower than at night
+    day = [scheduler.next_interval(hour=12) for _ in range(12)]
+    assert max(day) == 15
+
+    bounded = AdaptivePollScheduler(min_interval=10, max_interval=5)
+    assert bounded.min_interval == bounded.max_interval == 10
+    bounded.observe({"pv_power": 100})
+    bounded.observe({"pv_power": 3000})
+    assert bounded.next_interval(hour=12) == 10
+
+
+def test_request_tracker_matches_responses():
+    """Test responses are matched by function code and byte count."""
+    tracker = RequestTracker()
+    tracker.sent(3, 151, now=10.0)
+    tracker.sent(3, 50, now=10.0)
+    assert tracker.pending == 2
+    assert tracker.response(3, 100, now=10.08) == pytest.approx(80)  # Cells first
+    assert tracker.response(3, 46, now=10.3) == pytest.approx(300)  # 302 bytes mod 256
+    assert tracker.response(3, 46, now=10.4) is None
+    assert tracker.unmatched == 1
+
+    tracker.sent(3, 151, now=20.0)
+    assert tracker.response(3, 44, now=20.04) == pytest.approx(40)  # Near layout
+    tracker.sent(3, 151, now=30.0)
+    assert tracker.expire() == 1
+    stats = tracker.as_dict()
+    assert stats["timeouts"] == 1 and stats["pending"] == 0
+    assert stats["latency"]["count"] == 3
+    assert stats["latency"]["buckets"]["le_50ms"] == 1
+    assert stats["latency"]["buckets"]["le_500ms"] == 1
+    assert stats["latency"]["p50_le_ms"] == 100
+
+
+@pytest.mark.asyncio
+async def test_mqtt_closed_loop_request(mock_hass, mock_config_entry):
+    """Test a poll waits for its response and reports the round trip."""
+    mock_hass.loop = asyncio.get_running_loop()
+    client = LumentreeMqttClient(mock_hass, mock_config_entry, "TEST123", "TEST123")
+    client._on_loop = True
+    queued = []
+    with patch.object(LumentreeMqttClient, "_publish_command", AsyncMock(return_value=True)), \
+         patch.object(LumentreeMqttClient, "_start_offline_timer"), \
+         patch.object(LumentreeMqttClient, "_queue_update", lambda self, data: queued.append(data)):
+        assert await client.async_request_data()
+        mock_hass.loop.call_later(0.05, client._handle_payload, _build_frame(bytes(302)))
+        assert await client.async_wait_for_response(2)
+
+        assert await client.async_request_data()
+        assert not await client.async_wait_for_response(0.05)
+
+    stats = client.request_stats
+    assert stats["timeouts"] == 1 and stats["pending"] == 0
+    assert stats["latency"]["count"] == 1
+    assert queued[0]["mqtt_response_latency"] >= 40
+
+
+def test_poll_plan_tiers():
+    """Test tiers are due at their own cadence and commands are built once."""
+    plan = PollPlan()
+    assert plan.command(MAIN_TIER) == bytes.fromhex("0103000000970464")
+    assert plan.due(100.0) == (MAIN_TIER, CELLS_TIER)
+    payload = plan.payload((MAIN_TIER, CELLS_TIER))
+    assert payload == plan.command(MAIN_TIER) + plan.command(CELLS_TIER)
+    assert plan.payload((MAIN_TIER, CELLS_TIER)) is payload
+    plan.mark_read((MAIN_TIER, CELLS_TIER), 100.0)
+
+    assert plan.due(105.0) == (MAIN_TIER,)
+    assert plan.due(160.0) == (MAIN_TIER, CELLS_TIER)
+    plan.reset()
+    assert plan.due(101.0) == (MAIN_TIER, CELLS_TIER)
+
+
+def test_read_planner_ranges_decode_like_full_block():
+    """Test planned ranges are coalesced, distinct in length and decode like the full block."""
+    keys = {"battery_soc", "grid_power", "pv_power", "battery_power", "load_power"}
+    ranges = plan_read_ranges(keys, max_gap=8)
+    assert ranges is not None
+    assert len({count for _start, count in ranges}) == len(ranges)
+    assert sum(count for _start, count in ranges) < 151
+    assert len(plan_read_ranges(keys, max_gap=200)) == 1
+    # Ranges spanning most of the block cost more than reading it whole
+    assert plan_read_ranges({f.key for f in REALTIME_SCHEMA}, max_gap=200) is None
+
+    regs = bytearray(151 * 2)
+    regs[50 * 2 : 50 * 2 + 2] = (64).to_bytes(2, "big")  # SOC 64 %
+    regs[59 * 2 : 59 * 2 + 2] = (-100).to_bytes(2, "big", signed=True)  # Exporting 100 W
+    full = parse_mqtt_frame(_build_frame(bytes(regs)))
+
+    state = RealtimeDecodeState()
+    state.set_range_reads(ranges, get_block_decoder(151, range_schema(ranges)))
+    payload = b"".join(
+        _build_frame(bytes(regs[start * 2 : (start + count) * 2])) for start, count in ranges
+    )
+    merged = {}
+    for record in parse_mqtt_frames(payload, state):
+        merged.update(record)
+    for key in keys:
+        assert merged[key] == full[key]
+
+
+def test_read_planner_follows_entity_inputs():
+    """Test an entity computed from other keys keeps their registers in the plan."""
+    ranges = plan_read_ranges({"total_load_power"}, max_gap=0)
+    assert ranges is not None
+    read = {f.key for f in range_schema(ranges)}
+    assert {"load_power", "ac_output_power"} <= read
+
+
+def test_mailbox_merges_while_loop_stalled(mock_hass, mock_config_entry):
+    """Test thread deliveries collapse into one latest-wins drain while the loop is stalled."""
+    mock_hass.loop = MagicMock()
+    client = LumentreeMqttClient(mock_hass, mock_config_entry, "TEST123", "TEST123")
+    regs = bytearray(151 * 2)
+    for soc in range(20, 70):
+        regs[50 * 2 : 50 * 2 + 2] = soc.to_bytes(2, "big")
+        client._handle_payload(_build_frame(bytes(regs)))
+
+    # One drain scheduled however many messages arrived; memory stays bounded
+    assert mock_hass.loop.call_soon_threadsafe.call_count == 1
+    assert client.mailbox_stats == {"dropped": 49, "waiting": True}
+    records, timings = client._mailbox.take()
+    assert len(records) <= client._mailbox.max_records and len(timings) <= 16
+    merged = {}
+    for record in records:
+        merged.update(record)
+    assert merged["battery_soc"] == 69
+
+    # Every payload is still kept in the raw frame ring, newest first
+    assert client.raw_frames.count == 50
+    frames = client.raw_frames.last(2)
+    assert [len(f["hex"]) for f in frames] == [len(_build_frame(bytes(regs))) * 2] * 2
+    assert frames[0]["hex"] == _build_frame(bytes(regs)).hex()
+    assert len(client.raw_frames.last()) == client.raw_frames.capacity
+
+    mailbox = FrameMailbox(max_records=2)
+    assert mailbox.put([{"a": 1}], [])
+    assert not mailbox.put([{"b": 2}], [])
+    assert not mailbox.put([{"a": 3}], [(3, 46, 1.0)])
+    assert mailbox.take() == ([{"a": 3, "b": 2}], [(3, 46, 1.0)])
+    assert mailbox.take() == ([], [])
+    assert mailbox.put([], [])
+
+
+def test_key_dispatcher_routes_by_key(mock_hass):
+    """Test a batch only reaches the subscribers of its keys, each once."""
+    soc, total, online = MagicMock(), MagicMock(), MagicMock()
+    async_key_dispatcher_connect(mock_hass, "A", ("battery_soc",), soc)
+    remove_total = async_key_dispatcher_connect(
+        mock_hass, "A", ("load_power", "ac_output_power"), total
+    )
+    async_key_dispatcher_connect(mock_hass, "B", ("online_status",), online)
+
+    batch = {"load_power": 100.0, "ac_output_power": 50.0}
+    assert async_key_dispatcher_send(mock_hass, "A", batch) == 1
+    total.assert_called_once_with(batch)
+    soc.assert_not_called()
+    online.assert_not_called()
+
+    assert async_key_dispatcher_send(mock_hass, "A", {"grid_power": 1.0}) == 0
+    assert async_key_dispatcher_send(mock_hass, "C", batch) == 0  # No subscriber yet
+
+    remove_total()
+    assert async_key_dispatcher_send(mock_hass, "A", batch) == 0
+    assert async_key_dispatcher_send(mock_hass, "A", {"battery_soc": 64, "load_power": 1.0}) == 1
+
+
+def test_write_throttle_deadband_interval_staleness():
+    """Test significant-change rules and their option overrides."""
+    grid_voltage = next(f.throttle for f in REALTIME_SCHEMA if f.key == "grid_voltage")
+    assert grid_voltage.decide(230.0, 229.9, 5) == SKIP
+    assert grid_voltage.decide(230.0, 232.0, 5) == WRITE
+    assert grid_voltage.decide(230.0, 229.9, 300) == WRITE  # Stale: refresh inside the deadband
+    assert grid_voltage.decide(230.0, 230.0, 300) == SKIP
+    assert grid_voltage.decide(None, 230.0, 0) == WRITE
+
+    rule = WriteThrottle(deadband_pct=10, min_interval=30)
+    assert rule.decide(100.0, 109.0, 60) == SKIP
+    assert rule.decide(100.0, 111.0, 10) == HOLD
+    assert rule.decide(100.0, 111.0, 30) == WRITE
+    assert rule.decide("Charging", "Discharging", 0) == HOLD
 
+    overrides = {"grid_voltage": {"deadband": "0.2", "max_stale": None}, "battery_soc": {}}
+    assert resolve_throttle("grid_voltage", grid_voltage, overrides) == WriteThrottle(deadband=0.2)
+    assert resolve_throttle("battery_soc", rule, overrides) is None
+    assert resolve_throttle("load_power", None, overrides) is None
+    assert resolve_throttle("load_power", None, {"load_power": {"min_interval": 10}}) == (
+        WriteThrottle(min_interval=10)
+    )